@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+Measure the wall-clock time of importing parts of ``pyvrpn`` in a fresh interpreter,
+relative to starting an interpreter that imports nothing.
+
+Usage::
+
+    python benchmarks/bench_import.py -r 20
+
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+STATEMENTS = [
+    'import pyvrpn',
+    'import pyvrpn; pyvrpn.__version__',
+    'import pyvrpn.server',
+    'import pyvrpn.receiver',
+]
+
+
+def run_time(statement, repeat):
+    times = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', statement])
+        times.append(time.perf_counter() - started_at)
+    return statistics.median(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-r', type=int, default=20, help='number of interpreters to start per statement')
+    args = parser.parse_args()
+
+    baseline = run_time('pass', args.r)
+    print('{:<40} {:>8.1f} ms'.format('(interpreter startup)', baseline * 1e3))
+    for statement in STATEMENTS:
+        try:
+            elapsed = run_time(statement, args.r)
+        except subprocess.CalledProcessError:
+            print('{:<40} {:>8}'.format(statement, 'failed'))
+            continue
+        print('{:<40} {:>+8.1f} ms'.format(statement, (elapsed - baseline) * 1e3))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Compare dictionaries (as created by ``vrpn``) with compact |Sample| objects:
+the memory used to keep samples for a session, the cost of creating and reading them,
+the time taken by full garbage collections while they are kept,
+and the cost of receiving samples that are not kept, where the compact object is allocated in addition to the dict.
+
+Usage::
+
+    python benchmarks/bench_samples.py -n 1000000
+
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from pyvrpn.sample import TrackerSample
+
+
+def make_dict(ix):
+    return {
+        'sensor': ix % 16,
+        'position': (ix * 0.001, 0.5, 1.5),
+        'quaternion': (0.0, 0.0, 0.0, 1.0),
+        'time': ix / 240,
+    }
+
+
+def retained_bytes(n, convert):
+    gc.collect()
+    tracemalloc.start()
+    kept = [convert(make_dict(ix)) for ix in range(n)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def throughput(n, convert):
+    data = [make_dict(ix) for ix in range(1000)]
+    started_at = time.perf_counter()
+    for _ in range(n // 1000):
+        for item in data:
+            sample = convert(item)
+            sample['position']
+            sample['time']
+    return n / (time.perf_counter() - started_at)
+
+
+def churn(n, convert):
+    # Receive-and-discard: vrpn allocates the dict either way; conversion allocates one more object per sample.
+    gc.collect()
+    collections = [0]
+
+    def count(phase, info):
+        if phase == 'start':
+            collections[0] += 1
+
+    gc.callbacks.append(count)
+    started_at = time.perf_counter()
+    for ix in range(n):
+        sample = convert(make_dict(ix))
+        sample['position']
+    elapsed = time.perf_counter() - started_at
+    gc.callbacks.remove(count)
+    return elapsed / n, collections[0]
+
+
+def gc_times(n, convert):
+    # The first collection after the samples are created, and a later one (after dicts have been untracked).
+    kept = [convert(make_dict(ix)) for ix in range(n)]
+    elapsed = []
+    for _ in range(2):
+        started_at = time.perf_counter()
+        gc.collect()
+        elapsed.append(time.perf_counter() - started_at)
+    del kept
+    return elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=1000000)
+    args = parser.parse_args()
+
+    for name, convert in [('dict', lambda data: data), ('TrackerSample', TrackerSample.from_dict)]:
+        size = retained_bytes(args.n, convert)
+        first_gc, later_gc = gc_times(args.n, convert)
+        print('{:<14} {:>7.1f} MB retained {:>5.0f} B/sample {:>12,.0f} samples/s  gc: {:>6.1f} ms, then {:>6.1f} ms'.format(
+            name, size / 1e6, size / args.n, throughput(args.n, convert), first_gc * 1e3, later_gc * 1e3,
+        ))
+        per_sample, collections = churn(args.n, convert)
+        print('{:<14} not kept: {:>6.2f} us/sample received, {} gc collections'.format(
+            '', per_sample * 1e6, collections))
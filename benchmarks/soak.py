@@ -0,0 +1,368 @@
+#!/usr/bin/env python
+"""
+Soak test: run a |LocalServer| with a mix of devices and handler workloads for a long time,
+and report sustained throughput, latency percentiles, memory growth and CPU time per sample.
+
+Latency is measured from each sample's ``'time'`` (set by the server) to the moment a handler receives it.
+With ``--stand-in``, no VRPN server is needed: the devices are connected to stand-in objects
+that generate samples at the requested rates when polled, and the server process is an idle interpreter,
+so that the run exercises pyvrpn's receive path on its own.
+Analog devices are only available as stand-ins, since VRPN has no example analog server.
+
+With ``--slo-p99`` (and/or ``--slo-p999``), the exit code is 1 if the overall latency percentile exceeds it,
+so the harness can gate releases.
+
+Usage::
+
+    python benchmarks/soak.py --trackers 4 --sensors 16 --tracker-rate 240 --buttons 2 --duration 3600
+    python benchmarks/soak.py --stand-in --analogs 2 --channels 14 --analog-rate 1000 --workload heavy \\
+        --duration 600 --slo-p99 5 --json soak.json
+
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import sys
+import time
+from datetime import datetime
+from functools import partial
+
+from pyvrpn import receiver
+from pyvrpn.analog import ArrayAnalog
+from pyvrpn.server import LocalServer
+
+BUTTONS_PER_DEVICE = 4
+DIALS_PER_DEVICE = 4
+# An idle process standing in for the VRPN server; the config file path is appended to its arguments.
+IDLE_SERVER = [sys.executable, '-c', 'import time; time.sleep(1e9)']
+
+
+class LatencyHistogram:
+    """Latencies in logarithmic buckets (about 2% wide, from 1 us to about 17 min), using constant memory."""
+    base = 1e-6
+    ratio = 1.02
+
+    def __init__(self):
+        self.counts = [0] * 1100
+        self.n = 0
+        self.max = 0.0
+
+    def add(self, latency):
+        self.n += 1
+        if latency > self.max:
+            self.max = latency
+        ix = int(math.log(latency / self.base, self.ratio)) if latency > self.base else 0
+        self.counts[min(ix, len(self.counts) - 1)] += 1
+
+    def merge(self, other):
+        self.n += other.n
+        self.max = max(self.max, other.max)
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def percentile(self, q):
+        if not self.n:
+            return float('nan')
+        rank = q / 100 * self.n
+        cumulative = 0
+        for ix, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                # Upper edge of the bucket, capped at the largest value seen.
+                return min(self.base * self.ratio ** (ix + 1), self.max)
+        return self.max
+
+
+class Meter:
+    """Records the latency of every sample delivered to a handler."""
+    def __init__(self):
+        self.interval = LatencyHistogram()
+        self.overall = LatencyHistogram()
+
+    def sample(self, data):
+        sent = data['time']
+        sent = sent.timestamp() if isinstance(sent, datetime) else sent
+        self.interval.add(max(time.time() - sent, 0.0))
+
+    def frames(self, times, values):
+        now = time.time()
+        for sent in times.tolist():
+            self.interval.add(max(now - sent, 0.0))
+
+    def roll(self):
+        interval, self.interval = self.interval, LatencyHistogram()
+        self.overall.merge(interval)
+        return interval
+
+
+class StandInConnection:
+    """Stands in for a ``vrpn.receiver`` object, generating samples at a fixed rate whenever it is polled."""
+    def __init__(self, make_sample, n_sensors, rate, name):
+        self.make_sample = make_sample
+        self.n_sensors = max(n_sensors, 1)
+        self.rate = rate
+        self.callbacks = []
+        self.started_at = time.perf_counter()
+        self.n_reports = 0
+
+    def register_change_handler(self, user_data, callback, callback_type=None, sensor=None):
+        self.callbacks.append((callback, sensor))
+
+    def unregister_change_handler(self, user_data, callback, callback_type=None, sensor=None):
+        self.callbacks.remove((callback, sensor))
+
+    def mainloop(self):
+        due = int((time.perf_counter() - self.started_at) * self.rate)
+        # Like a real connection, deliver at most about a second's worth at once.
+        n_reports = min(due - self.n_reports, int(self.rate) + 1)
+        self.n_reports = due
+        for _ in range(n_reports):
+            now = datetime.now()
+            for sensor in range(self.n_sensors):
+                data = self.make_sample(sensor, now)
+                for callback, only in self.callbacks:
+                    if only is None or only == sensor:
+                        callback('', data)
+
+
+class StandInAnalog(ArrayAnalog):
+    device_type = 'vrpn_Analog_StandIn'
+
+    def __init__(self, n_channels):
+        self._n_channels = n_channels
+        super().__init__(n_channels)
+
+    @property
+    def n_channels(self):
+        return self._n_channels
+
+
+def tracker_sample(sensor, now):
+    return {'sensor': sensor, 'position': (0.1 * sensor, 0.5, 1.5), 'quaternion': (0.0, 0.0, 0.0, 1.0), 'time': now}
+
+
+def button_sample(sensor, now):
+    return {'button': sensor, 'state': now.microsecond & 1, 'time': now}
+
+
+def dial_sample(sensor, now):
+    return {'dial': sensor, 'change': 0.01, 'time': now}
+
+
+def analog_sample(n_channels, sensor, now):
+    return {'channel': [0.5] * n_channels, 'time': now.timestamp()}
+
+
+def make_devices(args):
+    """Create the devices, to be connected to stand-ins with `--stand-in`."""
+    devices = []
+    for _ in range(args.trackers):
+        devices.append((receiver.TestTracker(args.sensors, args.tracker_rate), tracker_sample, args.tracker_rate))
+    for _ in range(args.buttons):
+        devices.append((receiver.TestButton(BUTTONS_PER_DEVICE, args.button_rate), button_sample, args.button_rate))
+    for _ in range(args.dials):
+        devices.append((receiver.TestDial(DIALS_PER_DEVICE, 1, args.dial_rate), dial_sample, args.dial_rate))
+    for _ in range(args.analogs):
+        devices.append((StandInAnalog(args.channels), partial(analog_sample, args.channels), args.analog_rate))
+
+    if args.stand_in:
+        for device, make_sample, rate in devices:
+            n_sensors = 1 if isinstance(device, ArrayAnalog) else device.n_sensors
+            device.object_class = partial(StandInConnection, make_sample, n_sensors, rate)
+    return [device for device, _, _ in devices]
+
+
+def busy(seconds, data=None):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def attach_workload(devices, meter, workload, handler_us):
+    """Attach the latency meter and the handlers of the workload."""
+    for device in devices:
+        if isinstance(device, ArrayAnalog):
+            device.subscribe_batches(meter.frames)
+        else:
+            device.subscribe(meter.sample)
+        if workload == 'none':
+            continue
+
+        # 'light': the per-sample bookkeeping a typical experiment does.
+        if isinstance(device, receiver.Tracker):
+            from pyvrpn.stats import RollingStats
+            stats = RollingStats(window=60, n_sensors=device.n_sensors)
+            stats.attach(device)
+        if not isinstance(device, ArrayAnalog):
+            device.detect_gaps()
+        if handler_us:
+            device.subscribe(partial(busy, handler_us * 1e-6))
+
+        if workload == 'heavy':
+            # Also per-sensor handlers, rate-limited subscriptions and trigger zones.
+            for sensor in device:
+                sensor.set_handler('on_input', lambda data: None)
+            device.subscribe(lambda data: None, max_rate=60)
+            if isinstance(device, receiver.Tracker):
+                from pyvrpn.zones import ZoneSet
+                zones = ZoneSet(hysteresis=0.01)
+                zones.add_box('table', (0, 0, 0), (1, 1, 1))
+                zones.add_sphere('target', (0.5, 0.5, 1.5), 0.1)
+                zones.attach(device)
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Peak rather than current, but still shows growth.
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+@asyncio.coroutine
+def soak(server, devices, meter, args, loop, rows):
+    """Append a row to `rows` every report interval, so that the intervals so far survive an interruption."""
+    started_at = last_at = time.perf_counter()
+    last_cpu = time.process_time()
+    last_samples = 0
+    baseline_rss = None
+    while True:
+        yield from asyncio.sleep(args.report_interval, loop=loop)
+        now, cpu = time.perf_counter(), time.process_time()
+        n_samples = sum(device.n_samples for device in devices)
+        interval = meter.roll()
+        rss = rss_bytes()
+        if baseline_rss is None or now - started_at <= args.warmup:
+            # Growth is measured from the end of the warm-up.
+            baseline_rss = rss
+
+        new_samples = n_samples - last_samples
+        row = {
+            'elapsed': now - started_at,
+            'samples': n_samples,
+            'throughput': new_samples / (now - last_at),
+            'p50_ms': interval.percentile(50) * 1e3,
+            'p99_ms': interval.percentile(99) * 1e3,
+            'p999_ms': interval.percentile(99.9) * 1e3,
+            'rss_mb': rss / 1e6,
+            'rss_growth_mb': (rss - baseline_rss) / 1e6,
+            'cpu_us_per_sample': (cpu - last_cpu) / new_samples * 1e6 if new_samples else float('nan'),
+            'server_running': server.is_running,
+        }
+        rows.append(row)
+        print('{elapsed:>8.0f} s {samples:>12,} samples {throughput:>10,.0f}/s  '
+              'latency p50 {p50_ms:>7.2f} p99 {p99_ms:>7.2f} p99.9 {p999_ms:>7.2f} ms  '
+              'rss {rss_mb:>7.1f} MB ({rss_growth_mb:>+6.1f})  cpu {cpu_us_per_sample:>6.2f} us/sample'.format(**row))
+        sys.stdout.flush()
+
+        last_at, last_cpu, last_samples = now, cpu, n_samples
+        if now - started_at >= args.duration:
+            return
+
+
+def summarize(rows, meter, args):
+    overall = meter.overall
+    measured = [row for row in rows if row['elapsed'] > args.warmup] or rows
+    summary = {
+        'args': vars(args),
+        'samples': rows[-1]['samples'] if rows else 0,
+        'throughput': sum(row['throughput'] for row in measured) / len(measured) if measured else 0.0,
+        'min_throughput': min((row['throughput'] for row in measured), default=0.0),
+        'p50_ms': overall.percentile(50) * 1e3,
+        'p99_ms': overall.percentile(99) * 1e3,
+        'p999_ms': overall.percentile(99.9) * 1e3,
+        'max_ms': overall.max * 1e3,
+        'rss_growth_mb': rows[-1]['rss_growth_mb'] if rows else 0.0,
+        # Intervals without new samples have no CPU time per sample.
+        'cpu_us_per_sample': mean_or_nan([row['cpu_us_per_sample'] for row in measured
+                                          if math.isfinite(row['cpu_us_per_sample'])]),
+        'intervals': rows,
+    }
+    violations = []
+    if args.slo_p99 is not None and summary['p99_ms'] > args.slo_p99:
+        violations.append('p99 {:.2f} ms > {} ms'.format(summary['p99_ms'], args.slo_p99))
+    if args.slo_p999 is not None and summary['p999_ms'] > args.slo_p999:
+        violations.append('p99.9 {:.2f} ms > {} ms'.format(summary['p999_ms'], args.slo_p999))
+    summary['slo_violations'] = violations
+    return summary
+
+
+def mean_or_nan(values):
+    return sum(values) / len(values) if values else float('nan')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    devices = parser.add_argument_group('devices')
+    devices.add_argument('--trackers', type=int, default=1, help='number of tracker devices')
+    devices.add_argument('--sensors', type=int, default=4, help='sensors per tracker')
+    devices.add_argument('--tracker-rate', type=float, default=240.0, help='tracker report rate (Hz)')
+    devices.add_argument('--buttons', type=int, default=0,
+                         help='number of button devices, with {} buttons each'.format(BUTTONS_PER_DEVICE))
+    devices.add_argument('--button-rate', type=float, default=10.0)
+    devices.add_argument('--dials', type=int, default=0,
+                         help='number of dial devices, with {} dials each'.format(DIALS_PER_DEVICE))
+    devices.add_argument('--dial-rate', type=float, default=60.0)
+    devices.add_argument('--analogs', type=int, default=0, help='number of analog devices (stand-in only)')
+    devices.add_argument('--channels', type=int, default=14, help='channels per analog device')
+    devices.add_argument('--analog-rate', type=float, default=1000.0)
+    devices.add_argument('--stand-in', action='store_true', help='use stand-in devices instead of a VRPN server')
+
+    run = parser.add_argument_group('run')
+    run.add_argument('--workload', choices=['none', 'light', 'heavy'], default='light',
+                     help='handlers to attach besides the latency meter')
+    run.add_argument('--handler-us', type=float, default=0.0,
+                     help='additional busy time per sample in a handler, in microseconds')
+    run.add_argument('--pool', action='store_true', help='poll through a ConnectionPool (not with --stand-in)')
+    run.add_argument('--duration', type=float, default=60.0, help='seconds to run')
+    run.add_argument('--warmup', type=float, default=10.0, help='seconds excluded from throughput and RSS growth')
+    run.add_argument('--report-interval', type=float, default=10.0, help='seconds between reports')
+
+    report = parser.add_argument_group('report')
+    report.add_argument('--slo-p99', type=float, help='maximum overall p99 latency (ms)')
+    report.add_argument('--slo-p999', type=float, help='maximum overall p99.9 latency (ms)')
+    report.add_argument('--json', help='write the summary and all intervals to this file')
+    args = parser.parse_args(argv)
+
+    if args.analogs and not args.stand_in:
+        parser.error('analog devices are only available with --stand-in')
+    if args.pool and args.stand_in:
+        # The pool polls one device per iteration, expecting it to read the shared connection for all;
+        # stand-ins are independent, so the others would just go unpolled.
+        parser.error('--pool needs a VRPN server, and cannot be used with --stand-in')
+
+    devices = make_devices(args)
+    meter = Meter()
+    attach_workload(devices, meter, args.workload, args.handler_us)
+
+    loop = asyncio.get_event_loop()
+    kwargs = {'_exe': IDLE_SERVER} if args.stand_in else {}
+    server = LocalServer(devices, pool_connections=args.pool, loop=loop, **kwargs)
+    loop.run_until_complete(server.start())
+    rows = []
+    try:
+        loop.run_until_complete(soak(server, devices, meter, args, loop, rows))
+    except KeyboardInterrupt:
+        print('\ninterrupted; summarizing the {} intervals so far'.format(len(rows)))
+    finally:
+        loop.run_until_complete(server.stop())
+
+    summary = summarize(rows, meter, args)
+    print('\n{samples:,} samples, {throughput:,.0f}/s sustained (min {min_throughput:,.0f}/s)'.format(**summary))
+    print('latency p50 {p50_ms:.2f} ms, p99 {p99_ms:.2f} ms, p99.9 {p999_ms:.2f} ms, max {max_ms:.2f} ms'.format(
+        **summary))
+    print('rss growth {rss_growth_mb:+.1f} MB, cpu {cpu_us_per_sample:.2f} us/sample'.format(**summary))
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(summary, file, indent=2)
+    for violation in summary['slo_violations']:
+        print('SLO violated: {}'.format(violation))
+    return 1 if summary['slo_violations'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -60,6 +60,9 @@ setup(
     ],
     extras_require={
         # eg: 'rst': ["docutils>=0.11"],
+        'numpy': ['numpy'],
+        'hdf5': ['numpy', 'h5py'],
+        'parquet': ['numpy', 'pyarrow'],
     },
 
 )
@@ -1,5 +1,75 @@
-from pkg_resources import get_distribution
+import sys
+from importlib import import_module
 
-from pyvrpn.server import *
+__all__ = [
+    'Server',
+    'LocalServer',
+    'Watchdog',
+    'Metrics',
+]
 
-__version__ = get_distribution('pyvrpn').version
+# Attributes and submodules are imported on first access,
+# so that ``import pyvrpn`` does not pay for asyncio, pyglet or vrpn in processes that never use them.
+_LAZY_ATTRIBUTES = {
+    'Server': 'pyvrpn.server',
+    'LocalServer': 'pyvrpn.server',
+    'Watchdog': 'pyvrpn.watchdog',
+    'Metrics': 'pyvrpn.metrics',
+}
+_SUBMODULES = {
+    'analog',
+    'catalog',
+    'clock',
+    'gaps',
+    'hub',
+    'logging',
+    'markers',
+    'metrics',
+    'offload',
+    'overload',
+    'pool',
+    'profiling',
+    'receiver',
+    'recording',
+    'sample',
+    'server',
+    'stats',
+    'stream',
+    'watchdog',
+    'zones',
+}
+
+
+def _get_version():
+    try:
+        from importlib.metadata import version
+    except ImportError:
+        # Python < 3.8.
+        from pkg_resources import get_distribution
+        return get_distribution('pyvrpn').version
+    return version('pyvrpn')
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(import_module(_LAZY_ATTRIBUTES[name]), name)
+    elif name in _SUBMODULES:
+        value = import_module('{}.{}'.format(__name__, name))
+    elif name == '__version__':
+        value = _get_version()
+    else:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | _SUBMODULES | {'__version__'})
+
+
+if sys.version_info < (3, 7):
+    # Module-level __getattr__ is not supported (PEP 562), so import eagerly.
+    from pyvrpn.server import *
+    from pyvrpn.metrics import Metrics
+    __version__ = _get_version()
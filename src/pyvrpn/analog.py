@@ -0,0 +1,217 @@
+"""
+Analog receivers that collect channel values into preallocated NumPy arrays.
+
+Requires ``numpy``.
+
+"""
+import numpy as np
+
+from pyvrpn.gaps import _to_seconds
+from pyvrpn.logging import setup_module_logging
+from pyvrpn.receiver import Analog
+
+__all__ = [
+    'ArrayAnalog',
+    'USDigitalA2',
+    'DataGlove5DTUSB',
+]
+
+error, warning, info, debug = setup_module_logging(__name__)
+
+
+class ArrayAnalog(Analog):
+    """Analog receiver with array-native channel data.
+
+    VRPN delivers each frame of an analog device as a dictionary holding a list of channel values,
+    which is expensive to dispatch to Python handlers at the kHz rates of data gloves and force plates.
+    Instead, each frame is written into the next row of a preallocated array (|ArrayAnalog.values|),
+    with its timestamp in seconds since the epoch in |ArrayAnalog.times|,
+    and the rows received are passed to batch subscribers (see |ArrayAnalog.subscribe_batches|)
+    as two arrays once per |Receiver.mainloop| call, or whenever the buffer fills up.
+
+    Frames are still dispatched one by one to ``'on_input'`` handlers and |Subscribable.subscribe| subscriptions,
+    but only while there are any, so a receiver used only through batches costs one row assignment per frame.
+
+    Subclasses should override |ArrayAnalog.n_channels| if the configuration determines the number of channels;
+    otherwise the buffer is allocated when the first frame arrives.
+
+    Parameters
+    ----------
+    config_args : varies
+        See |Receiver|.
+    additional_config_lines : list of str, optional
+    capacity : int, optional
+        Number of frames the buffer holds.
+        It should comfortably exceed the number of frames received between |Receiver.mainloop| calls.
+        Defaults to 4096.
+
+    Attributes
+    ----------
+    capacity : int
+    values : |numpy.ndarray| or None
+        The buffer of channel values, shape ``(capacity, n_channels)``.
+        Only the first |ArrayAnalog.n_buffered| rows belong to the current batch.
+    times : |numpy.ndarray| or None
+        The timestamps of the frames in |ArrayAnalog.values|, shape ``(capacity,)``.
+    n_buffered : int
+        Number of frames received since the last batch was dispatched.
+    n_batches : int
+        Number of batches dispatched.
+    n_overflows : int
+        Number of times the buffer filled up between |Receiver.mainloop| calls,
+        causing a batch to be dispatched early.
+
+    """
+    def __init__(self, *config_args, additional_config_lines=None, capacity=4096):
+        super().__init__(*config_args, additional_config_lines=additional_config_lines)
+        self.capacity = capacity
+        self.n_buffered = 0
+        self.n_batches = 0
+        self.n_overflows = 0
+        self._batch_subscribers = ()
+        self._latest = None
+        self.values = self.times = None
+        if self.n_channels is not None:
+            self._allocate(self.n_channels)
+
+    @property
+    def n_channels(self):
+        """
+        Can be provided by subclasses, if the configuration determines the number of channels.
+
+        """
+        if self.values is None:
+            return None
+        return self.values.shape[1]
+
+    @property
+    def latest(self):
+        """The channel values of the most recent frame, or None if none has been received."""
+        if self._latest is None:
+            return None
+        return self.values[self._latest]
+
+    def subscribe_batches(self, handler):
+        """
+        Call a function with each batch of frames.
+
+        Parameters
+        ----------
+        handler : func
+            Called with two arguments, the timestamps and the channel values of the frames in the batch,
+            arrays of shape ``(n_frames,)`` and ``(n_frames, n_channels)``.
+            These are views into the buffer, which is overwritten by later frames:
+            copy them to keep them beyond the call.
+
+        """
+        # Replace rather than mutate, as with subscriptions.
+        self._batch_subscribers = self._batch_subscribers + (handler,)
+
+    def unsubscribe_batches(self, handler):
+        if handler not in self._batch_subscribers:
+            raise ValueError('{!r} is not subscribed to {}'.format(handler, self))
+        self._batch_subscribers = tuple(other for other in self._batch_subscribers if other != handler)
+
+    def close(self):
+        super().close()
+        self._batch_subscribers = ()
+
+    def _allocate(self, n_channels):
+        self.values = np.zeros((self.capacity, n_channels))
+        self.times = np.zeros(self.capacity)
+
+    def _callback(self, user_data, data):
+        self.n_samples += 1
+        ix = self.n_buffered
+        if ix == self.capacity:
+            self.n_overflows += 1
+            self._flush()
+            ix = 0
+        elif self.values is None:
+            self._allocate(len(data['channel']))
+
+        self.values[ix] = data['channel']
+        time = data['time']
+        self.times[ix] = time if type(time) is float else _to_seconds(time)
+        self.n_buffered = ix + 1
+        self._latest = ix
+
+        if self._subscriptions or self._handlers != ():
+            # Only reached with no handlers the first time, before they are compiled.
+            self._dispatch(data)
+
+    def _end_batch(self, now):
+        self._flush()
+        super()._end_batch(now)
+
+    def _flush(self):
+        n_frames = self.n_buffered
+        if not n_frames:
+            return
+        self.n_buffered = 0
+        self.n_batches += 1
+        times = self.times[:n_frames]
+        values = self.values[:n_frames]
+        for handler in self._batch_subscribers:
+            handler(times, values)
+
+
+class USDigitalA2(ArrayAnalog):
+    """
+    US Digital A2 absolute encoders,
+    reporting angles in tenths of a degree from 0 to 3599, one channel per encoder.
+
+    Parameters
+    ----------
+    com_port : int
+        The serial port; if 0, the server searches for the right one.
+    n_channels : int
+        Number of encoders.
+    report_on_change : bool, optional
+        If True, report only when a value changes rather than continuously.
+    capacity : int, optional
+        See |ArrayAnalog|.
+
+    """
+    device_type = 'vrpn_Analog_USDigital_A2'
+
+    def __init__(self, com_port, n_channels, report_on_change=False, capacity=4096):
+        super().__init__(com_port, n_channels, int(report_on_change), capacity=capacity)
+
+    @property
+    def n_channels(self):
+        return self.config_args[1]
+
+
+class DataGlove5DTUSB(ArrayAnalog):
+    """
+    5DT Data Glove Ultra (USB or USB wireless), reporting raw flexure values from 0 to 1.
+    The server connects to the first glove of the given type.
+
+    Parameters
+    ----------
+    n_channels : {5, 14}, optional
+        The glove's number of sensors.
+        Defaults to 5.
+    hand : {'right', 'left'}, optional
+        Defaults to ``'right'``.
+    capacity : int, optional
+        See |ArrayAnalog|.
+
+    """
+    def __init__(self, n_channels=5, hand='right', capacity=4096):
+        if n_channels not in (5, 14):
+            raise ValueError('n_channels must be 5 or 14, not {!r}'.format(n_channels))
+        if hand not in ('right', 'left'):
+            raise ValueError("hand must be 'right' or 'left', not {!r}".format(hand))
+        self._n_channels = n_channels
+        self.hand = hand
+        super().__init__(capacity=capacity)
+
+    @property
+    def device_type(self):
+        return 'vrpn_Analog_5dtUSB_Glove{}{}'.format(self._n_channels, self.hand.title())
+
+    @property
+    def n_channels(self):
+        return self._n_channels
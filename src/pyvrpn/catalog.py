@@ -0,0 +1,256 @@
+"""
+Catalog of the device types described in the sample ``vrpn.cfg`` shipped with this package.
+
+The file is parsed on first use and cached.
+Receiver classes are generated only when requested, and cached as well.
+
+"""
+import re
+import pkgutil
+from collections import namedtuple
+from functools import lru_cache
+
+__all__ = [
+    'Argument',
+    'DeviceType',
+    'device_types',
+    'get_device_type',
+    'receiver_class',
+]
+
+_SECTION_SEPARATOR = re.compile(r'^#{20,}\s*$', re.MULTILINE)
+_ARGUMENT_LINE = re.compile(r'^#\s+(char|int|float|double|string)(?:\[\d*\])?\s+(\w+)(?:\[\])?\s*(.*)$')
+_EXAMPLE_LINE = re.compile(r'^#\s?(vrpn_\w+)\s+(.*)$')
+_CONVERTERS = {
+    'int': int,
+    'float': float,
+    'double': float,
+}
+_N_SENSORS_ARGUMENTS = {
+    'number_of_sensors',
+    'number_of_markers_to_detect',
+    'number_of_buttons',
+    'number_of_dials',
+}
+
+
+class Argument(namedtuple('Argument', ['name', 'type', 'description', 'optional'])):
+    """A configuration argument of a device type.
+
+    Attributes
+    ----------
+    name : str
+    type : str
+        As given in ``vrpn.cfg``: ``'char'``, ``'int'``, ``'float'``, ``'double'`` or ``'string'``.
+    description : str
+        The rest of the line in ``vrpn.cfg``, if any.
+    optional : bool
+
+    """
+    __slots__ = ()
+
+    def convert(self, value):
+        """Convert `value` to this argument's type, raising |ValueError| if it cannot be."""
+        converter = _CONVERTERS.get(self.type)
+        return converter(value) if converter else str(value)
+
+
+class DeviceType(namedtuple('DeviceType', ['name', 'description', 'arguments', 'examples'])):
+    """A device type described in ``vrpn.cfg``.
+
+    Attributes
+    ----------
+    name : str
+        The device type as recognized by the server (e.g. ``'vrpn_Tracker_NULL'``).
+    description : str
+        The comments preceding the argument list.
+    arguments : tuple of |Argument| or None
+        The configuration arguments, not including the device name (which |Receiver| provides).
+        None if ``vrpn.cfg`` does not list them in the usual format.
+    examples : tuple of tuple of str
+        The example configuration lines for this type, split into fields,
+        not including the device type or name, so that they line up with |arguments|.
+
+    """
+    __slots__ = ()
+
+    @property
+    def n_required_arguments(self):
+        if self.arguments is None:
+            return None
+        return sum(not argument.optional for argument in self.arguments)
+
+    def validate(self, config_args):
+        """
+        Check configuration arguments against the documented schema.
+        The descriptions in ``vrpn.cfg`` are informal and often omit trailing options,
+        so only missing required arguments and values of the wrong type are rejected.
+        Anything is accepted if the schema is unknown.
+
+        Parameters
+        ----------
+        config_args : sequence
+
+        Raises
+        ------
+        |ValueError|
+            If the arguments do not match the schema.
+
+        """
+        if self.arguments is None:
+            return
+        if len(config_args) < self.n_required_arguments:
+            raise ValueError('{} takes at least {} arguments ({}), got {}'.format(
+                self.name,
+                self.n_required_arguments,
+                ', '.join(argument.name for argument in self.arguments),
+                len(config_args),
+            ))
+        for argument, value in zip(self.arguments, config_args):
+            try:
+                argument.convert(value)
+            except ValueError:
+                raise ValueError('argument {} of {} must be of type {}, not {!r}'.format(
+                    argument.name, self.name, argument.type, value))
+
+
+@lru_cache()
+def device_types():
+    """
+    Parse the sample ``vrpn.cfg``.
+    The result is cached, so the file is parsed at most once per process.
+
+    Returns
+    -------
+    dict of str to |DeviceType|
+
+    """
+    text = pkgutil.get_data('pyvrpn', 'vrpn.cfg').decode('utf-8', errors='replace')
+    types = {}
+    for section in _SECTION_SEPARATOR.split(text):
+        for device_type in _parse_section(section):
+            if device_type.name in types:
+                # Later sections sometimes give more examples for the same type; keep the first schema.
+                existing = types[device_type.name]
+                types[device_type.name] = existing._replace(examples=existing.examples + device_type.examples)
+            else:
+                types[device_type.name] = device_type
+    return types
+
+
+def get_device_type(name):
+    """
+    Get a device type by name.
+
+    Parameters
+    ----------
+    name : str
+        The device type as recognized by the server (e.g. ``'vrpn_Tracker_NULL'``).
+
+    Returns
+    -------
+    |DeviceType|
+
+    """
+    try:
+        return device_types()[name]
+    except KeyError:
+        raise KeyError('{!r} is not described in vrpn.cfg'.format(name)) from None
+
+
+@lru_cache(maxsize=None)
+def receiver_class(name, base=None):
+    """
+    Get a |Receiver| subclass for a device type.
+    Classes are generated on first request and cached.
+
+    The base class is chosen from the device type's name (e.g. ``vrpn_Tracker_*`` devices derive from |Tracker|),
+    unless `base` is given.
+    If the first argument is the number of sensors, |FirstArgumentIsNSensors| is mixed in.
+    The class's ``catalog_entry`` attribute is the |DeviceType|;
+    use its |DeviceType.validate| method to check configuration arguments.
+
+    Parameters
+    ----------
+    name : str
+        The device type as recognized by the server (e.g. ``'vrpn_Tracker_NULL'``).
+    base : type, optional
+        A |Receiver| subclass to derive from.
+
+    Returns
+    -------
+    type
+
+    """
+    from pyvrpn import receiver
+
+    device_type = get_device_type(name)
+    bases = [base or _guess_base(name, receiver)]
+    if device_type.arguments and device_type.arguments[0].name in _N_SENSORS_ARGUMENTS:
+        bases.append(receiver.FirstArgumentIsNSensors)
+
+    namespace = {
+        '__doc__': _make_docstring(device_type),
+        '__module__': __name__,
+        'device_type': name,
+        'catalog_entry': device_type,
+    }
+    return type(_class_name(name), tuple(bases), namespace)
+
+
+def _parse_section(section):
+    description = []
+    arguments = []
+    examples = {}
+
+    for line in section.splitlines():
+        line = line.rstrip()
+        example = _EXAMPLE_LINE.match(line)
+        if example:
+            examples.setdefault(example.group(1), []).append(tuple(example.group(2).split()))
+            continue
+
+        argument = _ARGUMENT_LINE.match(line)
+        if argument:
+            type_, arg_name, rest = argument.groups()
+            arguments.append(Argument(arg_name, type_, rest.strip(), 'optional' in rest.lower()))
+        elif line.startswith('#') and not arguments:
+            description.append(line.lstrip('#').strip())
+
+    # The first argument is always the name of the device, which is provided by the Receiver.
+    if arguments and arguments[0].name.startswith('name'):
+        arguments = arguments[1:]
+    elif not arguments and any(len(fields) > 1 for lines in examples.values() for fields in lines):
+        # The examples take arguments, but they are not documented in the usual format.
+        arguments = None
+
+    for name, lines in examples.items():
+        yield DeviceType(
+            name=name,
+            description='\n'.join(description).strip(),
+            arguments=None if arguments is None else tuple(arguments),
+            examples=tuple(fields[1:] for fields in lines),
+        )
+
+
+def _guess_base(name, receiver):
+    for kind in ['Tracker', 'Button', 'Dial', 'Analog', 'Text']:
+        if name.startswith('vrpn_{}'.format(kind)):
+            return getattr(receiver, kind)
+    return receiver.Receiver
+
+
+def _class_name(name):
+    return ''.join(part[:1].upper() + part[1:] for part in name.split('_')[1:])
+
+
+def _make_docstring(device_type):
+    lines = [device_type.description or device_type.name, '', 'Parameters', '----------']
+    if device_type.arguments is None:
+        lines.append('config_args : varies')
+        lines.append('    See vrpn.cfg.')
+    for argument in device_type.arguments or ():
+        lines.append('{} : {}{}'.format(argument.name, argument.type, ', optional' if argument.optional else ''))
+        if argument.description:
+            lines.append('    {}'.format(argument.description))
+    return '\n'.join(lines)
@@ -0,0 +1,112 @@
+"""
+Integration with pyglet's clock, so that pyglet applications can receive data without running a second loop.
+
+"""
+import pyglet
+
+from pyvrpn.logging import setup_module_logging
+
+__all__ = [
+    'DevicePump',
+]
+
+error, warning, info, debug = setup_module_logging(__name__)
+
+
+class DevicePump:
+    """Device polling scheduled on a |pyglet.clock.Clock|.
+
+    Calls the |mainloop| method of each connected device from pyglet's clock,
+    so that handlers run on the main thread between frames, and ``pyglet.app.run()`` can be the only loop::
+
+        server = LocalServer(devices, run_mainloop=False)
+        asyncio.get_event_loop().run_until_complete(server.start())
+        pump = DevicePump(server)
+        pump.start()
+        pyglet.app.run()
+
+    By default, the devices are polled at the highest |Receiver.expected_rate| among them,
+    so that no sample waits longer than one sample period,
+    and otherwise once per frame (|pyglet.clock.schedule|), which follows the display's refresh rate with vsync.
+    Either way, pyglet's event loop sleeps until the next scheduled call rather than busy-waiting.
+
+    When pumping a |LocalServer|, each call also runs one iteration of its asyncio event loop
+    (without blocking), so that the server's output monitoring, |Watchdog| and |Metrics| keep running.
+
+    Parameters
+    ----------
+    devices : |LocalServer|, |ConnectionPool| or sequence of |Receiver|
+        The devices to poll.
+        If a |LocalServer| (which should have been created with ``run_mainloop=False``) or a |ConnectionPool|,
+        its ``poll`` method is used.
+    rate : float, optional
+        Number of times per second to poll the devices.
+        Use 0 to poll once per frame even if the devices' rates are known.
+    clock : |pyglet.clock.Clock|, optional
+        Defaults to pyglet's default clock.
+    loop : |asyncio.EventLoop|, optional
+        The event loop to step on each call.
+        Defaults to the server's loop (or the default loop) if `devices` is a |LocalServer|, and to None otherwise.
+
+    Attributes
+    ----------
+    rate : float or None
+        The polling rate; None or 0 if polling once per frame.
+    clock : |pyglet.clock.Clock|
+    loop : |asyncio.EventLoop| or None
+    n_calls : int
+        Number of times the devices have been polled.
+    is_scheduled : bool
+
+    """
+    def __init__(self, devices, rate=None, clock=None, loop=None):
+        if hasattr(devices, 'poll'):
+            self._source = devices
+            self._devices = devices.devices
+            if loop is None and hasattr(devices, 'loop'):
+                import asyncio
+                loop = devices.loop or asyncio.get_event_loop()
+        else:
+            self._source = None
+            self._devices = devices
+
+        if rate is None:
+            rates = [device.expected_rate for device in self._devices if device.expected_rate]
+            rate = max(rates) if rates else None
+
+        self.rate = rate
+        self.clock = clock or pyglet.clock.get_default()
+        self.loop = loop
+        self.n_calls = 0
+        self.is_scheduled = False
+
+    def start(self):
+        """Schedule polling on the clock."""
+        if self.is_scheduled:
+            raise RuntimeError('DevicePump is already scheduled')
+        if self.rate:
+            self.clock.schedule_interval(self, 1 / self.rate)
+        else:
+            self.clock.schedule(self)
+        self.is_scheduled = True
+        info('polling {} devices {}'.format(
+            len(self._devices), 'at {} Hz'.format(self.rate) if self.rate else 'every frame'))
+
+    def stop(self):
+        """Unschedule polling."""
+        self.clock.unschedule(self)
+        self.is_scheduled = False
+
+    def __call__(self, dt=None):
+        if self._source is not None:
+            self._source.poll()
+        else:
+            for device in self._devices:
+                if device.is_connected:
+                    device.mainloop()
+        self.n_calls += 1
+
+        if self.loop is not None and not self.loop.is_running():
+            # Run whatever is ready, without waiting.
+            self.loop.call_soon(self.loop.stop)
+            self.loop.run_forever()
@@ -0,0 +1,227 @@
+from collections import deque, namedtuple
+
+from pyvrpn.logging import setup_module_logging
+
+__all__ = [
+    'Gap',
+    'GapDetector',
+    'SensorGaps',
+]
+
+error, warning, info, debug = setup_module_logging(__name__)
+
+
+class Gap(namedtuple('Gap', ['sensor', 'index', 'start', 'end', 'n_missing'])):
+    """A gap in the data from one sensor.
+
+    Attributes
+    ----------
+    sensor : int
+    index : int
+        Number of samples received from the sensor before the gap,
+        i.e. the position in a recording of that sensor's samples at which the missing samples belong.
+    start : float
+        Timestamp of the last sample before the gap, in seconds.
+    end : float
+        Timestamp of the first sample after the gap, in seconds.
+    n_missing : int
+        Estimated number of samples lost.
+
+    """
+    __slots__ = ()
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+class SensorGaps:
+    """Gap detection state for one sensor.
+
+    Attributes
+    ----------
+    n_samples : int
+        Number of samples received.
+    n_gaps : int
+        Number of gaps detected.
+    n_dropped : int
+        Estimated number of samples lost in those gaps.
+    interval : float
+        The expected (or, if the rate is not known, the estimated) number of seconds between samples.
+    last_time : float or None
+        Timestamp of the last sample, in seconds.
+
+    """
+    __slots__ = ('n_samples', 'n_gaps', 'n_dropped', 'interval', 'last_time')
+
+    def __init__(self, interval=0.0):
+        self.n_samples = 0
+        self.n_gaps = 0
+        self.n_dropped = 0
+        self.interval = interval
+        self.last_time = None
+
+    def __repr__(self):
+        return 'SensorGaps(n_samples={}, n_gaps={}, n_dropped={}, interval={:.6f})'.format(
+            self.n_samples, self.n_gaps, self.n_dropped, self.interval)
+
+
+class GapDetector:
+    """Dropped-sample detector.
+
+    A handler (usually attached with |Receiver.detect_gaps|) that watches the timestamps of incoming samples,
+    separately for each sensor,
+    and reports a gap whenever the time since the previous sample is more than `tolerance` sample intervals.
+    The interval is ``1 / expected_rate`` if the rate is known.
+    Otherwise it is estimated from the first `warmup` intervals,
+    and then tracked with a slow moving average of the intervals that are not gaps.
+
+    Only the timestamps assigned by the server are used, so delays between the server and the client are not gaps.
+    This is meant for devices that report continuously (e.g. trackers and analogs);
+    buttons and dials report only on change, so every pause would be a gap.
+
+    Processing a sample updates a few attributes of an existing |SensorGaps| object and allocates nothing else;
+    |Gap| objects are created only when a gap is found.
+    Listeners (see |GapDetector.add_listener|) are called with each |Gap|,
+    so that recordings can mark where the missing data belongs.
+
+    Parameters
+    ----------
+    expected_rate : float, optional
+        The rate, in Hz, at which each sensor reports.
+    tolerance : float, optional
+        Number of sample intervals without data that make a gap.
+        Defaults to 1.5.
+    warmup : int, optional
+        Number of intervals used to estimate the sample interval, if `expected_rate` is not given.
+        No gaps are reported before then.
+        Defaults to 10.
+    key : str, optional
+        The key in the data giving the sensor number.
+        Samples without it are counted as sensor 0.
+        Defaults to ``'sensor'``.
+    history : int, optional
+        Number of recent gaps to keep in |GapDetector.recent|.
+        Defaults to 100.
+
+    Attributes
+    ----------
+    expected_rate : float or None
+    tolerance : float
+    warmup : int
+    key : str
+    sensors : dict of int to |SensorGaps|
+    recent : |collections.deque| of |Gap|
+        The most recent gaps, oldest first.
+    n_samples : int
+    n_gaps : int
+    n_dropped : int
+        Totals over all sensors.
+
+    """
+    # Weight of each new interval in the moving average.
+    smoothing = 0.01
+
+    def __init__(self, expected_rate=None, tolerance=1.5, warmup=10, key='sensor', history=100):
+        if tolerance <= 1:
+            raise ValueError('tolerance must be greater than 1, not {!r}'.format(tolerance))
+
+        self.expected_rate = expected_rate
+        self.tolerance = tolerance
+        self.warmup = warmup
+        self.key = key
+        self.sensors = {}
+        self.recent = deque(maxlen=history)
+        self._listeners = ()
+
+    @property
+    def n_samples(self):
+        return sum(state.n_samples for state in self.sensors.values())
+
+    @property
+    def n_gaps(self):
+        return sum(state.n_gaps for state in self.sensors.values())
+
+    @property
+    def n_dropped(self):
+        return sum(state.n_dropped for state in self.sensors.values())
+
+    def add_listener(self, listener):
+        """
+        Call a function with every |Gap| detected from now on.
+
+        Parameters
+        ----------
+        listener : func
+            Called with a single argument, the |Gap|.
+
+        """
+        # Replace rather than mutate, as with subscriptions.
+        self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener):
+        if listener not in self._listeners:
+            raise ValueError('{!r} is not listening to {}'.format(listener, self))
+        self._listeners = tuple(other for other in self._listeners if other != listener)
+
+    def reset(self):
+        """Forget all sensors, e.g. after reconnecting, when timestamps may jump."""
+        self.sensors = {}
+
+    def __call__(self, data):
+        sensor = data.get(self.key, 0)
+        state = self.sensors.get(sensor)
+        if state is None:
+            state = self.sensors[sensor] = SensorGaps(1 / self.expected_rate if self.expected_rate else 0.0)
+
+        now = data['time']
+        if type(now) is not float:
+            now = _to_seconds(now)
+
+        last = state.last_time
+        state.last_time = now
+        n_intervals = state.n_samples
+        state.n_samples = n_intervals + 1
+        if last is None:
+            return
+
+        elapsed = now - last
+        if elapsed <= 0:
+            # Several samples in one report, or the clock went backwards.
+            return
+
+        if not self.expected_rate:
+            if n_intervals <= self.warmup:
+                # Running mean of the first intervals.
+                state.interval += (elapsed - state.interval) / n_intervals
+                return
+            if elapsed <= self.tolerance * state.interval:
+                state.interval += self.smoothing * (elapsed - state.interval)
+                return
+
+        elif elapsed <= self.tolerance * state.interval:
+            return
+
+        self._gap(sensor, state, last, now, elapsed)
+
+    def _gap(self, sensor, state, start, end, elapsed):
+        n_missing = max(int(round(elapsed / state.interval)) - 1, 1)
+        state.n_gaps += 1
+        state.n_dropped += n_missing
+        # The index of the sample that arrived after the gap.
+        gap = Gap(sensor, state.n_samples - 1, start, end, n_missing)
+        self.recent.append(gap)
+        debug('gap in sensor {}: {:.4f} s (about {} samples)'.format(sensor, elapsed, n_missing))
+        for listener in self._listeners:
+            listener(gap)
+
+    def __str__(self):
+        return 'GapDetector(expected_rate={!r})'.format(self.expected_rate)
+
+
+def _to_seconds(time):
+    # vrpn gives datetimes; tests and recordings may give plain numbers.
+    try:
+        return time.timestamp()
+    except AttributeError:
+        return float(time)
@@ -0,0 +1,248 @@
+import os
+import json
+import asyncio
+from datetime import datetime
+from functools import partial
+
+from pyvrpn.logging import setup_module_logging
+from pyvrpn.stream import StreamClosed
+
+__all__ = [
+    'Hub',
+    'HubClient',
+]
+
+error, warning, info, debug = setup_module_logging(__name__)
+
+
+class Hub:
+    """Rebroadcast hub.
+
+    Publishes the samples received by one process to any number of other local processes over a Unix socket,
+    so that each consumer does not need its own VRPN connection.
+    Each sample is encoded once, as a line of JSON ``{"device": <name>, "data": <sample>}``
+    (with ``'time'`` in seconds since the epoch), and the same bytes are written to every connected client.
+    While no clients are connected, publishing a sample costs one attribute check.
+
+    Clients can connect and disconnect at any time (see |HubClient|).
+    A client that falls more than `max_buffer_size` bytes behind is disconnected
+    rather than being allowed to hold up the others or grow the producer's memory.
+
+    Pass an instance to |LocalServer| to publish all its devices, named by their |Receiver.uuid|::
+
+        server = LocalServer(devices, hub=Hub('/tmp/pyvrpn-hub.sock'))
+
+    Other |Subscribable| objects (e.g. a single |Sensor|) can be published with |Hub.publish|.
+    Samples must be published from the thread running the event loop (as |LocalServer| does).
+
+    Parameters
+    ----------
+    path : str
+        The path of the Unix socket.
+    max_buffer_size : int, optional
+        Maximum number of bytes waiting to be sent to a client before it is disconnected.
+        Defaults to 1 MiB.
+
+    Attributes
+    ----------
+    path : str
+    max_buffer_size : int
+    n_clients : int
+        Number of currently connected clients.
+    n_published : int
+        Number of samples sent to at least one client.
+    n_disconnected : int
+        Number of clients disconnected for being too slow.
+
+    """
+    def __init__(self, path, max_buffer_size=1 << 20):
+        self.path = path
+        self.max_buffer_size = max_buffer_size
+        self.n_published = 0
+        self.n_disconnected = 0
+
+        self._clients = ()
+        self._subscriptions = []
+
+    @property
+    def n_clients(self):
+        return len(self._clients)
+
+    def publish(self, source, name, **filters):
+        """
+        Publish the samples from a receiver or sensor.
+
+        Parameters
+        ----------
+        source : |Subscribable|
+        name : str
+            The name given with each sample from `source`.
+        filters
+            Keyword arguments passed to |Subscribable.subscribe|.
+
+        Returns
+        -------
+        |Subscription|
+
+        """
+        prefix = '{{"device": {}, "data": '.format(json.dumps(name))
+        subscription = source.subscribe(partial(self._send, prefix), **filters)
+        self._subscriptions.append((source, subscription))
+        return subscription
+
+    @asyncio.coroutine
+    def run(self, server, loop=None):
+        """
+        Publish the devices of `server` and serve clients, until canceled.
+
+        This method is a |coroutine|.
+
+        Parameters
+        ----------
+        server : |LocalServer|
+        loop : |asyncio.EventLoop|, optional
+
+        """
+        for device in server.devices:
+            self.publish(device, device.uuid)
+        socket_server = yield from asyncio.start_unix_server(self._serve, self.path, loop=loop)
+        info('publishing {} devices on {}'.format(len(server.devices), self.path))
+        try:
+            # Wait until canceled.
+            yield from asyncio.Future(loop=loop)
+        finally:
+            self.close()
+            socket_server.close()
+            os.unlink(self.path)
+
+    def close(self):
+        """Stop publishing and disconnect all clients."""
+        for source, subscription in self._subscriptions:
+            source.unsubscribe(subscription)
+        self._subscriptions = []
+        for writer in self._clients:
+            writer.close()
+        self._clients = ()
+
+    def _send(self, prefix, data):
+        clients = self._clients
+        if not clients:
+            return
+
+        if type(data) is not dict:
+            data = dict(data)
+        line = (prefix + json.dumps(data, default=_encode) + '}\n').encode()
+        for writer in clients:
+            if writer.transport.get_write_buffer_size() > self.max_buffer_size:
+                warning('disconnecting slow hub client')
+                self.n_disconnected += 1
+                self._remove(writer)
+                writer.close()
+            else:
+                writer.write(line)
+        self.n_published += 1
+
+    @asyncio.coroutine
+    def _serve(self, reader, writer):
+        # Replace rather than mutate, so that a client can be removed while sending.
+        self._clients = self._clients + (writer,)
+        debug('hub client connected ({} total)'.format(len(self._clients)))
+        try:
+            # Clients do not send anything; this returns when they disconnect.
+            while (yield from reader.read(4096)):
+                pass
+        finally:
+            self._remove(writer)
+            debug('hub client disconnected ({} total)'.format(len(self._clients)))
+
+    def _remove(self, writer):
+        self._clients = tuple(client for client in self._clients if client is not writer)
+
+
+class HubClient:
+    """Client of a |Hub|.
+
+    Receives samples published by a |Hub| in another process::
+
+        client = HubClient('/tmp/pyvrpn-hub.sock')
+        yield from client.connect()
+        while True:
+            device, data = yield from client.get()
+
+    or with ``async for device, data in client``.
+    Positions and quaternions are lists rather than tuples, and ``'time'`` is in seconds since the epoch.
+
+    Parameters
+    ----------
+    path : str
+        The path of the hub's Unix socket.
+    loop : |asyncio.EventLoop|, optional
+
+    Attributes
+    ----------
+    path : str
+    loop : |asyncio.EventLoop|
+    n_received : int
+
+    """
+    def __init__(self, path, loop=None):
+        self.path = path
+        self.loop = loop
+        self.n_received = 0
+        self._reader = None
+        self._writer = None
+
+    @asyncio.coroutine
+    def connect(self):
+        """
+        Connect to the hub.
+
+        This method is a |coroutine|.
+
+        """
+        self._reader, self._writer = yield from asyncio.open_unix_connection(self.path, loop=self.loop)
+
+    @asyncio.coroutine
+    def get(self):
+        """
+        Get the next sample.
+
+        This method is a |coroutine|.
+
+        Returns
+        -------
+        tuple of (str, dict)
+            The device name and the sample.
+
+        Raises
+        ------
+        |StreamClosed|
+            If the hub closed the connection.
+
+        """
+        line = yield from self._reader.readline()
+        if not line:
+            raise StreamClosed
+        self.n_received += 1
+        message = json.loads(line.decode())
+        return message['device'], message['data']
+
+    def close(self):
+        self._writer.close()
+
+    def __aiter__(self):
+        return self
+
+    @asyncio.coroutine
+    def __anext__(self):
+        try:
+            return (yield from self.get())
+        except StreamClosed:
+            raise StopAsyncIteration
+
+
+def _encode(value):
+    # vrpn gives datetimes.
+    if isinstance(value, datetime):
+        return value.timestamp()
+    raise TypeError('{!r} is not JSON serializable'.format(value))
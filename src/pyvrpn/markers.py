@@ -0,0 +1,256 @@
+"""
+Tracker receivers that collect marker data into preallocated NumPy arrays.
+
+Requires ``numpy``.
+
+"""
+from time import perf_counter
+
+import numpy as np
+
+from pyvrpn.gaps import _to_seconds
+from pyvrpn.logging import setup_module_logging
+from pyvrpn.receiver import Tracker, PolhemusLibertyLatus
+
+__all__ = [
+    'ArrayTracker',
+    'ArrayLibertyLatus',
+]
+
+error, warning, info, debug = setup_module_logging(__name__)
+
+
+class ArrayTracker(Tracker):
+    """Tracker receiver with per-marker buffers.
+
+    A mixin for tracker receivers with many markers (sensors) reporting at high rates.
+    Each sample is written into the next row of its marker's preallocated buffers
+    (|ArrayTracker.positions|, |ArrayTracker.quaternions| and |ArrayTracker.times|),
+    and the rows received are passed to batch subscribers (see |ArrayTracker.subscribe_batches|)
+    once per marker per |Receiver.mainloop| call, or whenever a marker's buffer fills up.
+
+    Only one callback is registered with VRPN, rather than one per marker as for other trackers;
+    samples are routed to the |Sensor| objects only while those have handlers or subscriptions,
+    and dispatched one by one to the receiver's ``'on_input'`` handlers and subscriptions only while there are any.
+
+    Markers come in and out of range, e.g. when they are occluded or carried out of the tracked volume.
+    A marker is in range while it has reported within the last `range_timeout` seconds;
+    range listeners (see |ArrayTracker.add_range_listener|) are called when that changes.
+    Buffers and sensors are allocated for all markers up front,
+    so markers returning to range cost nothing more than their samples.
+
+    Parameters
+    ----------
+    capacity : int, optional
+        Number of samples each marker's buffer holds.
+        It should comfortably exceed the number of samples per marker received between |Receiver.mainloop| calls.
+        Defaults to 64.
+    range_timeout : float, optional
+        Defaults to 0.05 seconds.
+
+    Attributes
+    ----------
+    capacity : int
+    range_timeout : float
+    positions : |numpy.ndarray|
+        Shape ``(n_sensors, capacity, 3)``.
+    quaternions : |numpy.ndarray|
+        Shape ``(n_sensors, capacity, 4)``.
+    times : |numpy.ndarray|
+        Timestamps in seconds since the epoch, shape ``(n_sensors, capacity)``.
+        Only the first ``n_buffered[marker]`` rows of each marker belong to the current batch.
+    n_buffered : list of int
+        Number of samples of each marker received since its last batch was dispatched.
+    in_range : |numpy.ndarray| of bool
+        Shape ``(n_sensors,)``.
+    last_seen : |numpy.ndarray|
+        |time.perf_counter| value of the last batch including each marker (-inf if none), shape ``(n_sensors,)``.
+    n_batches : int
+        Number of per-marker batches dispatched.
+    n_overflows : int
+        Number of times a marker's buffer filled up between |Receiver.mainloop| calls,
+        causing its batch to be dispatched early.
+    n_ignored : int
+        Number of samples from markers beyond |n_sensors|, which are ignored.
+
+    """
+    def __init__(self, *config_args, capacity=64, range_timeout=0.05, **kwargs):
+        super().__init__(*config_args, **kwargs)
+        n_markers = self.n_sensors
+        if not n_markers:
+            raise ValueError('{} needs at least one marker'.format(type(self).__name__))
+
+        self.capacity = capacity
+        self.range_timeout = range_timeout
+        self.positions = np.zeros((n_markers, capacity, 3))
+        self.quaternions = np.zeros((n_markers, capacity, 4))
+        self.times = np.zeros((n_markers, capacity))
+        self.n_buffered = [0] * n_markers
+        self.in_range = np.zeros(n_markers, dtype=bool)
+        self.last_seen = np.full(n_markers, -np.inf)
+        self.n_batches = 0
+        self.n_overflows = 0
+        self.n_ignored = 0
+
+        self._latest = np.zeros(n_markers, dtype=int)
+        self._overflowed = set()
+        self._batch_subscribers = ()
+        self._range_listeners = ()
+
+    @property
+    def latest_positions(self):
+        """The most recent position of each marker (zeros before any data), shape ``(n_sensors, 3)``."""
+        return self.positions[np.arange(len(self._latest)), self._latest]
+
+    @property
+    def latest_quaternions(self):
+        """The most recent orientation of each marker (zeros before any data), shape ``(n_sensors, 4)``."""
+        return self.quaternions[np.arange(len(self._latest)), self._latest]
+
+    def subscribe_batches(self, handler):
+        """
+        Call a function with each marker's batch of samples.
+
+        Parameters
+        ----------
+        handler : func
+            Called with four arguments: the marker number,
+            and the timestamps, positions and quaternions of its samples in the batch,
+            arrays of shape ``(n_samples,)``, ``(n_samples, 3)`` and ``(n_samples, 4)``.
+            These are views into the buffers, which are overwritten by later samples:
+            copy them to keep them beyond the call.
+
+        """
+        # Replace rather than mutate, as with subscriptions.
+        self._batch_subscribers = self._batch_subscribers + (handler,)
+
+    def unsubscribe_batches(self, handler):
+        if handler not in self._batch_subscribers:
+            raise ValueError('{!r} is not subscribed to {}'.format(handler, self))
+        self._batch_subscribers = tuple(other for other in self._batch_subscribers if other != handler)
+
+    def add_range_listener(self, listener):
+        """
+        Call a function when a marker comes into or goes out of range.
+
+        Parameters
+        ----------
+        listener : func
+            Called with two arguments, the marker number and whether it is now in range.
+
+        """
+        self._range_listeners = self._range_listeners + (listener,)
+
+    def remove_range_listener(self, listener):
+        if listener not in self._range_listeners:
+            raise ValueError('{!r} is not listening to {}'.format(listener, self))
+        self._range_listeners = tuple(other for other in self._range_listeners if other != listener)
+
+    def close(self):
+        super().close()
+        self._batch_subscribers = ()
+        self._range_listeners = ()
+
+    def mainloop(self):
+        n_samples = self.n_samples
+        super().mainloop()
+        # Without data there is no batch, but markers still go out of range.
+        if self.n_samples == n_samples and self.in_range.any():
+            self._update_range(perf_counter())
+
+    def _open(self):
+        self._object = self.object_class('{}@{}'.format(self.uuid, self.host))
+        self.last_sample_at = perf_counter()
+        # Sensors are routed from the one callback, see _callback.
+        self._register(self._callback, self.callback_type)
+
+    def _callback(self, user_data, data):
+        # This is the hot path: avoid per-sample logging and attribute lookups where possible.
+        self.n_samples += 1
+        marker = data['sensor']
+        n_buffered = self.n_buffered
+        if marker >= len(n_buffered):
+            self.n_ignored += 1
+            return
+
+        ix = n_buffered[marker]
+        if ix == self.capacity:
+            self.n_overflows += 1
+            self._overflowed.add(marker)
+            self._flush(marker)
+            ix = 0
+        self.positions[marker, ix] = data['position']
+        self.quaternions[marker, ix] = data['quaternion']
+        time = data['time']
+        self.times[marker, ix] = time if type(time) is float else _to_seconds(time)
+        n_buffered[marker] = ix + 1
+        self._latest[marker] = ix
+
+        routes = self._routes
+        if routes is None:
+            routes = self._compile_routes()
+        # Handlers are None only until compiled, in which case dispatching compiles them.
+        if self._subscriptions or self._handlers != () or self._has_routes:
+            if self._sample_class is not None:
+                data = self._sample_class.from_dict(data)
+            self._dispatch(data)
+            sensor = routes[marker]
+            if sensor is not None:
+                sensor._dispatch(data)
+
+    def _end_batch(self, now):
+        last_seen = self.last_seen
+        for marker, n_samples in enumerate(self.n_buffered):
+            if n_samples:
+                last_seen[marker] = now
+                self._flush(marker)
+        if self._overflowed:
+            for marker in self._overflowed:
+                last_seen[marker] = now
+            self._overflowed.clear()
+        self._update_range(now)
+        super()._end_batch(now)
+
+    def _flush(self, marker):
+        n_samples = self.n_buffered[marker]
+        self.n_buffered[marker] = 0
+        self.n_batches += 1
+        times = self.times[marker, :n_samples]
+        positions = self.positions[marker, :n_samples]
+        quaternions = self.quaternions[marker, :n_samples]
+        for handler in self._batch_subscribers:
+            handler(marker, times, positions, quaternions)
+
+    def _update_range(self, now):
+        in_range = now - self.last_seen < self.range_timeout
+        changed = np.flatnonzero(in_range != self.in_range)
+        if not len(changed):
+            return
+        self.in_range = in_range
+        for marker in changed.tolist():
+            debug('marker {} of {} {} range'.format(marker, self, 'in' if in_range[marker] else 'out of'))
+            for listener in self._range_listeners:
+                listener(marker, bool(in_range[marker]))
+
+
+class ArrayLibertyLatus(ArrayTracker, PolhemusLibertyLatus):
+    """Polhemus Liberty Latus high-speed tracker, with per-marker buffers (see |ArrayTracker|).
+
+    For rigs with several receptor units, use one instance per unit;
+    each is a separate device in the server configuration file.
+
+    Parameters
+    ----------
+    n_markers : int
+        Number of markers (sensors) to launch.
+    additional_config_lines : list of str, optional
+        Additional lines to write to the config file (commands to send to the Polhemus).
+    compact : bool, optional
+        See |Receiver|; applies only to samples dispatched one by one.
+    capacity : int, optional
+        Number of samples each marker's buffer holds.
+        Defaults to 64, about a quarter of a second at 240 Hz.
+    range_timeout : float, optional
+        Defaults to 0.05 seconds, 12 samples at 240 Hz.
+
+    """
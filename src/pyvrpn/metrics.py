@@ -0,0 +1,244 @@
+import os
+import json
+import asyncio
+import traceback
+from time import monotonic
+
+from pyvrpn.logging import setup_module_logging
+from pyvrpn.receiver import Subscription
+
+__all__ = [
+    'Metrics',
+]
+
+error, warning, info, debug = setup_module_logging(__name__)
+
+
+class Metrics:
+    """Runtime metrics for a |LocalServer|.
+
+    Nothing is measured per sample:
+    the devices, subscriptions, queues and output readers already keep plain integer counters,
+    and |Metrics.snapshot| reads them only when asked.
+    The only ongoing cost is a timer, every `interval` seconds, that measures the event loop's lag
+    and, every `rate_window` seconds, reads the counters to update the rates.
+    Snapshots only read: any number of callers and socket clients see the same rates and maxima.
+
+    Pass an instance to |LocalServer| to use it::
+
+        server = LocalServer(devices, metrics=Metrics(socket_path='/tmp/pyvrpn.sock'))
+
+    and either call |Metrics.snapshot| from the program itself, or read the stats socket from a shell::
+
+        socat - UNIX-CONNECT:/tmp/pyvrpn.sock
+
+    Each connection to the socket receives one snapshot as a line of JSON.
+
+    Parameters
+    ----------
+    socket_path : str, optional
+        If given, serve snapshots on a Unix socket at this path while the server is running.
+    interval : float, optional
+        Number of seconds between event loop lag measurements.
+        Defaults to 0.1.
+    rate_window : float, optional
+        Number of seconds over which rates are averaged.
+        Defaults to 1.
+    time_handlers : bool, optional
+        If True, count the calls to the ``'on_input'`` handlers of the server's devices and sensors,
+        and measure the time spent in them and in subscribed handlers (see |Subscription.total_time|),
+        while the server is running.
+        This costs two clock reads per handler call, and affects all subscriptions in the process.
+        Subscribed handlers are always counted.
+
+    Attributes
+    ----------
+    socket_path : str or None
+    interval : float
+    rate_window : float
+    time_handlers : bool
+    server : |LocalServer| or None
+        The server being measured.
+    loop_lag : float
+        The most recent event loop lag, in seconds:
+        how much later than scheduled the lag timer ran.
+    max_loop_lag : float
+        The largest lag since |Metrics.run| started.
+    rates : dict of str to float
+        The rate of each counter over the last `rate_window` seconds, updated by |Metrics.update_rates|.
+
+    """
+    def __init__(self, socket_path=None, interval=0.1, rate_window=1.0, time_handlers=False):
+        self.socket_path = socket_path
+        self.interval = interval
+        self.rate_window = rate_window
+        self.time_handlers = time_handlers
+
+        self.server = None
+        self.loop_lag = 0.0
+        self.max_loop_lag = 0.0
+        self.rates = {}
+        self._last_counts = {}
+        self._last_time = None
+
+    @asyncio.coroutine
+    def run(self, server, loop=None):
+        """
+        Measure event loop lag, and serve snapshots on |socket_path| if given, until canceled.
+
+        This method is a |coroutine|.
+
+        Parameters
+        ----------
+        server : |LocalServer|
+        loop : |asyncio.EventLoop|, optional
+
+        """
+        loop = loop or asyncio.get_event_loop()
+        self.server = server
+        self.max_loop_lag = 0.0
+        # Start the rates from here.
+        self.update_rates()
+        socket_server = None
+        if self.socket_path:
+            socket_server = yield from asyncio.start_unix_server(self._serve, self.socket_path, loop=loop)
+            info('serving metrics on {}'.format(self.socket_path))
+        if self.time_handlers:
+            Subscription.timing = True
+            self._recompile_handlers()
+
+        try:
+            next_rates = loop.time() + self.rate_window
+            while True:
+                scheduled = loop.time() + self.interval
+                yield from asyncio.sleep(self.interval, loop=loop)
+                now = loop.time()
+                self.loop_lag = now - scheduled
+                if self.loop_lag > self.max_loop_lag:
+                    self.max_loop_lag = self.loop_lag
+                if now >= next_rates:
+                    self.update_rates()
+                    next_rates = now + self.rate_window
+        finally:
+            if self.time_handlers:
+                Subscription.timing = False
+                self._recompile_handlers()
+            if socket_server:
+                socket_server.close()
+                os.unlink(self.socket_path)
+
+    def update_rates(self):
+        """
+        Read the counters, and update |Metrics.rates| to their averages since the previous call.
+        Called every `rate_window` seconds by |Metrics.run|.
+
+        """
+        server = self.server
+        now = monotonic()
+        counts = {'mainloop': server.n_iterations}
+        for stream, reader in server.output_readers.items():
+            if reader is not None:
+                counts[stream] = reader.n_lines
+        for device in server.devices:
+            counts[device.uuid] = device.n_samples
+
+        if self._last_time is not None and now > self._last_time:
+            rates = {}
+            for key, count in counts.items():
+                last_count = self._last_counts.get(key, 0)
+                if count < last_count:
+                    # The counter was replaced, e.g. the output readers after a restart.
+                    last_count = 0
+                rates[key] = (count - last_count) / (now - self._last_time)
+            # Replace rather than mutate, so that snapshots never see a half-updated dict.
+            self.rates = rates
+        self._last_counts = counts
+        self._last_time = now
+
+    def snapshot(self):
+        """
+        Read the current metrics, without side effects.
+        Rates are averages over the last `rate_window` seconds (None until a window has passed).
+
+        Returns
+        -------
+        dict
+            With keys ``'loop'``, ``'server'``, ``'output'`` and ``'devices'``;
+            all values are numbers, strings, lists or dicts, so it can be serialized as JSON.
+
+        """
+        server = self.server
+        rates = self.rates
+        snapshot = {
+            'loop': {
+                'lag': self.loop_lag,
+                'max_lag': self.max_loop_lag,
+                'mainloop_iterations_per_second': rates.get('mainloop'),
+            },
+            'server': {
+                'is_running': server.is_running,
+                'n_restarts': server.n_restarts,
+            },
+            'output': {},
+            'devices': {},
+        }
+
+        for stream, reader in server.output_readers.items():
+            if reader is None:
+                continue
+            snapshot['output'][stream] = {
+                'n_lines': reader.n_lines,
+                'lines_per_second': rates.get(stream),
+                'n_suppressed': server._output_logs[stream].n_suppressed,
+            }
+
+        for device in server.devices:
+            subscriptions = [_subscription_metrics(subscription) for subscription in device._subscriptions]
+            # Only counted while timing, see Subscribable._compile_handlers.
+            handlers = [_subscription_metrics(handler) for handler in device._timed_handlers]
+            for sensor in device:
+                subscriptions.extend(
+                    _subscription_metrics(subscription, sensor.number) for subscription in sensor._subscriptions)
+                handlers.extend(_subscription_metrics(handler, sensor.number) for handler in sensor._timed_handlers)
+            snapshot['devices'][str(device)] = {
+                'is_connected': device.is_connected,
+                'n_samples': device.n_samples,
+                'samples_per_second': rates.get(device.uuid),
+                'n_reconnects': device.n_reconnects,
+                'subscriptions': subscriptions,
+                'handlers': handlers,
+            }
+
+        return snapshot
+
+    def _recompile_handlers(self):
+        # Compiled handlers are wrapped for timing, or not, when next compiled.
+        for device in self.server.devices:
+            for target in [device] + list(device):
+                if not Subscription.timing:
+                    target._timed_handlers = ()
+                target._handlers_changed()
+
+    def _serve(self, reader, writer):
+        try:
+            writer.write(json.dumps(self.snapshot()).encode() + b'\n')
+        except Exception:
+            error('failed to write metrics snapshot:\n{}'.format(traceback.format_exc()))
+        finally:
+            writer.close()
+
+
+def _subscription_metrics(subscription, sensor=None):
+    # A Subscription, or a timed 'on_input' handler.
+    metrics = {
+        'handler': repr(subscription.handler),
+        'sensor': sensor,
+        'n_calls': subscription.n_calls,
+        'total_time': subscription.total_time,
+    }
+    # Queued handlers (OffloadedHandler, SampleStream) report their backlog.
+    for attr in ['pending', 'n_dropped']:
+        value = getattr(subscription.handler, attr, None)
+        if value is not None:
+            metrics[attr] = value
+    return metrics
@@ -0,0 +1,171 @@
+import threading
+import traceback
+from collections import deque
+
+from pyvrpn.logging import setup_module_logging
+
+__all__ = [
+    'OffloadedHandler',
+]
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+POOLS = ('thread', 'process')
+
+error, warning, info, debug = setup_module_logging(__name__)
+
+
+class OffloadedHandler:
+    """Handler running on worker threads or processes.
+
+    A callable that can be used anywhere a handler is expected (usually via |Subscribable.offload|).
+    Calling it puts the data on a bounded queue and returns immediately;
+    the wrapped handler is called later by a worker.
+    Data for a single |OffloadedHandler| is processed in order if there is only one worker.
+
+    Workers are started on the first call.
+    Call |OffloadedHandler.close| to stop them.
+
+    Parameters
+    ----------
+    handler : func
+        The handler to offload.
+        If `pool` is ``'process'``, it must be picklable (e.g. a module-level function).
+    pool : {'thread', 'process'}, optional
+        Whether to call `handler` on a worker thread (the default) or in a worker process.
+    workers : int, optional
+        Number of workers.
+        Defaults to 1.
+    maxsize : int, optional
+        Maximum number of items waiting in the queue.
+        Defaults to 1024.
+    overflow : {'drop_oldest', 'drop_newest', 'block'}, optional
+        What to do when the queue is full.
+        ``'drop_oldest'`` (the default) discards the oldest queued item, ``'drop_newest'`` discards the new item.
+        ``'block'`` waits until a worker frees up space;
+        this stalls the caller (usually the receive loop) and should be used only when no data may be lost.
+
+    Attributes
+    ----------
+    handler : func
+    pool : str
+    workers : int
+    maxsize : int
+    overflow : str
+    n_processed : int
+        Number of items the handler has been called with.
+    n_dropped : int
+        Number of items discarded because the queue was full.
+    n_errors : int
+        Number of handler calls that raised an exception.
+    pending : int
+        Number of items currently waiting in the queue.
+
+    """
+    def __init__(self, handler, pool='thread', workers=1, maxsize=1024, overflow='drop_oldest'):
+        if pool not in POOLS:
+            raise ValueError('pool must be one of {}, not {!r}'.format(POOLS, pool))
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError('overflow must be one of {}, not {!r}'.format(OVERFLOW_POLICIES, overflow))
+
+        self.handler = handler
+        self.pool = pool
+        self.workers = workers
+        self.maxsize = maxsize
+        self.overflow = overflow
+
+        self.n_processed = 0
+        self.n_dropped = 0
+        self.n_errors = 0
+
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._threads = []
+        self._executor = None
+        self._closed = False
+
+    @property
+    def pending(self):
+        return len(self._queue)
+
+    def __call__(self, data):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('cannot call a closed OffloadedHandler')
+            if not self._threads:
+                self._start()
+
+            if len(self._queue) >= self.maxsize:
+                if self.overflow == 'drop_newest':
+                    self.n_dropped += 1
+                    return
+                elif self.overflow == 'drop_oldest':
+                    self._queue.popleft()
+                    self.n_dropped += 1
+                else:
+                    while len(self._queue) >= self.maxsize and not self._closed:
+                        self._not_full.wait()
+
+            self._queue.append(data)
+            self._not_empty.notify()
+
+    def close(self, wait=True):
+        """
+        Stop the workers.
+        Items already in the queue are still processed.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            If True (the default), return only after all queued items have been processed.
+
+        """
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+        debug('closed {}'.format(self))
+
+    def _start(self):
+        if self.pool == 'process':
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(self.workers)
+        for ix in range(self.workers):
+            thread = threading.Thread(target=self._work, name='{} worker {}'.format(self, ix), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        debug('started {} {} worker(s) for {}'.format(self.workers, self.pool, self))
+
+    def _work(self):
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._not_empty.wait()
+                if not self._queue:
+                    # Closed and drained.
+                    return
+                data = self._queue.popleft()
+                self._not_full.notify()
+
+            try:
+                if self._executor:
+                    self._executor.submit(self.handler, data).result()
+                else:
+                    self.handler(data)
+            except Exception:
+                with self._lock:
+                    self.n_errors += 1
+                error('exception in offloaded handler {!r}:\n{}'.format(self.handler, traceback.format_exc()))
+
+            with self._lock:
+                self.n_processed += 1
+
+    def __str__(self):
+        return 'OffloadedHandler({!r})'.format(self.handler)
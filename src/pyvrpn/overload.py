@@ -0,0 +1,234 @@
+from time import time as wall_time
+
+from pyvrpn.gaps import _to_seconds
+from pyvrpn.logging import setup_module_logging
+from pyvrpn.receiver import Tracker, Analog
+
+__all__ = [
+    'LatencyBudget',
+]
+
+POLICIES = ('coalesce', 'drop')
+# Devices whose samples each carry the full current state, so that a stale one can be dropped or superseded.
+# Button and dial samples are edges and deltas: dropping or coalescing them would corrupt the state they build up.
+DEVICE_TYPES = (Tracker, Analog)
+
+error, warning, info, debug = setup_module_logging(__name__)
+
+
+class LatencyBudget:
+    """Overload policy.
+
+    When handlers cannot keep up with the devices, samples queue up in VRPN's socket buffers
+    and are delivered later and later, with nothing to show for it but growing latency.
+    For interactive use a stale pose is worse than a missing one,
+    so a |LatencyBudget| checks the age of every sample (from its ``'time'``)
+    and does not deliver samples older than `budget` seconds as they arrive. Instead, depending on `policy`:
+      - ``'coalesce'``: the latest stale sample of each sensor is kept,
+        and delivered at the end of the |Receiver.mainloop| batch, unless a fresh sample of that sensor arrived after it.
+        All the other stale samples are dropped.
+        Handlers see the latest pose of each sensor once per batch while the backlog is being caught up.
+      - ``'drop'``: all stale samples are dropped.
+
+    Dropped samples are counted in |LatencyBudget.n_dropped|,
+    and listeners (see |LatencyBudget.add_listener|) are called once per batch in which any were dropped.
+    Samples that are within the budget cost one clock read and one comparison.
+
+    Sample times are set by the server, so the budget only makes sense if the server's clock
+    agrees with this machine's, as it does for a |LocalServer|::
+
+        server = LocalServer(devices, latency_budget=LatencyBudget(0.02))
+
+    Only trackers and analogs can be attached, since each of their samples carries the full current state.
+    Button and dial samples are presses, releases and changes, which must all be delivered;
+    a |LocalServer| attaches the budget to its trackers and analogs only.
+
+    Devices must be attached before they are connected, since the replaced callbacks are registered with VRPN on connection.
+    This includes the callbacks of tracker sensors, which VRPN calls separately:
+    stale samples are withheld from them too, and coalesced samples are delivered to them at the end of the batch.
+
+    Parameters
+    ----------
+    budget : float
+        Maximum age of a sample, in seconds, for it to be delivered as it arrives.
+    policy : {'coalesce', 'drop'}, optional
+        Defaults to ``'coalesce'``.
+
+    Attributes
+    ----------
+    budget : float
+    policy : str
+    budgets : dict of str to float
+        The budget of each attached device, by device |Receiver.uuid|.
+    n_stale : dict of str to int
+        Number of samples over budget, by device |Receiver.uuid|.
+    n_dropped : dict of str to int
+        Number of samples not delivered, by device |Receiver.uuid|.
+    n_coalesced : dict of str to int
+        Number of stale samples delivered at the end of a batch, by device |Receiver.uuid|.
+    max_age : dict of str to float
+        Age of the oldest sample seen, by device |Receiver.uuid|.
+
+    """
+    def __init__(self, budget, policy='coalesce'):
+        if policy not in POLICIES:
+            raise ValueError('policy must be one of {}, not {!r}'.format(POLICIES, policy))
+        self.budget = budget
+        self.policy = policy
+
+        self.budgets = {}
+        self.n_stale = {}
+        self.n_dropped = {}
+        self.n_coalesced = {}
+        self.max_age = {}
+        self._listeners = ()
+        self._attached = {}
+
+    @property
+    def total_dropped(self):
+        return sum(self.n_dropped.values())
+
+    def attach(self, *devices, budget=None):
+        """
+        Enforce the budget on devices.
+
+        Parameters
+        ----------
+        devices : |Tracker| or |Analog|
+        budget : float, optional
+            A budget for these devices, overriding |LatencyBudget.budget|.
+
+        """
+        for device in devices:
+            if not isinstance(device, DEVICE_TYPES):
+                raise TypeError('cannot attach {}: only trackers and analogs can drop stale samples'.format(device))
+            if device.is_connected:
+                raise RuntimeError('cannot attach {} after it is connected'.format(device))
+            if device.uuid in self._attached:
+                raise ValueError('{} is already attached'.format(device))
+
+            uuid = device.uuid
+            self.budgets[uuid] = self.budget if budget is None else budget
+            self.n_stale.setdefault(uuid, 0)
+            self.n_dropped.setdefault(uuid, 0)
+            self.n_coalesced.setdefault(uuid, 0)
+            self.max_age.setdefault(uuid, 0.0)
+            # Held samples by sensor, shared by both replacements.
+            held = {}
+            device._callback = self._budgeted_callback(device, held)
+            for sensor in device:
+                sensor._callback = self._budgeted_sensor_callback(sensor, self.budgets[uuid])
+            device._end_batch = self._budgeted_end_batch(device, held)
+            self._attached[uuid] = device
+
+    def detach(self, *devices):
+        """
+        Stop enforcing the budget on devices, once they are disconnected.
+
+        Parameters
+        ----------
+        devices : |Tracker| or |Analog|
+            Defaults to all attached devices.
+
+        """
+        for device in devices or list(self._attached.values()):
+            if device.uuid not in self._attached:
+                continue
+            if device.is_connected:
+                raise RuntimeError('cannot detach {} while it is connected'.format(device))
+            # Remove the instance attributes, uncovering the methods again.
+            del device._callback
+            del device._end_batch
+            for sensor in device:
+                del sensor._callback
+            del self._attached[device.uuid]
+
+    def add_listener(self, listener):
+        """
+        Call a function after each batch in which samples were dropped.
+
+        Parameters
+        ----------
+        listener : func
+            Called with two arguments, the |Receiver| and the number of samples dropped from the batch.
+
+        """
+        # Replace rather than mutate, as with subscriptions.
+        self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener):
+        if listener not in self._listeners:
+            raise ValueError('{!r} is not listening to {}'.format(listener, self))
+        self._listeners = tuple(other for other in self._listeners if other != listener)
+
+    def _budgeted_callback(self, device, held):
+        callback = type(device)._callback.__get__(device)
+        uuid = device.uuid
+        budget = self.budgets[uuid]
+        coalesce = self.policy == 'coalesce'
+
+        def budgeted_callback(user_data, data):
+            age = wall_time() - _to_seconds(data['time'])
+            if age <= budget:
+                # A fresh sample supersedes its sensor's stale one.
+                if held and held.pop(data.get('sensor', 0), None) is not None:
+                    self.n_dropped[uuid] += 1
+                callback(user_data, data)
+                return
+
+            # Count it as received, so that the batch still ends.
+            device.n_samples += 1
+            self.n_stale[uuid] += 1
+            if age > self.max_age[uuid]:
+                self.max_age[uuid] = age
+            if coalesce:
+                # Analog samples have no sensor: one is held per device.
+                sensor = data.get('sensor', 0)
+                if sensor in held:
+                    self.n_dropped[uuid] += 1
+                held[sensor] = sensor, data
+            else:
+                self.n_dropped[uuid] += 1
+
+        return budgeted_callback
+
+    def _budgeted_sensor_callback(self, sensor, budget):
+        # Samples are counted by the device callback, which VRPN also calls with every sample.
+        callback = type(sensor)._callback.__get__(sensor)
+
+        def budgeted_sensor_callback(user_data, data):
+            if wall_time() - _to_seconds(data['time']) <= budget:
+                callback(user_data, data)
+
+        return budgeted_sensor_callback
+
+    def _budgeted_end_batch(self, device, held):
+        callback = type(device)._callback.__get__(device)
+        end_batch = type(device)._end_batch.__get__(device)
+        sensor_callbacks = [type(sensor)._callback.__get__(sensor) for sensor in device]
+        uuid = device.uuid
+        last_dropped = [0]
+
+        def budgeted_end_batch(now):
+            if held:
+                samples = list(held.values())
+                held.clear()
+                # Sensors registered with VRPN separately (see Receiver._open) are not reached by the device callback.
+                registered = {registration[0] for registration in device._registrations}
+                for sensor, data in samples:
+                    # Already counted when it arrived.
+                    device.n_samples -= 1
+                    callback('', data)
+                    if sensor < len(sensor_callbacks) and device[sensor]._callback in registered:
+                        sensor_callbacks[sensor]('', data)
+                self.n_coalesced[uuid] += len(samples)
+
+            n_dropped = self.n_dropped[uuid] - last_dropped[0]
+            if n_dropped:
+                last_dropped[0] = self.n_dropped[uuid]
+                debug('dropped {} stale samples from {}'.format(n_dropped, device))
+                for listener in self._listeners:
+                    listener(device, n_dropped)
+            end_batch(now)
+
+        return budgeted_end_batch
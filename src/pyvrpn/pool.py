@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from time import perf_counter
+
+from pyvrpn.logging import setup_module_logging
+
+__all__ = [
+    'ConnectionPool',
+]
+
+error, warning, info, debug = setup_module_logging(__name__)
+
+
+class ConnectionPool:
+    """Polling for many receivers sharing connections.
+
+    VRPN already shares one connection among all the ``vrpn.receiver`` objects connected to the same ``host[:port]``
+    (``vrpn_get_connection_by_name``), and calling the ``mainloop`` method of any one of them
+    reads the connection and delivers the data for all of them.
+    Calling every receiver's |Receiver.mainloop| on every iteration, as |LocalServer| does by default,
+    therefore reads each connection once per receiver.
+
+    Instead, |ConnectionPool.poll| calls |Receiver.mainloop| on only one receiver per host on each iteration,
+    rotating through them so that each receiver's own bookkeeping still runs regularly,
+    and then ends the batch (updating |Receiver.last_sample_at| and calling batch listeners)
+    for the other receivers on that host that received data.
+    With 20 devices on one host, each iteration makes one ``mainloop`` call instead of 20.
+
+    Use it with ``LocalServer(devices, pool_connections=True)``, or directly for receivers connected to remote servers,
+    calling |ConnectionPool.poll| regularly (e.g. with a |DevicePump|).
+    Call |ConnectionPool.regroup| after connecting receivers to new hosts;
+    disconnected receivers are noticed automatically.
+
+    Parameters
+    ----------
+    devices : sequence of |Receiver|
+
+    Attributes
+    ----------
+    devices : sequence of |Receiver|
+    n_iterations : int
+        Number of calls to |ConnectionPool.poll|.
+    hosts : list of str
+        The hosts of the connected devices.
+
+    """
+    def __init__(self, devices):
+        self.devices = devices
+        self.n_iterations = 0
+        self._groups = None
+
+    @property
+    def hosts(self):
+        if self._groups is None:
+            self.regroup()
+        return [group[0].host for group, _ in self._groups]
+
+    def regroup(self):
+        """Group the connected devices by host."""
+        groups = OrderedDict()
+        for device in self.devices:
+            if device.is_connected:
+                groups.setdefault(device.host, []).append(device)
+        # Each group is paired with the sample counts seen at the last poll, updated in place.
+        self._groups = [(group, [device.n_samples for device in group]) for group in groups.values()]
+        debug('pooling {} devices on {} hosts'.format(sum(len(group) for group in groups.values()), len(groups)))
+
+    def poll(self):
+        """Read each connection once."""
+        if self._groups is None:
+            self.regroup()
+
+        iteration = self.n_iterations
+        for group, counts in self._groups:
+            device = group[iteration % len(group)]
+            if not device.is_connected:
+                self._groups = None
+                continue
+            device.mainloop()
+
+            now = None
+            for ix, member in enumerate(group):
+                n_samples = member.n_samples
+                if n_samples != counts[ix]:
+                    counts[ix] = n_samples
+                    if member is device:
+                        # Its own mainloop already ended the batch.
+                        continue
+                    if now is None:
+                        now = perf_counter()
+                    member._end_batch(now)
+
+        self.n_iterations = iteration + 1
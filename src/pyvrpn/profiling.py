@@ -0,0 +1,188 @@
+import os
+import json
+from collections import deque
+from time import perf_counter
+
+from pyvrpn.logging import setup_module_logging
+
+__all__ = [
+    'Profiler',
+]
+
+error, warning, info, debug = setup_module_logging(__name__)
+
+
+class Profiler:
+    """Receive-loop profiler.
+
+    Records how long each |Receiver.mainloop| call takes,
+    and within it, how long dispatching each sample takes on the |Receiver| and each |Sensor|,
+    and within that, how long each ``'on_input'`` handler and |Subscription| takes.
+    The spans can be exported in the Chrome trace-event format, to be viewed in ``chrome://tracing`` or Perfetto,
+    where each receiver is shown as one thread, with handler spans nested inside dispatch spans
+    nested inside mainloop spans.
+
+    Profiling is opt-in and per receiver:
+    |Profiler.attach| replaces the receiver's (and its sensors') |Receiver.mainloop| and dispatch methods
+    with timed versions on the instances, and |Profiler.detach| removes them again,
+    so receivers that are not attached pay nothing.
+    Attaching while a |LocalServer| is running is fine, since the replacements are looked up on every call::
+
+        profiler = Profiler()
+        profiler.attach(*server.devices)
+        yield from asyncio.sleep(10)
+        profiler.detach()
+        profiler.export('trace.json')
+
+    Parameters
+    ----------
+    max_spans : int, optional
+        Maximum number of spans to keep; older spans are discarded.
+        Defaults to 1000000.
+
+    Attributes
+    ----------
+    spans : |collections.deque| of tuple
+        The recorded spans, as ``(name, category, receiver_number, start, duration)``,
+        with times in seconds from |time.perf_counter|.
+    receivers : list of |Receiver|
+        The receivers that are or have been attached, in order (their position is ``receiver_number``).
+
+    """
+    def __init__(self, max_spans=1000000):
+        self.spans = deque(maxlen=max_spans)
+        self.receivers = []
+        self._attached = set()
+        self._origin = perf_counter()
+
+    def attach(self, *receivers):
+        """
+        Start profiling receivers.
+
+        Parameters
+        ----------
+        receivers : |Receiver|
+
+        """
+        for receiver in receivers:
+            if receiver.uuid in self._attached:
+                raise ValueError('{} is already attached to this profiler'.format(receiver))
+            if receiver not in self.receivers:
+                self.receivers.append(receiver)
+            number = self.receivers.index(receiver)
+
+            receiver.mainloop = self._timed_mainloop(receiver, number)
+            receiver._dispatch = self._timed_dispatch(receiver, number, 'dispatch')
+            for sensor in receiver:
+                sensor._dispatch = self._timed_dispatch(sensor, number, 'dispatch sensor {}'.format(sensor.number))
+            self._attached.add(receiver.uuid)
+            debug('profiling {}'.format(receiver))
+
+    def detach(self, *receivers):
+        """
+        Stop profiling receivers.
+        Already recorded spans are kept.
+
+        Parameters
+        ----------
+        receivers : |Receiver|
+            Defaults to all attached receivers.
+
+        """
+        for receiver in receivers or list(self.receivers):
+            if receiver.uuid not in self._attached:
+                continue
+            # Remove the instance attributes, uncovering the methods again.
+            del receiver.mainloop
+            del receiver._dispatch
+            for sensor in receiver:
+                del sensor._dispatch
+            self._attached.discard(receiver.uuid)
+
+    def clear(self):
+        """Discard the recorded spans."""
+        self.spans.clear()
+
+    def trace_events(self):
+        """
+        Get the recorded spans as Chrome trace events.
+
+        Returns
+        -------
+        list of dict
+
+        """
+        pid = os.getpid()
+        events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': number, 'args': {'name': str(receiver)}}
+            for number, receiver in enumerate(self.receivers)
+        ]
+        origin = self._origin
+        for name, category, number, start, duration in self.spans:
+            events.append({
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'pid': pid,
+                'tid': number,
+                'ts': (start - origin) * 1e6,
+                'dur': duration * 1e6,
+            })
+        return events
+
+    def export(self, file):
+        """
+        Write the recorded spans in Chrome trace-event JSON format.
+
+        Parameters
+        ----------
+        file : str or file-like
+            A path, or a text file open for writing.
+
+        """
+        trace = {'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}
+        if isinstance(file, str):
+            with open(file, 'w') as f:
+                json.dump(trace, f)
+        else:
+            json.dump(trace, file)
+        info('exported {} spans'.format(len(self.spans)))
+
+    def _timed_mainloop(self, receiver, number):
+        mainloop = type(receiver).mainloop.__get__(receiver)
+        spans = self.spans
+
+        def timed_mainloop():
+            start = perf_counter()
+            mainloop()
+            spans.append(('mainloop', 'mainloop', number, start, perf_counter() - start))
+
+        return timed_mainloop
+
+    def _timed_dispatch(self, target, number, name):
+        # Same as Subscribable._dispatch, with each call timed.
+        spans = self.spans
+
+        def timed_dispatch(data):
+            start = perf_counter()
+            handlers = target._handlers
+            if handlers is None:
+                handlers = target._compile_handlers()
+            for handler in handlers:
+                handler_start = perf_counter()
+                handled = handler(data)
+                spans.append((_name(handler), 'handler', number, handler_start, perf_counter() - handler_start))
+                if handled:
+                    break
+            for subscription in target._subscriptions:
+                handler_start = perf_counter()
+                subscription(data)
+                spans.append((_name(subscription.handler), 'subscription', number,
+                              handler_start, perf_counter() - handler_start))
+            spans.append((name, 'dispatch', number, start, perf_counter() - start))
+
+        return timed_dispatch
+
+
+def _name(handler):
+    return getattr(handler, '__qualname__', None) or type(handler).__name__
@@ -1,10 +1,14 @@
 import abc
+import traceback
+from array import array
+from time import perf_counter
 from uuid import uuid1
+from weakref import WeakMethod
 
-import vrpn
 import pyglet
 
 from pyvrpn.logging import setup_module_logging
+from pyvrpn.sample import TrackerSample, ButtonSample, DialSample
 
 error, warning, info, debug = setup_module_logging(__name__)
 
@@ -16,7 +20,336 @@ __all__ = [
 ]
 
 
-class Receiver(pyglet.event.EventDispatcher, metaclass=abc.ABCMeta):
+class VRPNClass:
+    """
+    A descriptor resolving to a class from ``vrpn.receiver``.
+    ``vrpn`` is imported on first access rather than when this module is imported.
+
+    Parameters
+    ----------
+    name : str
+        The name of the class in ``vrpn.receiver`` (e.g. ``'Tracker'``).
+
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        import vrpn.receiver
+        return getattr(vrpn.receiver, self.name)
+
+
+class Subscription:
+    """A filtered ``'on_input'`` handler.
+
+    Subscriptions are created by |Subscribable.subscribe| and called with every sample received by their parent,
+    but only call |handler| when the sample passes their filters.
+    The filters are evaluated before the handler is called, so rejected samples cost only a few comparisons.
+
+    Parameters
+    ----------
+    handler : func
+        Called with a single argument, the data received from the device (see |Receiver|).
+    max_rate : float, optional
+        Maximum rate, in Hz, at which to call `handler`.
+        Samples arriving sooner than ``1 / max_rate`` seconds after the last delivered sample are skipped.
+    fields : iterable of str, optional
+        If given, `handler` receives a dictionary containing only these keys (e.g. ``('position', 'time')``).
+    min_distance : float, optional
+        If given, samples with a ``'position'`` key are skipped unless the position has moved at least this far
+        (in the units reported by the device, usually meters) since the last delivered sample.
+
+    Attributes
+    ----------
+    handler : func
+    min_interval : float
+        The minimum number of seconds between calls to |handler|.
+    fields : tuple of str or None
+    min_distance : float or None
+    n_calls : int
+        Number of times |handler| has been called.
+    total_time : float
+        Cumulative number of seconds spent in |handler|.
+        Only measured while the class attribute ``Subscription.timing`` is True (see |Metrics|),
+        since timing costs two clock reads per call.
+
+    """
+    __slots__ = ('handler', 'min_interval', 'fields', 'min_distance', 'n_calls', 'total_time',
+                 '_last_time', '_last_position')
+    timing = False
+
+    def __init__(self, handler, max_rate=None, fields=None, min_distance=None):
+        self.handler = handler
+        self.min_interval = 1 / max_rate if max_rate else 0
+        self.fields = tuple(fields) if fields else None
+        self.min_distance = min_distance
+        self.n_calls = 0
+        self.total_time = 0.0
+        self._last_time = float('-inf')
+        self._last_position = None
+
+    def __call__(self, data):
+        if self.min_interval:
+            now = perf_counter()
+            if now - self._last_time < self.min_interval:
+                return
+            self._last_time = now
+
+        if self.min_distance is not None and 'position' in data:
+            position = data['position']
+            if self._last_position is not None:
+                squared_distance = sum((a - b) * (a - b) for a, b in zip(position, self._last_position))
+                if squared_distance < self.min_distance * self.min_distance:
+                    return
+            self._last_position = position
+
+        if self.fields:
+            data = {field: data[field] for field in self.fields if field in data}
+
+        self.n_calls += 1
+        if self.timing:
+            start = perf_counter()
+            result = self.handler(data)
+            self.total_time += perf_counter() - start
+            return result
+        return self.handler(data)
+
+
+class Subscribable:
+    """A mixin class providing filtered subscriptions, an alternative to ``'on_input'`` event handlers.
+
+    Subscriptions are called after the |EventDispatcher| handlers, with the same data.
+
+    Incoming data is not dispatched with |EventDispatcher.dispatch_event|.
+    Instead, the ``'on_input'`` handlers are compiled into a tuple the first time they are needed,
+    and recompiled only after handlers are added or removed.
+
+    """
+    _subscriptions = ()
+    _handlers = None
+    _on_change = None
+    # While Subscription.timing is True, the compiled 'on_input' handlers are timed wrappers, kept across compilations.
+    _timed_handlers = ()
+
+    def subscribe(self, handler, max_rate=None, fields=None, min_distance=None):
+        """
+        Call a function on incoming data, subject to filtering.
+
+        Parameters
+        ----------
+        handler : func
+            Called with a single argument, the data received from the device.
+        max_rate : float, optional
+            Maximum rate, in Hz, at which to call `handler`.
+        fields : iterable of str, optional
+            Subset of the data's keys to pass to `handler`.
+        min_distance : float, optional
+            Minimum change in position required to call `handler`.
+
+        Returns
+        -------
+        |Subscription|
+            Pass to |Subscribable.unsubscribe| to stop receiving data.
+
+        """
+        subscription = Subscription(handler, max_rate=max_rate, fields=fields, min_distance=min_distance)
+        # Replace rather than mutate, so that (un)subscribing from inside a handler is safe.
+        self._subscriptions = self._subscriptions + (subscription,)
+        self._handlers_changed()
+        return subscription
+
+    def offload(self, handler, pool='thread', workers=1, maxsize=1024, overflow='drop_oldest', **filters):
+        """
+        Subscribe a slow handler, to be called on a worker thread or process instead of in the receive loop.
+        See |OffloadedHandler| for the parameters.
+        Additional keyword arguments are passed to |Subscribable.subscribe|,
+        so that filtered-out samples are never queued.
+
+        Returns
+        -------
+        |Subscription|
+            Its ``handler`` attribute is the |OffloadedHandler|, which exposes the queue and drop counters.
+            Close it after unsubscribing to stop the workers.
+
+        """
+        from pyvrpn.offload import OffloadedHandler
+        offloaded = OffloadedHandler(handler, pool=pool, workers=workers, maxsize=maxsize, overflow=overflow)
+        return self.subscribe(offloaded, **filters)
+
+    def stream(self, maxsize=256, policy='drop_oldest', batch=None, loop=None, **filters):
+        """
+        Get an asynchronous iterator over incoming data::
+
+            async for data in receiver.stream(maxsize=64):
+                ...
+
+        See |SampleStream| for the parameters.
+        Additional keyword arguments are passed to |Subscribable.subscribe|.
+
+        Returns
+        -------
+        |SampleStream|
+            Close it to unsubscribe.
+
+        """
+        # Imported here to keep asyncio out of receiver-only processes.
+        from pyvrpn.stream import SampleStream
+        stream = SampleStream(maxsize=maxsize, policy=policy, batch=batch, loop=loop)
+        stream.subscription = self.subscribe(stream, **filters)
+        stream.source = self
+        return stream
+
+    def unsubscribe(self, subscription):
+        """
+        Remove a subscription.
+
+        Parameters
+        ----------
+        subscription : |Subscription|
+            As returned by |Subscribable.subscribe|.
+
+        """
+        if subscription not in self._subscriptions:
+            raise ValueError('{} is not subscribed to {}'.format(subscription, self))
+        self._subscriptions = tuple(sub for sub in self._subscriptions if sub is not subscription)
+        self._handlers_changed()
+
+    def clear(self):
+        """
+        Remove all ``'on_input'`` handlers and subscriptions.
+        Subscribed handlers with a ``close`` method (|OffloadedHandler|, |SampleStream|, |Recorder|, ...)
+        are closed, stopping their workers and releasing their buffers.
+
+        """
+        for subscription in self._subscriptions:
+            close = getattr(subscription.handler, 'close', None)
+            if close is not None:
+                # Streams and recorders unsubscribe themselves.
+                close()
+        self._subscriptions = ()
+        # Uncover the class attribute, an empty stack.
+        vars(self).pop('_event_stack', None)
+        self._handlers_changed()
+
+    def set_handler(self, name, handler):
+        super().set_handler(name, handler)
+        self._handlers_changed()
+
+    def push_handlers(self, *args, **kwargs):
+        super().push_handlers(*args, **kwargs)
+        self._handlers_changed()
+
+    def pop_handlers(self):
+        super().pop_handlers()
+        self._handlers_changed()
+
+    def remove_handler(self, name, handler):
+        super().remove_handler(name, handler)
+        self._handlers_changed()
+
+    def remove_handlers(self, *args, **kwargs):
+        super().remove_handlers(*args, **kwargs)
+        self._handlers_changed()
+
+    @property
+    def is_active(self):
+        """True if any ``'on_input'`` handlers or subscriptions are registered."""
+        handlers = self._handlers
+        if handlers is None:
+            handlers = self._compile_handlers()
+        return bool(handlers or self._subscriptions)
+
+    def _remove_handler(self, name, handler):
+        # Called by pyglet when the object of a bound-method handler is garbage-collected.
+        super()._remove_handler(name, handler)
+        self._handlers_changed()
+
+    def _compile_handlers(self):
+        # Same order as EventDispatcher.dispatch_event: top of the stack first, then any method named on_input.
+        entries = [frame['on_input'] for frame in self._event_stack if frame.get('on_input')]
+        method = getattr(self, 'on_input', None)
+        if method is not None:
+            entries.append(method)
+
+        handlers = []
+        for entry in entries:
+            handler = entry
+            if isinstance(entry, WeakMethod):
+                # Bound methods are held weakly by pyglet; don't keep their objects alive here either.
+                if entry() is None:
+                    continue
+                handler = _WeakHandler(entry)
+            if Subscription.timing:
+                handler = self._timed_handler(entry, handler)
+            handlers.append(handler)
+
+        self._timed_handlers = tuple(handlers) if Subscription.timing else ()
+        self._handlers = tuple(handlers)
+        return self._handlers
+
+    def _timed_handler(self, entry, handler):
+        # Keep the counts of handlers that are still there.
+        for timed in self._timed_handlers:
+            if timed.entry == entry:
+                return timed
+        return _TimedHandler(entry, handler)
+
+    def _handlers_changed(self):
+        self._handlers = None
+        if self._on_change is not None:
+            self._on_change()
+
+    def _dispatch(self, data):
+        handlers = self._handlers
+        if handlers is None:
+            handlers = self._compile_handlers()
+        for handler in handlers:
+            if handler(data):
+                # EVENT_HANDLED stops propagation to lower handlers, as in EventDispatcher.dispatch_event.
+                break
+        for subscription in self._subscriptions:
+            subscription(data)
+
+
+class _WeakHandler:
+    """A compiled handler calling a bound method held as a |weakref.WeakMethod|, as pyglet stores them."""
+    __slots__ = ('method', '__qualname__')
+
+    def __init__(self, method):
+        self.method = method
+        self.__qualname__ = method().__qualname__
+
+    def __call__(self, data):
+        handler = self.method()
+        # A dead handler is skipped, as by EventDispatcher.dispatch_event; pyglet removes it from the stack.
+        if handler is not None:
+            return handler(data)
+
+    def __repr__(self):
+        return repr(self.method())
+
+
+class _TimedHandler:
+    """A compiled handler counting and timing the calls to an ``'on_input'`` handler, like a |Subscription|."""
+    __slots__ = ('entry', 'handler', 'n_calls', 'total_time', '__qualname__')
+
+    def __init__(self, entry, handler):
+        # The handler as found on the event stack, and as called.
+        self.entry = entry
+        self.handler = handler
+        self.n_calls = 0
+        self.total_time = 0.0
+        self.__qualname__ = getattr(handler, '__qualname__', None) or type(handler).__name__
+
+    def __call__(self, data):
+        self.n_calls += 1
+        start = perf_counter()
+        result = self.handler(data)
+        self.total_time += perf_counter() - start
+        return result
+
+
+class Receiver(Subscribable, pyglet.event.EventDispatcher, metaclass=abc.ABCMeta):
     """VRPN receiver.
 
     A |pyglet.event.EventDispatcher| representing one VRPN receiver device.
@@ -33,6 +366,8 @@ class Receiver(pyglet.event.EventDispatcher, metaclass=abc.ABCMeta):
     Handler functions should take a single parameter, taking raw data from the tracker in the form of a dictionary.
     To set sensor-specific callbacks, add handlers to the individual sensors (each also an |EventDispatcher|).
     Individual sensors can be access via indexing the |Receiver| object.
+    Handlers that do not need every sample can instead be registered with |Subscribable.subscribe|,
+    which can limit their rate, the fields they receive, or require a minimum change in position.
 
     Parameters
     ----------
@@ -42,6 +377,12 @@ class Receiver(pyglet.event.EventDispatcher, metaclass=abc.ABCMeta):
     additional_config_lines : list of str, optional
         Additional lines to write to the configuration file.
         For example, commands to send to the device.
+    compact : bool, optional
+        If True, handlers receive |Sample| objects (see |sample_class|) instead of dictionaries.
+        These support the same read-only access, and use less memory when handlers keep samples around,
+        but they are built from the dictionaries, adding an allocation and about 1 us per sample (see |Sample|).
+        Each sample is converted once, by the receiver, which then routes it to its sensor
+        (rather than VRPN calling each sensor separately).
 
     Attributes
     ----------
@@ -50,7 +391,7 @@ class Receiver(pyglet.event.EventDispatcher, metaclass=abc.ABCMeta):
     uuid : str
         A usually unique identifier.
     connected : bool
-        True if the Receiver has already been connected to a server.
+        True while the Receiver is connected to a server (see |Receiver.connect| and |Receiver.disconnect|).
     device_type : str
         The name of the device as recognized by the server configuration file.
     object_class : type
@@ -59,29 +400,61 @@ class Receiver(pyglet.event.EventDispatcher, metaclass=abc.ABCMeta):
         The server configuration file entry for this device.
     callback_type : str
     n_sensors : int
+    sensor_key : str or None
+        For non-tracker devices with sensors, the key in the data giving the sensor number
+        (``'button'`` or ``'dial'``).
+    sample_class : type or None
+        The |Sample| subclass used if `compact` is True.
+    compact : bool
+    host : str or None
+        The host this Receiver is connected to.
+    expected_rate : float or None
+        The rate, in Hz, at which the device is configured to report, if known.
+    n_samples : int
+        Number of samples received.
+    last_sample_at : float or None
+        |time.perf_counter| value of the last |Receiver.mainloop| call that received data
+        (or of connecting, if no data has been received yet).
+    n_reconnects : int
+        Number of times |Receiver.reconnect| has been called.
 
     """
     extend_config_line_with_backslash = False
+    sensor_key = None
+    sample_class = None
+    _batch_listeners = ()
+    _has_routes = False
+    # Subclasses should override using a class attribute, usually a VRPNClass.
+    # This is not an abstract property: ABCMeta would look it up when creating subclasses, importing vrpn.
+    object_class = None
+
+    def __init__(self, *config_args, additional_config_lines=None, compact=False):
+        if compact and self.sample_class is None:
+            raise ValueError('{} does not support compact samples'.format(type(self).__name__))
 
-    def __init__(self, *config_args, additional_config_lines=None):
         self.config_args = config_args
         self.additional_config_lines = additional_config_lines or []
+        self.compact = compact
         self.uuid = str(uuid1())
+        self.host = None
         self._object = None
+        self._registrations = []
         self.is_connected = False
+        self.n_samples = 0
+        self.n_reconnects = 0
+        self.last_sample_at = None
+        self._sample_class = self.sample_class if compact else None
+        # Compact tracker samples are routed to sensors from the receiver's callback, so that they are converted once.
+        self._route_key = self.sensor_key or ('sensor' if compact else None)
 
-        self._sensors = [Sensor(str(self), ix) for ix in range(self.n_sensors)]
+        self._sensors = [Sensor(str(self), ix, on_change=self._invalidate_routes) for ix in range(self.n_sensors)]
+        self._routes = None
 
     @abc.abstractproperty
     def device_type(self):
         """Subclasses should override using a class attribute."""
         pass
 
-    @abc.abstractproperty
-    def object_class(self):
-        """Subclasses should override using a class attribute."""
-        pass
-
     @property
     def n_sensors(self):
         """
@@ -93,6 +466,50 @@ class Receiver(pyglet.event.EventDispatcher, metaclass=abc.ABCMeta):
         """
         return 0
 
+    @property
+    def expected_rate(self):
+        """
+        Can be provided by subclasses, if the configuration determines the reporting rate.
+        Used by |Watchdog| to detect stalled connections.
+
+        """
+        return None
+
+    def detect_gaps(self, tolerance=1.5, **kwargs):
+        """
+        Subscribe a |GapDetector| to this device, using |expected_rate| if known.
+        Additional keyword arguments are passed to |GapDetector|.
+
+        Returns
+        -------
+        |GapDetector|
+            Its ``subscription`` attribute can be passed to |Subscribable.unsubscribe|.
+
+        """
+        from pyvrpn.gaps import GapDetector
+        kwargs.setdefault('expected_rate', self.expected_rate)
+        detector = GapDetector(tolerance=tolerance, **kwargs)
+        detector.subscription = self.subscribe(detector)
+        return detector
+
+    def record(self, path, **kwargs):
+        """
+        Subscribe a |Recorder| to this device, grouping samples by sensor.
+        Keyword arguments are passed to |Recorder|.
+        Close the recorder to unsubscribe and finish the file.
+
+        Returns
+        -------
+        |Recorder|
+
+        """
+        from pyvrpn.recording import Recorder
+        kwargs.setdefault('group_key', self.sensor_key or 'sensor')
+        recorder = Recorder(path, **kwargs)
+        recorder.subscription = self.subscribe(recorder)
+        recorder.source = self
+        return recorder
+
     @property
     def callback_type(self):
         """
@@ -102,6 +519,7 @@ class Receiver(pyglet.event.EventDispatcher, metaclass=abc.ABCMeta):
         if ``'position'`` is used all tracker data is received.
 
         """
+        import vrpn.receiver
         if self.object_class is vrpn.receiver.Tracker:
             return 'position'
 
@@ -129,37 +547,143 @@ class Receiver(pyglet.event.EventDispatcher, metaclass=abc.ABCMeta):
         """
         if self.is_connected:
             raise RuntimeError('cannot connect a Receiver twice')
+        if self.object_class is None:
+            raise TypeError('{} does not define object_class'.format(type(self).__name__))
 
-        self._object = self.object_class('{}@{}'.format(self.uuid, host))
+        self.host = host
+        self._open()
+        self._compile_routes()
+        info('{} connected to server'.format(self))
+        self.is_connected = True
+
+    def reconnect(self):
+        """
+        Replace the underlying ``vrpn.receiver`` object with a new connection to the same host.
+        Handlers and subscriptions are kept.
+
+        """
+        if not self.is_connected:
+            raise RuntimeError('cannot reconnect a Receiver that is not connected')
+
+        self._close()
+        self._open()
+        self.n_reconnects += 1
+        info('{} reconnected to server'.format(self))
+
+    def disconnect(self):
+        """
+        Unregister from the underlying ``vrpn.receiver`` object and release it.
+        Handlers and subscriptions are kept, and the receiver can be connected again.
+
+        """
+        if not self.is_connected:
+            raise RuntimeError('cannot disconnect a Receiver that is not connected')
+
+        self._close()
+        self.is_connected = False
+        info('{} disconnected from server'.format(self))
+
+    def close(self):
+        """
+        Disconnect, if connected, and remove all handlers, subscriptions and batch listeners,
+        of this receiver and of its sensors (see |Subscribable.clear|).
+
+        """
+        if self.is_connected:
+            self.disconnect()
+        self.clear()
+        for sensor in self._sensors:
+            sensor.clear()
+        self._batch_listeners = ()
+
+    def _open(self):
+        self._object = self.object_class('{}@{}'.format(self.uuid, self.host))
+        self.last_sample_at = perf_counter()
 
         if self.callback_type:
-            # First option to register_change_handler is user_data, which we don't use.
-            self._object.register_change_handler('', self._callback, self.callback_type)
+            self._register(self._callback, self.callback_type)
             # A sensor can be specified only if callback_type is also specified.
-            for ix, sensor in enumerate(self._sensors):
-                self._object.register_change_handler('', sensor._callback, self.callback_type, ix)
+            if self._route_key is None:
+                for ix, sensor in enumerate(self._sensors):
+                    self._register(sensor._callback, self.callback_type, ix)
 
         else:
-            self._object.register_change_handler('', self._callback)
-
-        info('{} connected to server'.format(self))
-        self.is_connected = True
+            self._register(self._callback)
+
+    def _register(self, callback, *args):
+        # First option to register_change_handler is user_data, which we don't use.
+        self._object.register_change_handler('', callback, *args)
+        self._registrations.append((callback,) + args)
+
+    def _close(self):
+        # The vrpn object holds the callbacks, and so this receiver, for as long as they are registered.
+        # Release it even if unregistering fails, e.g. with a connection object that cannot unregister.
+        for registration in self._registrations:
+            try:
+                self._object.unregister_change_handler('', *registration)
+            except Exception:
+                warning('could not unregister a callback of {}:\n{}'.format(self, traceback.format_exc()))
+        self._registrations = []
+        self._object = None
 
     def mainloop(self):
         """Call this method regularly to ensure that data is received promptly."""
+        n_samples = self.n_samples
         self._object.mainloop()
+        # Timestamp once per call rather than once per sample.
+        if self.n_samples != n_samples:
+            self._end_batch(perf_counter())
+
+    def add_batch_listener(self, listener):
+        """
+        Call a function after each |Receiver.mainloop| call that received data,
+        i.e. once per batch of samples rather than once per sample.
+        Useful for work that only needs the latest state, such as checking |ZoneSet| zones.
+
+        Parameters
+        ----------
+        listener : func
+            Called with no arguments.
+
+        """
+        # Replace rather than mutate, as with subscriptions.
+        self._batch_listeners = self._batch_listeners + (listener,)
+
+    def remove_batch_listener(self, listener):
+        if listener not in self._batch_listeners:
+            raise ValueError('{!r} is not listening to {}'.format(listener, self))
+        self._batch_listeners = tuple(other for other in self._batch_listeners if other != listener)
+
+    def _end_batch(self, now):
+        self.last_sample_at = now
+        for listener in self._batch_listeners:
+            listener()
+
+    def _compile_routes(self):
+        # Map sensor numbers directly to the sensors that have something to dispatch to.
+        self._compile_handlers()
+        self._routes = tuple(sensor if sensor.is_active else None for sensor in self._sensors)
+        self._has_routes = any(sensor is not None for sensor in self._routes)
+        return self._routes
+
+    def _invalidate_routes(self):
+        self._routes = None
 
     def _callback(self, user_data, data):
-        self.dispatch_event('on_input', data)
-        debug('dispatched on_input event for {}'.format(self))
-        # Manually dispatch sensor events for non-trackers.
-        if self.n_sensors:
-            if 'button' in data:
-                self[data['button']].dispatch_event('on_input', data)
-                debug('dispatched on_input event for {}'.format(self[data['button']]))
-            elif 'dial' in data:
-                self[data['dial']].dispatch_event('on_input', data)
-                debug('dispatched on_input event for {}'.format(self[data['dial']]))
+        # This is the hot path: avoid per-sample logging and attribute lookups where possible.
+        self.n_samples += 1
+        if self._sample_class is not None:
+            data = self._sample_class.from_dict(data)
+        self._dispatch(data)
+        # Manually dispatch sensor events for non-trackers, and for compact trackers.
+        route_key = self._route_key
+        if route_key:
+            routes = self._routes
+            if routes is None:
+                routes = self._compile_routes()
+            sensor = routes[data[route_key]]
+            if sensor is not None:
+                sensor._dispatch(data)
 
     def __str__(self):
         return '{} {} ({})'.format(self.device_type, self.uuid, type(self).__name__)
@@ -183,12 +707,13 @@ class Receiver(pyglet.event.EventDispatcher, metaclass=abc.ABCMeta):
         return reversed(self._sensors)
 
 
-class Sensor(pyglet.event.EventDispatcher):
+class Sensor(Subscribable, pyglet.event.EventDispatcher):
     """VRPN sensor.
 
     A |pyglet.event.EventDispatcher| associated with an individual sensor of a tracker.
     Use |EventDispatcher| methods to register handlers for the ``'on_input'`` event.
     These handlers should take a single argument, raw data from the tracker as a dictionary.
+    Filtered handlers can be registered with |Subscribable.subscribe|.
 
     Sensors should not be directly instantiated, they will be automatically created by the parent |Receiver|.
 
@@ -198,13 +723,13 @@ class Sensor(pyglet.event.EventDispatcher):
         The number of the associated sensor.
 
     """
-    def __init__(self, parent_str, number):
+    def __init__(self, parent_str, number, on_change=None):
         self._parent_str = parent_str
         self.number = number
+        self._on_change = on_change
 
     def _callback(self, user_data, data):
-        self.dispatch_event('on_input', data)
-        debug('dispatched on_input event for {}'.format(self))
+        self._dispatch(data)
 
     def __str__(self):
         return 'Sensor #{} of {}'.format(self.number, self._parent_str)
@@ -227,27 +752,189 @@ class Tracker(Receiver):
     """Tracker receivers can derive from this instead of |Receiver|, and then don't have to override |object_class|.
 
     """
-    object_class = vrpn.receiver.Tracker
+    object_class = VRPNClass('Tracker')
+    sample_class = TrackerSample
 
 
 class Dial(Receiver):
-    """Dial receivers can derive from this instead of |Receiver|, and then don't have to override |object_class|."""
-    object_class = vrpn.receiver.Dial
+    """Dial receivers can derive from this instead of |Receiver|, and then don't have to override |object_class|.
+
+    Each dial's changes are accumulated in an array, so that its total rotation can be read at any time
+    with |Dial.total| instead of being summed by a handler.
+    Samples are dispatched as dictionaries only while there are handlers or subscriptions
+    on the receiver or its sensors.
+
+    Attributes
+    ----------
+    totals : |array.array| of float
+        The accumulated change of each dial, in revolutions.
+
+    """
+    object_class = VRPNClass('Dial')
+    sensor_key = 'dial'
+    sample_class = DialSample
+
+    def __init__(self, *config_args, **kwargs):
+        super().__init__(*config_args, **kwargs)
+        self.totals = array('d', [0.0] * self.n_sensors)
+
+    def total(self, dial):
+        """
+        Get the accumulated change of a dial, in revolutions.
+
+        Parameters
+        ----------
+        dial : int
+
+        Returns
+        -------
+        float
+
+        """
+        return self.totals[dial] if dial < len(self.totals) else 0.0
+
+    def reset(self, dial=None):
+        """Set the accumulated change of one dial, or of all dials, back to 0."""
+        if dial is None:
+            # In place, so that references to the array stay current.
+            self.totals[:] = array('d', [0.0] * len(self.totals))
+        elif dial < len(self.totals):
+            self.totals[dial] = 0.0
+
+    def _callback(self, user_data, data):
+        dial = data['dial']
+        totals = self.totals
+        if dial >= len(totals):
+            totals.extend([0.0] * (dial + 1 - len(totals)))
+        totals[dial] += data['change']
+
+        # Routes are None only until compiled, which the full callback does.
+        if self._subscriptions or self._handlers != () or self._routes is None or self._has_routes:
+            super()._callback(user_data, data)
+        else:
+            self.n_samples += 1
 
 
 class Button(Receiver):
-    """Button receivers can derive from this instead of |Receiver|, and then don't have to override |object_class|."""
-    object_class = vrpn.receiver.Button
+    """Button receivers can derive from this instead of |Receiver|, and then don't have to override |object_class|.
+
+    The state of all buttons is kept in a bitmask, updated in place,
+    so that it can be polled with |Button.is_pressed| instead of being tracked by a handler.
+    Changes of state can be subscribed to with |Button.subscribe_press| and |Button.subscribe_release|;
+    these subscribers are called with only the button number and time, and only when the state actually changes.
+    Samples are dispatched as dictionaries only while there are handlers or subscriptions
+    on the receiver or its sensors.
+
+    Attributes
+    ----------
+    pressed : int
+        Bitmask of the buttons currently pressed: bit ``i`` is set while button ``i`` is pressed.
+        Cleared whenever the connection is (re)opened, since releases may have been missed in between.
+
+    """
+    object_class = VRPNClass('Button')
+    sensor_key = 'button'
+    sample_class = ButtonSample
+
+    def __init__(self, *config_args, **kwargs):
+        super().__init__(*config_args, **kwargs)
+        self.pressed = 0
+        self._press_subscribers = ()
+        self._release_subscribers = ()
+
+    def is_pressed(self, button):
+        """
+        Check whether a button is currently pressed.
+
+        Parameters
+        ----------
+        button : int
+
+        Returns
+        -------
+        bool
+
+        """
+        return bool(self.pressed >> button & 1)
+
+    @property
+    def pressed_buttons(self):
+        """The numbers of the buttons currently pressed, in increasing order."""
+        pressed = self.pressed
+        return [ix for ix in range(pressed.bit_length()) if pressed >> ix & 1]
+
+    def subscribe_press(self, handler):
+        """
+        Call a function whenever a button goes from released to pressed.
+
+        Parameters
+        ----------
+        handler : func
+            Called with two arguments, the button number and the time of the sample.
+
+        """
+        # Replace rather than mutate, as with subscriptions.
+        self._press_subscribers = self._press_subscribers + (handler,)
+
+    def unsubscribe_press(self, handler):
+        if handler not in self._press_subscribers:
+            raise ValueError('{!r} is not subscribed to {}'.format(handler, self))
+        self._press_subscribers = tuple(other for other in self._press_subscribers if other != handler)
+
+    def subscribe_release(self, handler):
+        """
+        Call a function whenever a button goes from pressed to released.
+
+        Parameters
+        ----------
+        handler : func
+            Called with two arguments, the button number and the time of the sample.
+
+        """
+        self._release_subscribers = self._release_subscribers + (handler,)
+
+    def unsubscribe_release(self, handler):
+        if handler not in self._release_subscribers:
+            raise ValueError('{!r} is not subscribed to {}'.format(handler, self))
+        self._release_subscribers = tuple(other for other in self._release_subscribers if other != handler)
+
+    def close(self):
+        super().close()
+        self._press_subscribers = ()
+        self._release_subscribers = ()
+
+    def _open(self):
+        self.pressed = 0
+        super()._open()
+
+    def _callback(self, user_data, data):
+        button = data['button']
+        bit = 1 << button
+        if data['state']:
+            if not self.pressed & bit:
+                self.pressed |= bit
+                for handler in self._press_subscribers:
+                    handler(button, data.get('time'))
+        elif self.pressed & bit:
+            self.pressed &= ~bit
+            for handler in self._release_subscribers:
+                handler(button, data.get('time'))
+
+        # Routes are None only until compiled, which the full callback does.
+        if self._subscriptions or self._handlers != () or self._routes is None or self._has_routes:
+            super()._callback(user_data, data)
+        else:
+            self.n_samples += 1
 
 
 class Analog(Receiver):
     """Analog receivers can derive from this instead of |Receiver|, and then don't have to override |object_class|."""
-    object_class = vrpn.receiver.Analog
+    object_class = VRPNClass('Analog')
 
 
 class Text(Receiver):
     """Text receivers can derive from this instead of |Receiver|, and then don't have to override |object_class|."""
-    object_class = vrpn.receiver.Text
+    object_class = VRPNClass('Text')
 
 
 class TestTracker(Tracker, FirstArgumentIsNSensors):
@@ -264,6 +951,10 @@ class TestTracker(Tracker, FirstArgumentIsNSensors):
     """
     device_type = 'vrpn_Tracker_NULL'
 
+    @property
+    def expected_rate(self):
+        return self.config_args[1]
+
 
 class TestButton(Button, FirstArgumentIsNSensors):
     """
@@ -279,6 +970,10 @@ class TestButton(Button, FirstArgumentIsNSensors):
     """
     device_type = 'vrpn_Button_Example'
 
+    @property
+    def expected_rate(self):
+        return self.config_args[1]
+
 
 class TestDial(Dial, FirstArgumentIsNSensors):
     """
@@ -296,6 +991,10 @@ class TestDial(Dial, FirstArgumentIsNSensors):
     """
     device_type = 'vrpn_Dial_Example'
 
+    @property
+    def expected_rate(self):
+        return self.config_args[2]
+
 
 class PolhemusLibertyLatus(Tracker, FirstArgumentIsNSensors):
     """Polhemus Liberty Latus high-speed tracker.
@@ -311,9 +1010,9 @@ class PolhemusLibertyLatus(Tracker, FirstArgumentIsNSensors):
     device_type = 'vrpn_Tracker_LibertyHS'
     extend_config_line_with_backslash = True
 
-    def __init__(self, n_markers, additional_config_lines=None):
+    def __init__(self, n_markers, additional_config_lines=None, compact=False):
         # Second argument is baudrate, which has no effect; 115200 is a sensible value.
-        super().__init__(n_markers, 115200, additional_config_lines=additional_config_lines)
+        super().__init__(n_markers, 115200, additional_config_lines=additional_config_lines, compact=compact)
 
 
 Receiver.register_event_type('on_input')
@@ -0,0 +1,418 @@
+"""
+Recording of samples into chunked, compressed, columnar files.
+
+Requires ``numpy``, and ``h5py`` or ``pyarrow`` for the HDF5 and Parquet formats.
+
+"""
+import io
+import os
+import zipfile
+from collections import OrderedDict
+
+import numpy as np
+
+from pyvrpn.gaps import _to_seconds
+from pyvrpn.logging import setup_module_logging
+
+__all__ = [
+    'Recorder',
+    'export',
+    'read_npz',
+]
+
+FORMATS = ('npz', 'hdf5', 'parquet')
+OVERFLOW_POLICIES = ('drop', 'block')
+GAPS_GROUP = 'gaps'
+GAP_FIELDS = ('sensor', 'index', 'start', 'end', 'n_missing')
+
+error, warning, info, debug = setup_module_logging(__name__)
+
+
+class Recorder:
+    """Columnar recorder.
+
+    A handler (usually attached with |Receiver.record|) that collects samples into columns,
+    one per field and one group of columns per sensor,
+    and writes them out in chunks of `chunk_size` rows, so that memory use does not grow with the session length.
+    By default the chunks are written by a background process (through an |OffloadedHandler|),
+    so that compression does not hold up the receive loop.
+    Call |Recorder.close| at the end of the session to write the remaining rows and finish the file.
+
+    If the background writer falls behind (a slow disk, or a machine busy with other work),
+    up to `max_pending` chunks wait for it in memory.
+    Beyond that, the recorder is called from the receive loop, so something has to give:
+    with ``overflow='drop'`` (the default), new chunks are dropped, counted in |Recorder.n_dropped|
+    and logged, and capture continues on time, but the file is missing those rows
+    (each dropped chunk is recorded as a gap, see below);
+    with ``overflow='block'``, recording waits for the writer, and so does everything else in the receive loop,
+    delaying all handlers and letting samples queue up in VRPN's buffers until it catches up.
+    Use ``'block'`` only when a complete file matters more than the timing of the session.
+
+    The formats are:
+      - ``'npz'``: a zip archive of compressed ``.npy`` arrays, one per chunk of each column,
+        named ``<group>/<field>/<chunk>.npy``. Read with |read_npz|.
+      - ``'hdf5'``: one HDF5 group per sensor, with one resizable, chunked, gzip-compressed dataset per field.
+      - ``'parquet'``: a directory with one Parquet file per sensor, one row group per chunk.
+        Fields with several values (e.g. ``'position'``) are split into columns ``position_0``, ``position_1``, ...
+
+    Groups are named ``sensor_<n>``, where ``n`` is the value of `group_key` in the sample.
+    Timestamps are converted to seconds since the epoch.
+    Gaps (see |GapDetector|) can be recorded into a ``'gaps'`` group with |Recorder.record_gaps|;
+    their ``index`` is the row of the sensor's group at which the missing samples belong.
+    Chunks dropped because the writer was behind are recorded in the ``'gaps'`` group too,
+    with the timestamps of the first and last rows dropped as ``start`` and ``end``.
+
+    Parameters
+    ----------
+    path : str
+    format : {'npz', 'hdf5', 'parquet'}, optional
+        Defaults to a guess from the extension of `path` (``'.h5'`` or ``'.hdf5'``, ``'.parquet'``),
+        or else ``'npz'``.
+    fields : iterable of str, optional
+        The fields to record.
+        Defaults to all the fields of the first sample of each sensor, except `group_key`.
+    group_key : str, optional
+        The key in the data giving the sensor number.
+        Defaults to ``'sensor'``.
+    chunk_size : int, optional
+        Number of rows per chunk.
+        Defaults to 4096.
+    background : bool, optional
+        If True (the default), write chunks from a background process.
+    max_pending : int, optional
+        Maximum number of chunks waiting to be written in the background.
+        Defaults to 16.
+    overflow : {'drop', 'block'}, optional
+        What to do with a chunk when `max_pending` chunks are already waiting (see above).
+        Defaults to ``'drop'``.
+
+    Attributes
+    ----------
+    path : str
+    format : str
+    fields : tuple of str or None
+    group_key : str
+    chunk_size : int
+    n_samples : int
+        Number of samples recorded.
+    n_chunks : int
+        Number of chunks written or queued.
+    n_dropped : int
+        Number of samples in chunks dropped because the background writer was behind.
+    writer : |OffloadedHandler| or None
+        The background writer, if `background` is True.
+    closed : bool
+
+    """
+    def __init__(self, path, format=None, fields=None, group_key='sensor', chunk_size=4096,
+                 background=True, max_pending=16, overflow='drop'):
+        format = format or _guess_format(path)
+        if format not in FORMATS:
+            raise ValueError('format must be one of {}, not {!r}'.format(FORMATS, format))
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError('overflow must be one of {}, not {!r}'.format(OVERFLOW_POLICIES, overflow))
+
+        self.path = path
+        self.format = format
+        self.fields = tuple(fields) if fields else None
+        self.group_key = group_key
+        self.chunk_size = chunk_size
+        self.n_samples = 0
+        self.n_chunks = 0
+        self.n_dropped = 0
+        self.closed = False
+        self.source = None
+        self.subscription = None
+
+        if background:
+            from pyvrpn.offload import OffloadedHandler
+            self.writer = OffloadedHandler(_write, pool='process', maxsize=max_pending,
+                                           overflow='block' if overflow == 'block' else 'drop_newest')
+            self._write = self.writer
+        else:
+            self.writer = None
+            self._write = _write
+
+        # Group name -> (fields, columns), with one list per field.
+        self._groups = OrderedDict()
+        # Group name -> number of rows written (or queued), and number of rows dropped.
+        self._n_rows = {}
+        self._n_rows_dropped = {}
+
+    def __call__(self, data):
+        key = data.get(self.group_key, 0)
+        group = self._groups.get(key)
+        if group is None:
+            group = self._add_group(key, data)
+        fields, columns = group
+
+        for field, column in zip(fields, columns):
+            value = data.get(field)
+            if field == 'time' and value is not None and type(value) is not float:
+                value = _to_seconds(value)
+            column.append(value)
+        self.n_samples += 1
+
+        if len(columns[0]) >= self.chunk_size:
+            self._flush(key)
+
+    def record_gaps(self, detector):
+        """
+        Record the gaps found by a |GapDetector| into the ``'gaps'`` group.
+
+        Parameters
+        ----------
+        detector : |GapDetector|
+
+        """
+        detector.add_listener(self._record_gap)
+
+    def flush(self):
+        """Write out all buffered rows as (possibly short) chunks."""
+        for key in list(self._groups):
+            if key != GAPS_GROUP:
+                self._flush(key)
+        # Last, so that it includes any chunks just dropped.
+        if GAPS_GROUP in self._groups:
+            self._flush(GAPS_GROUP)
+
+    def close(self):
+        """Stop recording, write the remaining rows, and finish the file."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.source is not None:
+            self.source.unsubscribe(self.subscription)
+        if self.writer:
+            # Capture is over: the remaining rows, and the message finishing the file, must not be dropped.
+            self.writer.overflow = 'block'
+        self.flush()
+        self._write((self.path, self.format, None, None))
+        if self.writer:
+            self.writer.close()
+        info('recorded {} samples in {} chunks to {}'.format(self.n_samples, self.n_chunks, self.path))
+        if self.n_dropped:
+            warning('dropped {} of {} samples recording to {}: the writer was behind'.format(
+                self.n_dropped, self.n_samples, self.path))
+
+    def _add_group(self, key, data):
+        fields = self.fields or tuple(field for field in data if field != self.group_key)
+        self._groups[key] = group = (fields, [[] for _ in fields])
+        return group
+
+    def _record_gap(self, gap):
+        sensor, index, start, end, n_missing = gap
+        # The detector counts samples received; rows dropped so far are not in the file.
+        self._append_gap(sensor, index - self._n_rows_dropped.get(sensor, 0), start, end, n_missing)
+        if len(self._groups[GAPS_GROUP][1][0]) >= self.chunk_size:
+            # Write the sensors' rows too, so that any chunk dropped among them is accounted for in these gaps.
+            self.flush()
+
+    def _append_gap(self, *gap):
+        group = self._groups.get(GAPS_GROUP)
+        if group is None:
+            self._groups[GAPS_GROUP] = group = (GAP_FIELDS, [[] for _ in GAP_FIELDS])
+        for column, value in zip(group[1], gap):
+            column.append(value)
+
+    def _record_dropped(self, key, chunk, n_rows):
+        # The dropped rows would have started at `first`; gaps still buffered after them move up.
+        first = self._n_rows.get(key, 0)
+        self._n_rows_dropped[key] = self._n_rows_dropped.get(key, 0) + n_rows
+        if GAPS_GROUP in self._groups:
+            sensors, indexes = self._groups[GAPS_GROUP][1][:2]
+            for ix, (sensor, index) in enumerate(zip(sensors, indexes)):
+                if sensor == key and index > first:
+                    indexes[ix] = max(index - n_rows, first)
+
+        times = chunk.get('time')
+        start, end = (times[0], times[-1]) if times is not None else (float('nan'), float('nan'))
+        self._append_gap(key, first, start, end, n_rows)
+
+    def _flush(self, key):
+        fields, columns = self._groups[key]
+        if not columns[0]:
+            return
+        name = key if key == GAPS_GROUP else 'sensor_{}'.format(key)
+        chunk = OrderedDict((field, np.asarray(column)) for field, column in zip(fields, columns))
+        n_rows = len(columns[0])
+        for column in columns:
+            del column[:]
+
+        if key == GAPS_GROUP and self.writer:
+            # Gaps are few, and without them the file cannot be read correctly: never drop them.
+            overflow, self.writer.overflow = self.writer.overflow, 'block'
+            try:
+                self._write((self.path, self.format, name, chunk))
+            finally:
+                self.writer.overflow = overflow
+            self.n_chunks += 1
+            return
+
+        n_dropped = self.writer.n_dropped if self.writer else 0
+        self._write((self.path, self.format, name, chunk))
+        if self.writer and self.writer.n_dropped != n_dropped:
+            self.n_dropped += n_rows
+            self._record_dropped(key, chunk, n_rows)
+            warning('dropped a chunk of {} rows of {} from {}: {} chunks waiting to be written'.format(
+                n_rows, name, self.path, self.writer.pending))
+            return
+        self._n_rows[key] = self._n_rows.get(key, 0) + n_rows
+        self.n_chunks += 1
+
+def export(samples, path, **kwargs):
+    """
+    Record already-collected samples, e.g. a list of dictionaries accumulated by an ``'on_input'`` handler.
+
+    Parameters
+    ----------
+    samples : iterable of dict
+    path : str
+    kwargs
+        Keyword arguments passed to |Recorder|.
+        `background` defaults to False.
+
+    Returns
+    -------
+    |Recorder|
+
+    """
+    kwargs.setdefault('background', False)
+    recorder = Recorder(path, **kwargs)
+    for sample in samples:
+        recorder(sample)
+    recorder.close()
+    return recorder
+
+
+def read_npz(path):
+    """
+    Read a recording in the ``'npz'`` format.
+
+    Parameters
+    ----------
+    path : str
+
+    Returns
+    -------
+    dict of str to dict of str to |numpy.ndarray|
+        The columns of each group, each concatenated from its chunks.
+
+    """
+    chunks = OrderedDict()
+    with zipfile.ZipFile(path) as archive:
+        for name in sorted(archive.namelist()):
+            group, field, _ = name.split('/')
+            with archive.open(name) as file:
+                array = np.lib.format.read_array(io.BytesIO(file.read()))
+            chunks.setdefault(group, OrderedDict()).setdefault(field, []).append(array)
+    return {
+        group: {field: np.concatenate(arrays) for field, arrays in fields.items()}
+        for group, fields in chunks.items()
+    }
+
+
+def _guess_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.h5', '.hdf5'):
+        return 'hdf5'
+    if extension == '.parquet':
+        return 'parquet'
+    return 'npz'
+
+
+# Open writers, by path.
+# Module-level so that it persists in the background process between chunks.
+_writers = {}
+
+
+def _write(message):
+    path, format, group, chunk = message
+    if group is None:
+        writer = _writers.pop(path, None)
+        if writer:
+            writer.close()
+        return
+
+    writer = _writers.get(path)
+    if writer is None:
+        writer = _writers[path] = _WRITER_CLASSES[format](path)
+    writer.write(group, chunk)
+
+
+class _NpzWriter:
+    def __init__(self, path):
+        self._archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        self._n_chunks = {}
+
+    def write(self, group, chunk):
+        ix = self._n_chunks.get(group, 0)
+        self._n_chunks[group] = ix + 1
+        for field, array in chunk.items():
+            buffer = io.BytesIO()
+            np.lib.format.write_array(buffer, array)
+            self._archive.writestr('{}/{}/{:06}.npy'.format(group, field, ix), buffer.getvalue())
+
+    def close(self):
+        self._archive.close()
+
+
+class _Hdf5Writer:
+    def __init__(self, path):
+        import h5py
+        self._file = h5py.File(path, 'w')
+
+    def write(self, group, chunk):
+        group = self._file.require_group(group)
+        for field, array in chunk.items():
+            if field in group:
+                dataset = group[field]
+                n_rows = dataset.shape[0]
+                dataset.resize(n_rows + len(array), axis=0)
+                dataset[n_rows:] = array
+            else:
+                group.create_dataset(field, data=array, maxshape=(None,) + array.shape[1:],
+                                     chunks=True, compression='gzip')
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path):
+        import pyarrow
+        import pyarrow.parquet
+        self._pyarrow = pyarrow
+        self._path = path
+        self._writers = {}
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def write(self, group, chunk):
+        names, arrays = [], []
+        for field, array in chunk.items():
+            if array.ndim == 1:
+                names.append(field)
+                arrays.append(self._pyarrow.array(array))
+            else:
+                for ix in range(array.shape[1]):
+                    names.append('{}_{}'.format(field, ix))
+                    arrays.append(self._pyarrow.array(array[:, ix]))
+        table = self._pyarrow.Table.from_arrays(arrays, names=names)
+
+        writer = self._writers.get(group)
+        if writer is None:
+            writer = self._writers[group] = self._pyarrow.parquet.ParquetWriter(
+                os.path.join(self._path, '{}.parquet'.format(group)), table.schema)
+        writer.write_table(table)
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+
+
+_WRITER_CLASSES = {
+    'npz': _NpzWriter,
+    'hdf5': _Hdf5Writer,
+    'parquet': _ParquetWriter,
+}
@@ -0,0 +1,126 @@
+from collections.abc import Mapping
+
+__all__ = [
+    'Sample',
+    'TrackerSample',
+    'ButtonSample',
+    'DialSample',
+]
+
+
+class Sample(Mapping):
+    """Compact sample.
+
+    A read-only alternative to the dictionaries created by ``vrpn``,
+    storing its fields in ``__slots__`` instead of a hash table.
+    It supports the read-only dictionary interface (``sample['position']``, ``sample.get('time')``, ``dict(sample)``),
+    and the fields can also be accessed as attributes (``sample.position``).
+    Keys that are not fields of the sample class are discarded.
+
+    Receivers created with ``compact=True`` pass instances of the appropriate subclass
+    (|Receiver.sample_class|) to their handlers instead of dictionaries.
+    Subclasses must define both ``__slots__`` and ``_fields``, in the same order.
+
+    ``vrpn`` still builds its dictionary for every sample, and the compact sample is built from it,
+    so compact samples add an allocation per sample rather than saving one.
+    They pay off only when samples are kept: a retained tracker sample takes about 184 bytes instead of 304,
+    but receiving a sample that is not kept costs about 1.6 us instead of 0.6 us,
+    and full garbage collections over kept samples take several times longer,
+    since the compact objects stay tracked by the collector while dictionaries of numbers are untracked
+    (``benchmarks/bench_samples.py``, CPython 3.11).
+
+    """
+    __slots__ = ()
+    _fields = ()
+
+    def __init__(self, *values):
+        for field, value in zip(self._fields, values):
+            setattr(self, field, value)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create a sample from a dictionary.
+
+        Parameters
+        ----------
+        data : dict
+
+        Returns
+        -------
+        |Sample|
+
+        """
+        return cls(*[data.get(field) for field in cls._fields])
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self._fields}
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, field) for field in self._fields)
+
+    def __repr__(self):
+        return '{}({})'.format(
+            type(self).__name__,
+            ', '.join('{}={!r}'.format(field, getattr(self, field)) for field in self._fields),
+        )
+
+
+class TrackerSample(Sample):
+    """Compact sample from a |vrpn.receiver.Tracker| device."""
+    __slots__ = _fields = ('sensor', 'position', 'quaternion', 'time')
+
+    def __init__(self, sensor, position, quaternion, time):
+        self.sensor = sensor
+        self.position = position
+        self.quaternion = quaternion
+        self.time = time
+
+    @classmethod
+    def from_dict(cls, data):
+        get = data.get
+        return cls(get('sensor'), get('position'), get('quaternion'), get('time'))
+
+
+class ButtonSample(Sample):
+    """Compact sample from a |vrpn.receiver.Button| device."""
+    __slots__ = _fields = ('button', 'state', 'time')
+
+    def __init__(self, button, state, time):
+        self.button = button
+        self.state = state
+        self.time = time
+
+    @classmethod
+    def from_dict(cls, data):
+        get = data.get
+        return cls(get('button'), get('state'), get('time'))
+
+
+class DialSample(Sample):
+    """Compact sample from a |vrpn.receiver.Dial| device."""
+    __slots__ = _fields = ('dial', 'change', 'time')
+
+    def __init__(self, dial, change, time):
+        self.dial = dial
+        self.change = change
+        self.time = time
+
+    @classmethod
+    def from_dict(cls, data):
+        get = data.get
+        return cls(get('dial'), get('change'), get('time'))
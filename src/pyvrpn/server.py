@@ -1,11 +1,14 @@
 from subprocess import PIPE
 import re
 import os
+import codecs
+from collections import deque
 from functools import partial
 from tempfile import NamedTemporaryFile
 import asyncio
 import traceback
 from datetime import datetime
+from time import monotonic
 
 try:
     import cytoolz as toolz
@@ -13,10 +16,13 @@ except ImportError:
     import toolz
 
 from pyvrpn.logging import setup_module_logging
+from pyvrpn.pool import ConnectionPool
+from pyvrpn.watchdog import Watchdog
 
 __all__ = [
     'Server',
     'LocalServer',
+    'Watchdog',
 ]
 
 SERVER_CMD_ARGS = ['vrpn_server', '-f']
@@ -25,11 +31,12 @@ error, warning, info, debug = setup_module_logging(__name__)
 
 
 def _iscoroutinefunction(func):
-    # Workaround for curried and partial functions.
+    # Workaround for curried and partial functions, and callable objects.
     if asyncio.iscoroutinefunction(func):
         return True
 
-    return asyncio.iscoroutinefunction(getattr(func, 'func', None))
+    return (asyncio.iscoroutinefunction(getattr(func, 'func', None)) or
+            asyncio.iscoroutinefunction(getattr(func, '__call__', None)))
 
 
 class Server:
@@ -57,6 +64,9 @@ class Server:
     As long as the server process is running,
     the process's stdout will be logged at the INFO level,
     and stderr will be logged at the ERROR level.
+    Output is read in chunks, and logging is throttled (see |ThrottledLog|),
+    so that chatty drivers cannot flood the log or stall the event loop.
+    The most recent lines are always kept in |Server.recent_output|.
 
     Parameters
     ---------
@@ -73,6 +83,26 @@ class Server:
         Sleeping will occur after `sentinel` is found if both options are used.
     loop : |asyncio.EventLoop|, optional
         The event loop to schedule tasks with.
+    output_buffer_size : int, optional
+        Number of recent lines of stdout and stderr (each) to keep in |Server.recent_output|.
+        Defaults to 1000.
+    max_log_rate : float, optional
+        Maximum number of lines per second (for each of stdout and stderr) to log.
+        Further lines are counted and summarized.
+        Defaults to 100.
+    supervise : bool, optional
+        If True, restart the server process, with the same configuration and arguments, whenever it exits
+        without |Server.stop| having been called.
+    max_restarts : int, optional
+        Maximum number of restarts when supervising.
+        Defaults to no limit.
+    restart_backoff : float, optional
+        Number of seconds to wait before the first restart.
+        The wait doubles with each consecutive restart, up to `max_backoff`,
+        and is reset once the process has run for longer than `max_backoff`.
+        Defaults to 0.1.
+    max_backoff : float, optional
+        Defaults to 10.
 
     Attributes
     ----------
@@ -81,12 +111,25 @@ class Server:
     sentinel : str
     sleep : int
     loop : |asyncio.EventLoop|
+    max_log_rate : float
+    supervise : bool
+    max_restarts : int or None
+    restart_backoff : float
+    max_backoff : float
     proc : |asyncio.subprocess.Process|
         The process running the ``vrpn_server`` executable.
     started_at : |datetime.datetime|
         The time when the server completed initialization.
     monitor_tasks : dict of str to |asyncio.Task|
         Contains two tasks, one that monitors the stdout of |proc| and one that monitors its stderr.
+    recent_output : dict of str to |collections.deque|
+        The most recent lines of ``'stdout'`` and ``'stderr'``.
+    output_readers : dict of str to |LineReader|
+        The readers for ``'stdout'`` and ``'stderr'``, whose counters can be used to monitor output rates.
+    supervisor_task : |asyncio.Task| or None
+        The task that restarts the server process, if `supervise` is True.
+    n_restarts : int
+        Number of times the server process has been restarted.
     is_running : bool
         Returns True if the server is running.
     time : float
@@ -104,22 +147,44 @@ class Server:
     .. _here: http://python-notes.curiousefficiency.org/en/latest/pep_ideas/async_programming.html#asynchronous-context-managers
 
     """
-    def __init__(self, devices_config_text, server_args=None, sentinel=None, sleep=0, loop=None, _exe=None):
+    def __init__(self, devices_config_text, server_args=None, sentinel=None, sleep=0, loop=None,
+                 output_buffer_size=1000, max_log_rate=100,
+                 supervise=False, max_restarts=None, restart_backoff=0.1, max_backoff=10, _exe=None):
         self.devices_config_text = devices_config_text
         self.server_args = server_args
         self.sentinel = sentinel
         self.sleep = sleep
         self.loop = loop
+        self.max_log_rate = max_log_rate
+        self.supervise = supervise
+        self.max_restarts = max_restarts
+        self.restart_backoff = restart_backoff
+        self.max_backoff = max_backoff
 
         self._exe = _exe or SERVER_CMD_ARGS
         self._config_file = None
 
         self.process = None
         self.started_at = None
+        self.supervisor_task = None
+        self.n_restarts = 0
+        self._stopping = False
         self.monitor_tasks = {
             'stdout': None,
             'stderr': None,
         }
+        self.recent_output = {
+            'stdout': deque(maxlen=output_buffer_size),
+            'stderr': deque(maxlen=output_buffer_size),
+        }
+        self.output_readers = {
+            'stdout': None,
+            'stderr': None,
+        }
+        self._output_logs = {
+            'stdout': ThrottledLog(info, max_log_rate, buffer=self.recent_output['stdout'], loop=loop),
+            'stderr': ThrottledLog(error, max_log_rate, buffer=self.recent_output['stderr'], loop=loop),
+        }
 
     @property
     def is_running(self):
@@ -145,6 +210,19 @@ class Server:
         if self.is_running:
             raise RuntimeError("Cannot start a Server that's already is_running")
 
+        self._stopping = False
+        self._write_config_file()
+        try:
+            yield from self._launch()
+        except:
+            os.unlink(self._config_file.name)
+            raise
+
+        if self.supervise:
+            debug('running coroutine Server._supervise with asyncio.async')
+            self.supervisor_task = asyncio.async(self._supervise(), loop=self.loop)
+
+    def _write_config_file(self):
         with NamedTemporaryFile('w', delete=False) as config_file:
             self._config_file = config_file
             config_file.writelines([
@@ -156,61 +234,117 @@ class Server:
             config_file.writelines(self.devices_config_text)
             config_file.flush()
 
-            # Log the entire contents of the file.
-            info('Temporary config file created at {} with contents:'.format(config_file.name))
-            _log_file_contents(info, config_file.name)
+        # Log the entire contents of the file.
+        info('Temporary config file created at {} with contents:'.format(config_file.name))
+        _log_file_contents(info, config_file.name)
 
-            cmd_args = self._exe + [config_file.name]
-            if self.server_args:
-                cmd_args.extend(self.server_args)
+    @asyncio.coroutine
+    def _launch(self):
+        # Start the process from the existing config file, and wait for it to initialize.
+        cmd_args = self._exe + [self._config_file.name]
+        if self.server_args:
+            cmd_args.extend(self.server_args)
+
+        debug('yielding from coroutine asyncio.create_subprocess_exec')
+        self.process = yield from asyncio.create_subprocess_exec(
+            *cmd_args,
+            stdout=PIPE,
+            stderr=PIPE,
+            loop=self.loop
+        )
+        info('Started server process with PID {}.'.format(self.process.pid))
+
+        # The same reader is used before and after the sentinel, so that no buffered output is lost.
+        self.output_readers['stdout'] = LineReader(self.process.stdout)
+        self.output_readers['stderr'] = LineReader(self.process.stderr)
 
-            debug('yielding from coroutine asyncio.create_subprocess_exec')
-            self.process = yield from asyncio.create_subprocess_exec(
-                *cmd_args,
-                stdout=PIPE,
-                stderr=PIPE,
+        try:
+            debug('running coroutine monitor_feed with asyncio.async')
+            self.monitor_tasks['stderr'] = asyncio.async(
+                monitor_feed(
+                    self._output_logs['stderr'],
+                    self.output_readers['stderr']),
+                loop=self.loop)
+
+            if self.sentinel:
+                debug('yielding from coroutine asyncio.wait_for(monitor_feed())')
+                yield from asyncio.wait_for(
+                    monitor_feed(
+                        _check_for_pattern(re.compile(self.sentinel), log_func=self._output_logs['stdout']),
+                        self.output_readers['stdout']),
+                    None, loop=self.loop
+                )
+            debug('running coroutine monitor_feed with asyncio.async')
+            self.monitor_tasks['stdout'] = asyncio.async(
+                monitor_feed(
+                    self._output_logs['stdout'],
+                    self.output_readers['stdout']),
                 loop=self.loop
             )
-            info('Started server process with PID {}.'.format(self.process.pid))
+            debug('yielding from coroutine asyncio.sleep')
+            yield from asyncio.sleep(self.sleep, loop=self.loop)
 
-            try:
-                debug('running coroutine monitor_feed with asyncio.async')
-                self.monitor_tasks['stderr'] = asyncio.async(
-                    monitor_feed(
-                        error,
-                        decoded_readline(self.process.stderr)),
-                    loop=self.loop)
-
-                if self.sentinel:
-                    debug('yielding from coroutine asyncio.wait_for(monitor_feed())')
-                    yield from asyncio.wait_for(
-                        monitor_feed(
-                            _check_for_pattern(re.compile(self.sentinel), log_func=info),
-                            decoded_readline(self.process.stdout)),
-                        None, loop=self.loop
-                    )
-                debug('running coroutine monitor_feed with asyncio.async')
-                self.monitor_tasks['stdout'] = asyncio.async(
-                    monitor_feed(
-                        info,
-                        decoded_readline(self.process.stdout)),
-                    loop=self.loop
-                )
-                debug('yielding from coroutine asyncio.sleep')
-                yield from asyncio.sleep(self.sleep, loop=self.loop)
+            # Done initialization, make sure sever process is still is_running.
+            if self.process.returncode is not None:
+                raise RuntimeError(
+                    'Server process exited with exit code {} before initialization completed.'.format(
+                        self.process.returncode))
 
-                # Done initialization, make sure sever process is still is_running.
-                if self.process.returncode is not None:
-                    raise RuntimeError(
-                        'Server process exited with exit code {} before initialization completed.'.format(
-                            self.process.returncode))
+            info('Server initialization completed.')
+            self.started_at = datetime.now()
 
-                info('Server initialization completed.')
-                self.started_at = datetime.now()
+        except:
+            # Don't leave a half-started process behind, whether starting or restarting.
+            yield from self._kill()
+            raise
 
-            except:
-                self.stop(kill=True)
+    @asyncio.coroutine
+    def _kill(self):
+        # Kill and reap the process, keeping the config file for a restart.
+        self.cancel_monitoring()
+        if self.process.returncode is None:
+            self.process.kill()
+            info('SIGKILL sent to server process.')
+        yield from self.process.wait()
+
+    @asyncio.coroutine
+    def _supervise(self):
+        backoff = self.restart_backoff
+        while True:
+            returncode = yield from self.process.wait()
+            if self._stopping:
+                return
+
+            uptime = (datetime.now() - self.started_at).total_seconds() if self.started_at else 0
+            warning('Server process exited unexpectedly with exit code {} after {:.1f} s.'.format(returncode, uptime))
+            self.cancel_monitoring()
+            if self.max_restarts is not None and self.n_restarts >= self.max_restarts:
+                error('Server process exited {} times; giving up.'.format(self.n_restarts + 1))
+                return
+
+            # Back off only if the process keeps crashing soon after starting.
+            if uptime > self.max_backoff:
+                backoff = self.restart_backoff
+            info('Restarting server process in {:.2f} s.'.format(backoff))
+            yield from asyncio.sleep(backoff, loop=self.loop)
+            backoff = min(2 * backoff, self.max_backoff)
+
+            self.n_restarts += 1
+            try:
+                yield from self._launch()
+            except asyncio.CancelledError:
                 raise
+            except Exception as exc:
+                error('Failed to restart server process: {!r}'.format(exc))
+                # The failed attempt had no uptime, so keep backing off.
+                self.started_at = None
+                continue
+            yield from self._restarted()
+
+    @asyncio.coroutine
+    def _restarted(self):
+        # Hook for subclasses, run after a supervised restart has completed.
+        pass
 
     @asyncio.coroutine
     def stop(self, exc_type=None, exc_value=None, exc_tb=None, kill=False):
@@ -243,6 +377,15 @@ class Server:
             The exit code of the process.
 
         """
+        self._stopping = True
+        if self.supervisor_task:
+            self.supervisor_task.cancel()
+            if self.process and not self.is_running:
+                # Crashed, and either waiting to be restarted or given up on.
+                self.cancel_monitoring()
+                os.unlink(self._config_file.name)
+                return self.process.returncode
+
         if not self.is_running:
             raise RuntimeError("Cannot stop a Server that isn't is_running")
 
@@ -271,8 +414,12 @@ class Server:
 
     def cancel_monitoring(self, stream=None):
         if stream:
+            if self.monitor_tasks[stream] is None:
+                # The process did not get as far as monitoring this stream.
+                return
             debug('canceling Task monitoring {}'.format(stream))
             self.monitor_tasks[stream].cancel()
+            self._output_logs[stream].flush()
         else:
             for stream in self.monitor_tasks.keys():
                 self.cancel_monitoring(stream)
@@ -304,29 +451,94 @@ class LocalServer(Server):
     ----------
     devices : sequence of |Receiver|
         VRPN devices to manage.
+    watchdog : |Watchdog|, optional
+        If given, used to detect stalled devices and reconnect them while the server is running.
+    metrics : |Metrics|, optional
+        If given, measures the event loop and serves snapshots while the server is running.
+    hub : |Hub|, optional
+        If given, publishes the samples from all `devices` to other local processes while the server is running.
+    latency_budget : |LatencyBudget|, optional
+        If given, attached to the trackers and analogs among `devices`,
+        to coalesce or drop samples that are too old by the time they arrive.
+    run_mainloop : bool, optional
+        If False, |LocalServer.start| does not schedule the task that polls the devices,
+        and |LocalServer.poll| must be called regularly instead
+        (e.g. by a |DevicePump|, in pyglet applications).
+        Defaults to True.
+    pool_connections : bool, optional
+        If True, poll the devices through a |ConnectionPool|,
+        reading the (shared) connection to the server once per iteration rather than once per device.
+        Defaults to False.
     kwargs
         Optional keyword arguments to pass to |Server|.
+        With ``supervise=True``, the devices are reconnected (keeping their handlers and subscriptions)
+        each time the server process is restarted, and are not polled while it is down.
 
     Attributes
     ----------
     devices : sequence of |Receiver|
-    mainloop_task : |asyncio.Task|
+    watchdog : |Watchdog| or None
+    run_mainloop : bool
+    pool : |ConnectionPool| or None
+        The pool used if `pool_connections` is True.
+    mainloop_task : |asyncio.Task| or None
         The task that runs the |mainloop| method of the managed `devices`.
+    watchdog_task : |asyncio.Task| or None
+        The task that runs the |watchdog|.
+    metrics : |Metrics| or None
+    metrics_task : |asyncio.Task| or None
+        The task that runs the |metrics|.
+    hub : |Hub| or None
+    hub_task : |asyncio.Task| or None
+        The task that runs the |hub|.
+    latency_budget : |LatencyBudget| or None
+    n_iterations : int
+        Number of iterations of the loop calling the devices' |mainloop| methods.
 
     """
-    def __init__(self, devices, **kwargs):
-        super().__init__((device.config_text for device in devices), **kwargs)
+    def __init__(self, devices, watchdog=None, metrics=None, hub=None, latency_budget=None, run_mainloop=True,
+                 pool_connections=False, **kwargs):
+        super().__init__([device.config_text for device in devices], **kwargs)
         self.devices = devices
+        self.watchdog = watchdog
+        self.metrics = metrics
+        self.hub = hub
+        self.latency_budget = latency_budget
+        if latency_budget:
+            from pyvrpn.overload import DEVICE_TYPES
+            latency_budget.attach(*(device for device in devices if isinstance(device, DEVICE_TYPES)))
+        self.run_mainloop = run_mainloop
+        self.pool = ConnectionPool(devices) if pool_connections else None
         self.mainloop_task = None
+        self.watchdog_task = None
+        self.metrics_task = None
+        self.hub_task = None
+        self.n_iterations = 0
+
+    def poll(self):
+        """Call the |mainloop| method of each connected device once, if the server process is running."""
+        if self.is_running:
+            if self.pool:
+                self.pool.poll()
+            else:
+                for device in self.devices:
+                    if device.is_connected:
+                        device.mainloop()
+        self.n_iterations += 1
 
     @asyncio.coroutine
     def _mainloop(self):
         while True:
-            for device in self.devices:
-                if device.is_connected:
-                    device.mainloop()
+            self.poll()
             yield from asyncio.sleep(0)
 
+    @asyncio.coroutine
+    def _restarted(self):
+        # The old connections point at a dead process; handlers and subscriptions are kept.
+        for device in self.devices:
+            if device.is_connected:
+                device.reconnect()
+
     @asyncio.coroutine
     def start(self):
         """Start the server asynchronously.
@@ -341,14 +553,26 @@ class LocalServer(Server):
         yield from super().start()
         for device in self.devices:
             device.connect()
-        self.mainloop_task = asyncio.async(self._mainloop(), loop=self.loop)
+        if self.pool:
+            self.pool.regroup()
+        if self.run_mainloop:
+            self.mainloop_task = asyncio.async(self._mainloop(), loop=self.loop)
+        if self.watchdog:
+            self.watchdog_task = asyncio.async(
+                self.watchdog.run(self.devices, loop=self.loop, server=self), loop=self.loop)
+        if self.metrics:
+            self.metrics_task = asyncio.async(self.metrics.run(self, loop=self.loop), loop=self.loop)
+        if self.hub:
+            self.hub_task = asyncio.async(self.hub.run(self, loop=self.loop), loop=self.loop)
 
     @asyncio.coroutine
     def stop(self, exc_type=None, exc_value=None, exc_tb=None, kill=False):
         """Stop the server asynchronously.
 
-        The monitoring tasks stored in |Server.monitor_tasks| will be canceled,
-        then a SIGTERM or SIGKILL signal will be sent to the server process.
+        The tasks polling and monitoring the devices will be canceled and the devices disconnected
+        (keeping their handlers, see |Receiver.disconnect|),
+        then the monitoring tasks stored in |Server.monitor_tasks| will be canceled,
+        and a SIGTERM or SIGKILL signal will be sent to the server process.
 
         The first three inputs are the same as used for a context manager's |__exit__| method,
         and provide information about an exception.
@@ -374,7 +598,18 @@ class LocalServer(Server):
             The exit code of the process.
 
         """
-        self.mainloop_task.cancel()
+        if self.mainloop_task:
+            self.mainloop_task.cancel()
+        if self.watchdog_task:
+            self.watchdog_task.cancel()
+        if self.metrics_task:
+            self.metrics_task.cancel()
+        if self.hub_task:
+            self.hub_task.cancel()
+        # Release the connections; handlers and subscriptions are kept, so the server can be started again.
+        for device in self.devices:
+            if device.is_connected:
+                device.disconnect()
         yield from super().stop(exc_type, exc_value, exc_tb, kill)
 
 class _ContextManager:
@@ -420,7 +655,6 @@ def monitor_feed(monitor, feed):
         feed = asyncio.coroutine(feed)
 
     while True:
-        debug('yielding from coroutine feed')
         line = yield from feed()
         if not line:
             return
@@ -445,6 +679,186 @@ def _check_for_pattern(pattern, line, log_func=None):
         raise StopIteration
 
 
+class LineReader:
+    """Chunked line reader.
+
+    A callable similar to a coroutine ``readline()`` method,
+    except that the stream is read in large chunks and decoded incrementally,
+    so that reading many short lines does not cost one read (and possibly one trip through the event loop) per line.
+    Returns an empty string at the end of the stream, so it can be used as a feed for |monitor_feed|.
+
+    Parameters
+    ----------
+    stream : |asyncio.StreamReader|
+        Any object with a coroutine ``read(n)`` method returning bytes.
+    chunk_size : int, optional
+        The maximum number of bytes to read at once.
+        Defaults to 65536.
+    encoding : str, optional
+        Defaults to ``'utf-8'``.
+        Undecodable bytes are replaced rather than raising an error.
+
+    Attributes
+    ----------
+    n_lines : int
+        Number of lines returned so far.
+    n_chunks : int
+        Number of chunks read so far.
+
+    """
+    def __init__(self, stream, chunk_size=65536, encoding='utf-8'):
+        self._stream = stream
+        self.chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self._lines = deque()
+        self._partial = ''
+        self._eof = False
+        self.n_lines = 0
+        self.n_chunks = 0
+
+    @asyncio.coroutine
+    def __call__(self):
+        while not self._lines:
+            if self._eof:
+                return ''
+            chunk = yield from self._stream.read(self.chunk_size)
+            self.n_chunks += 1
+            if chunk:
+                self._split(self._decoder.decode(chunk))
+            else:
+                self._eof = True
+                self._split(self._decoder.decode(b'', final=True))
+                if self._partial:
+                    self._lines.append(self._partial)
+                    self._partial = ''
+
+        self.n_lines += 1
+        return self._lines.popleft()
+
+    def _split(self, text):
+        lines = (self._partial + text).split('\n')
+        # The last item is an incomplete line (or empty, if the text ended with a newline).
+        self._partial = lines.pop()
+        self._lines.extend(line + '\n' for line in lines)
+
+
+class ThrottledLog:
+    """Rate-limited logging function.
+
+    A monitor for |monitor_feed| that logs at most `max_rate` lines per second.
+    Lines beyond that are counted, and a summary is logged when the interval ends
+    (or when |ThrottledLog.flush| is called).
+    Consecutive identical lines are also coalesced into a single summary.
+    Summaries count against `max_rate` like any other line.
+    Every line is appended to `buffer`, if given, whether or not it is logged.
+
+    Parameters
+    ----------
+    log_func : func
+        Logging function taking a single message argument.
+    max_rate : float, optional
+        Maximum number of lines to log per second.
+        Defaults to 100.
+    buffer : |collections.deque|, optional
+        Buffer (usually with a ``maxlen``) to keep recent lines in.
+    loop : |asyncio.BaseEventLoop|, optional
+        Event loop used to log pending summaries at the end of each interval.
+        Defaults to the current event loop.
+
+    Attributes
+    ----------
+    n_lines : int
+        Number of lines received.
+    n_suppressed : int
+        Total number of lines not logged.
+
+    """
+    def __init__(self, log_func, max_rate=100, buffer=None, loop=None):
+        self.log_func = log_func
+        self.max_rate = max_rate
+        self.buffer = buffer
+        self.loop = loop
+
+        self.n_lines = 0
+        self.n_suppressed = 0
+
+        self._interval_start = float('-inf')
+        self._logged_in_interval = 0
+        self._suppressed_in_interval = 0
+        self._last_line = None
+        self._repeats = 0
+        self._flush_handle = None
+
+    def __call__(self, line):
+        self.n_lines += 1
+        if self.buffer is not None:
+            self.buffer.append(line)
+
+        if line == self._last_line:
+            self._repeats += 1
+            self.n_suppressed += 1
+            self._schedule_flush()
+            return
+        self._flush_repeats()
+        self._last_line = line
+
+        if not self._log(line):
+            self._suppressed_in_interval += 1
+            self.n_suppressed += 1
+
+    def flush(self):
+        """Log summaries of any lines suppressed so far."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._flush_repeats()
+        self._flush_suppressed()
+
+    def _log(self, message):
+        now = monotonic()
+        if now - self._interval_start >= 1:
+            self._interval_start = now
+            self._logged_in_interval = 0
+            self._flush_suppressed()
+
+        if self._logged_in_interval < self.max_rate:
+            self._logged_in_interval += 1
+            self.log_func(message)
+            return True
+        self._schedule_flush()
+        return False
+
+    def _flush_repeats(self):
+        if self._repeats:
+            if not self._log('(previous line repeated {} more times)'.format(self._repeats)):
+                self._suppressed_in_interval += self._repeats
+            self._repeats = 0
+
+    def _flush_suppressed(self):
+        if self._suppressed_in_interval:
+            self._logged_in_interval += 1
+            self.log_func('(suppressed {} lines; see Server.recent_output)'.format(self._suppressed_in_interval))
+            self._suppressed_in_interval = 0
+
+    def _schedule_flush(self):
+        if self._flush_handle is None:
+            loop = self.loop or asyncio.get_event_loop()
+            delay = max(0, self._interval_start + 1 - monotonic())
+            self._flush_handle = loop.call_later(delay, self._end_interval)
+
+    def _end_interval(self):
+        self._flush_handle = None
+        now = monotonic()
+        if now - self._interval_start >= 1:
+            self._interval_start = now
+            self._logged_in_interval = 0
+            self._flush_suppressed()
+        self._flush_repeats()
+        if self._suppressed_in_interval:
+            # Woken up early, or the repeat summary was over the limit.
+            self._schedule_flush()
+
+
 def decoded_readline(stream):
     """
     Get a function similar to the ``readline()`` method, except that bytes are decoded.
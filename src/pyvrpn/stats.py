@@ -0,0 +1,223 @@
+"""
+Rolling statistics of sensor data, kept incrementally in arrays across sensors.
+
+"""
+import warnings
+
+import numpy as np
+
+from pyvrpn.gaps import _to_seconds
+from pyvrpn.logging import setup_module_logging
+
+__all__ = [
+    'RollingStats',
+]
+
+error, warning, info, debug = setup_module_logging(__name__)
+
+
+class RollingStats:
+    """Rolling statistics over the last `window` samples of each sensor.
+
+    A handler (attach it with |RollingStats.attach|) keeping, for every sensor,
+    the mean and variance of a field (by default ``'position'``) over a sliding window of samples,
+    along with the velocity and speed over the window.
+    The mean and variance are updated in constant time per sample with a windowed version of Welford's algorithm:
+    the sample leaving the window is taken from a ring buffer and its contribution removed.
+    Minimum and maximum are computed from the ring buffer when requested, so they cost nothing per sample.
+    The velocity is the change between the oldest and newest samples in the window divided by the time between them,
+    so that measurement jitter is averaged out over the window rather than amplified between consecutive samples.
+
+    All statistics are arrays with one row per sensor, e.g. ``stats.mean[2]`` is the mean position of sensor 2,
+    so checks across all sensors are single array operations::
+
+        stats = RollingStats(window=60)
+        stats.attach(tracker)
+        ...
+        if stats.is_still(0.002).all():
+            start_trial()
+
+    Parameters
+    ----------
+    window : int, optional
+        Number of samples in the window.
+        Defaults to 100.
+    field : str, optional
+        The field of the data to summarize.
+        Defaults to ``'position'``.
+    n_dims : int, optional
+        Number of values in the field.
+        Defaults to 3.
+    key : str, optional
+        The key in the data giving the sensor number.
+        Defaults to ``'sensor'``.
+    n_sensors : int, optional
+        The initial number of sensors; more are added as samples from them arrive.
+        Defaults to 1.
+
+    Attributes
+    ----------
+    window : int
+    field : str
+    key : str
+    count : |numpy.ndarray|
+        Number of samples in each sensor's window, shape ``(n_sensors,)``.
+    mean : |numpy.ndarray|
+        Shape ``(n_sensors, n_dims)``.
+    variance : |numpy.ndarray|
+        Sample variance over the window, shape ``(n_sensors, n_dims)``.
+    std : |numpy.ndarray|
+        Standard deviation over the window, shape ``(n_sensors, n_dims)``.
+    min : |numpy.ndarray|
+    max : |numpy.ndarray|
+        Shape ``(n_sensors, n_dims)``; NaN for sensors without data.
+    velocity : |numpy.ndarray|
+        Change per second across the window, shape ``(n_sensors, n_dims)``.
+    speed : |numpy.ndarray|
+        Magnitude of |velocity|, shape ``(n_sensors,)``.
+
+    """
+    def __init__(self, window=100, field='position', n_dims=3, key='sensor', n_sensors=1):
+        if window < 2:
+            raise ValueError('window must be at least 2, not {!r}'.format(window))
+        self.window = window
+        self.field = field
+        self.key = key
+
+        self._buffer = np.full((n_sensors, window, n_dims), np.nan)
+        self._times = np.zeros((n_sensors, window))
+        self._next = np.zeros(n_sensors, dtype=int)
+        self.count = np.zeros(n_sensors, dtype=int)
+        self.mean = np.zeros((n_sensors, n_dims))
+        self._m2 = np.zeros((n_sensors, n_dims))
+        self.velocity = np.zeros((n_sensors, n_dims))
+        self.speed = np.zeros(n_sensors)
+
+    @property
+    def n_sensors(self):
+        return len(self.count)
+
+    @property
+    def variance(self):
+        # Removing samples can leave tiny negative rounding errors.
+        return np.maximum(self._m2, 0) / np.maximum(self.count - 1, 1)[:, np.newaxis]
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def min(self):
+        with warnings.catch_warnings():
+            # Sensors without data are all NaN.
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanmin(self._buffer, axis=1)
+
+    @property
+    def max(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanmax(self._buffer, axis=1)
+
+    def is_still(self, max_std):
+        """
+        Check which sensors are still: their window is full,
+        and the magnitude of their standard deviation is below `max_std`.
+
+        Parameters
+        ----------
+        max_std : float
+
+        Returns
+        -------
+        |numpy.ndarray| of bool
+            Shape ``(n_sensors,)``.
+
+        """
+        return (self.count == self.window) & (np.sqrt(np.sum(self.variance, axis=1)) < max_std)
+
+    def attach(self, source):
+        """
+        Subscribe to a receiver or sensor.
+
+        Parameters
+        ----------
+        source : |Subscribable|
+
+        Returns
+        -------
+        |Subscription|
+
+        """
+        self._grow(getattr(source, 'n_sensors', 0))
+        return source.subscribe(self)
+
+    def reset(self, sensor=None):
+        """Empty the window of one sensor, or of all sensors."""
+        rows = slice(None) if sensor is None else sensor
+        self._buffer[rows] = np.nan
+        self._times[rows] = 0
+        self._next[rows] = 0
+        self.count[rows] = 0
+        self.mean[rows] = 0
+        self._m2[rows] = 0
+        self.velocity[rows] = 0
+        self.speed[rows] = 0
+
+    def __call__(self, data):
+        sensor = data.get(self.key, 0)
+        if sensor >= len(self.count):
+            self._grow(sensor + 1)
+
+        value = np.asarray(data[self.field], dtype=float)
+        time = data.get('time')
+        if time is not None and type(time) is not float:
+            time = _to_seconds(time)
+
+        window = self.window
+        buffer = self._buffer[sensor]
+        mean = self.mean[sensor]
+        ix = self._next[sensor]
+        count = self.count[sensor]
+
+        if count < window:
+            count += 1
+            self.count[sensor] = count
+            delta = value - mean
+            mean += delta / count
+            self._m2[sensor] += delta * (value - mean)
+        else:
+            old = buffer[ix]
+            new_mean = mean + (value - old) / window
+            self._m2[sensor] += (value - old) * (value - new_mean + old - mean)
+            mean[:] = new_mean
+
+        buffer[ix] = value
+        next_ix = ix + 1 if ix + 1 < window else 0
+        self._next[sensor] = next_ix
+        if time is None:
+            return
+        times = self._times[sensor]
+        times[ix] = time
+
+        # Until the window is full, the oldest sample is the first one.
+        oldest = next_ix if count == window else 0
+        elapsed = time - times[oldest]
+        if count > 1 and elapsed > 0:
+            velocity = (value - buffer[oldest]) / elapsed
+            self.velocity[sensor] = velocity
+            self.speed[sensor] = np.sqrt(velocity.dot(velocity))
+
+    def _grow(self, n_sensors):
+        n_extra = n_sensors - len(self.count)
+        if n_extra <= 0:
+            return
+        window, n_dims = self._buffer.shape[1:]
+        self._buffer = np.concatenate([self._buffer, np.full((n_extra, window, n_dims), np.nan)])
+        self._times = np.concatenate([self._times, np.zeros((n_extra, window))])
+        self._next = np.concatenate([self._next, np.zeros(n_extra, dtype=int)])
+        self.count = np.concatenate([self.count, np.zeros(n_extra, dtype=int)])
+        self.mean = np.concatenate([self.mean, np.zeros((n_extra, n_dims))])
+        self._m2 = np.concatenate([self._m2, np.zeros((n_extra, n_dims))])
+        self.velocity = np.concatenate([self.velocity, np.zeros((n_extra, n_dims))])
+        self.speed = np.concatenate([self.speed, np.zeros(n_extra)])
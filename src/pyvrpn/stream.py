@@ -0,0 +1,151 @@
+import asyncio
+from collections import deque
+
+__all__ = [
+    'SampleStream',
+    'StreamClosed',
+]
+
+POLICIES = ('drop_oldest', 'drop_newest')
+
+
+class StreamClosed(Exception):
+    """Raised by |SampleStream.get| when the stream has been closed and all buffered samples consumed."""
+    pass
+
+
+class SampleStream:
+    """Asynchronous stream of samples.
+
+    A bounded buffer filled synchronously by a receive callback and drained by coroutines.
+    Usually created by |Subscribable.stream|, and consumed with ``async for``::
+
+        async for sample in receiver.stream(maxsize=64):
+            ...
+
+    or, in a |coroutine|::
+
+        stream = receiver.stream(maxsize=64)
+        while True:
+            sample = yield from stream.get()
+
+    When the buffer is full, samples are discarded rather than blocking the receive loop.
+    Samples must be pushed from the thread running the event loop (as |LocalServer| does).
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of buffered samples.
+        Defaults to 256.
+    policy : {'drop_oldest', 'drop_newest'}, optional
+        Which sample to discard when the buffer is full.
+        Defaults to ``'drop_oldest'``, so that consumers always catch up to the latest data.
+    batch : int, optional
+        If given, each iteration yields a list of up to this many samples (whatever is buffered),
+        instead of a single sample.
+    loop : |asyncio.EventLoop|, optional
+        The event loop to schedule tasks with.
+
+    Attributes
+    ----------
+    maxsize : int
+    policy : str
+    batch : int or None
+    loop : |asyncio.EventLoop|
+    n_received : int
+        Number of samples pushed into the stream.
+    n_dropped : int
+        Number of samples discarded because the buffer was full.
+    pending : int
+        Number of samples currently buffered.
+    closed : bool
+    source : |Subscribable| or None
+        The object this stream is subscribed to, if created by |Subscribable.stream|.
+    subscription : |Subscription| or None
+
+    """
+    def __init__(self, maxsize=256, policy='drop_oldest', batch=None, loop=None):
+        if policy not in POLICIES:
+            raise ValueError('policy must be one of {}, not {!r}'.format(POLICIES, policy))
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.batch = batch
+        self.loop = loop
+
+        self.n_received = 0
+        self.n_dropped = 0
+        self.closed = False
+        self.source = None
+        self.subscription = None
+
+        self._buffer = deque()
+        self._waiter = None
+
+    @property
+    def pending(self):
+        return len(self._buffer)
+
+    def __call__(self, data):
+        if self.closed:
+            return
+        self.n_received += 1
+
+        if len(self._buffer) >= self.maxsize:
+            self.n_dropped += 1
+            if self.policy == 'drop_newest':
+                return
+            self._buffer.popleft()
+
+        self._buffer.append(data)
+        self._wake()
+
+    @asyncio.coroutine
+    def get(self):
+        """
+        Get the next sample, or the next batch of samples if |batch| is set.
+        Waits until at least one sample is available.
+
+        This method is a |coroutine|.
+
+        Raises
+        ------
+        |StreamClosed|
+            If the stream is closed and no samples are left.
+
+        """
+        while not self._buffer:
+            if self.closed:
+                raise StreamClosed
+            self._waiter = asyncio.Future(loop=self.loop)
+            try:
+                yield from self._waiter
+            finally:
+                self._waiter = None
+
+        if self.batch:
+            return [self._buffer.popleft() for _ in range(min(self.batch, len(self._buffer)))]
+        return self._buffer.popleft()
+
+    def close(self):
+        """Stop receiving samples. Iteration ends once the buffered samples have been consumed."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.source is not None:
+            self.source.unsubscribe(self.subscription)
+        self._wake()
+
+    def _wake(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def __aiter__(self):
+        return self
+
+    @asyncio.coroutine
+    def __anext__(self):
+        try:
+            return (yield from self.get())
+        except StreamClosed:
+            raise StopAsyncIteration
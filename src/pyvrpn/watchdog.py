@@ -0,0 +1,158 @@
+import asyncio
+from time import perf_counter
+
+from pyvrpn.logging import setup_module_logging
+
+__all__ = [
+    'Watchdog',
+]
+
+error, warning, info, debug = setup_module_logging(__name__)
+
+
+class Watchdog:
+    """Connection watchdog.
+
+    Periodically checks that each connected |Receiver| is still producing data,
+    and reconnects it (with |Receiver.reconnect|, keeping its handlers) if it has stalled.
+    A device is stalled if no data has arrived for `stall_periods` sample periods,
+    with the sample period taken from |Receiver.expected_rate|,
+    or for longer than its timeout in |Watchdog.timeouts|, if it has one.
+    Other devices are not checked:
+    buttons, dials and analogs that report only on change can legitimately be silent for any length of time.
+    With `infer_rates`, devices without an expected rate or timeout are checked using the highest rate observed so far.
+    Only use it when all devices report continuously: otherwise, after one burst of data,
+    a device that goes quiet is reconnected every few periods of that burst for as long as it stays quiet.
+
+    The receivers only count samples and timestamp their |Receiver.mainloop| calls,
+    so watching costs nothing per sample beyond an integer increment.
+
+    Pass an instance to |LocalServer| to use it::
+
+        server = LocalServer(devices, watchdog=Watchdog(stall_periods=5))
+
+    Devices are not checked while the server is not running (e.g. while a supervised server restarts):
+    they are silent because the server is down, and reconnecting them cannot help.
+
+    Parameters
+    ----------
+    stall_periods : float, optional
+        Number of missing sample periods after which a device is considered stalled.
+        Defaults to 5.
+    interval : float, optional
+        Number of seconds between checks.
+        Defaults to 0.1.
+    min_timeout : float, optional
+        Minimum number of seconds without data before a device is considered stalled,
+        regardless of its rate.
+        Defaults to 0.05.
+    timeouts : dict of str to float, optional
+        Number of seconds without data before a device is considered stalled, by device |Receiver.uuid|,
+        overriding its expected rate.
+    infer_rates : bool, optional
+        If True, check devices without an expected rate or timeout using the observed rate.
+        Defaults to False.
+
+    Attributes
+    ----------
+    stall_periods : float
+    interval : float
+    min_timeout : float
+    timeouts : dict of str to float
+    infer_rates : bool
+    n_stalls : dict of str to int
+        Number of stalls detected, by device |Receiver.uuid|.
+    observed_rates : dict of str to float
+        Highest sample rate observed between two checks, by device |Receiver.uuid|.
+
+    """
+    def __init__(self, stall_periods=5, interval=0.1, min_timeout=0.05, timeouts=None, infer_rates=False):
+        self.stall_periods = stall_periods
+        self.interval = interval
+        self.min_timeout = min_timeout
+        self.timeouts = dict(timeouts or {})
+        self.infer_rates = infer_rates
+
+        self.n_stalls = {}
+        self.observed_rates = {}
+        self._last_counts = {}
+
+    @asyncio.coroutine
+    def run(self, devices, loop=None, server=None):
+        """
+        Check `devices` every |interval| seconds, forever.
+
+        This method is a |coroutine|.
+
+        Parameters
+        ----------
+        devices : sequence of |Receiver|
+        loop : |asyncio.EventLoop|, optional
+        server : |Server|, optional
+            The server the devices are connected to.
+
+        """
+        while True:
+            yield from asyncio.sleep(self.interval, loop=loop)
+            self.check(devices, server=server)
+
+    def check(self, devices, now=None, server=None):
+        """
+        Check `devices` once, reconnecting any that have stalled.
+
+        Parameters
+        ----------
+        devices : sequence of |Receiver|
+        now : float, optional
+            The current |time.perf_counter| value.
+        server : |Server|, optional
+            The server the devices are connected to.
+            If given, nothing is checked unless it is running.
+
+        Returns
+        -------
+        list of |Receiver|
+            The devices that were reconnected.
+
+        """
+        if server is not None and not server.is_running:
+            return []
+        if now is None:
+            now = perf_counter()
+
+        stalled = []
+        for device in devices:
+            if not device.is_connected:
+                continue
+            self._observe_rate(device, now)
+
+            timeout = self.timeouts.get(device.uuid)
+            if timeout is None:
+                rate = device.expected_rate
+                if not rate and self.infer_rates:
+                    rate = self.observed_rates.get(device.uuid)
+                if not rate:
+                    continue
+                timeout = max(self.stall_periods / rate, self.min_timeout)
+
+            silent_for = now - device.last_sample_at
+            if silent_for > timeout:
+                warning('{} stalled: no data for {:.3f} s (timeout {:.3f} s); reconnecting'.format(
+                    device, silent_for, timeout))
+                self.n_stalls[device.uuid] = self.n_stalls.get(device.uuid, 0) + 1
+                device.reconnect()
+                stalled.append(device)
+
+        return stalled
+
+    def _observe_rate(self, device, now):
+        last = self._last_counts.get(device.uuid)
+        self._last_counts[device.uuid] = (device.n_samples, now)
+        if last is None:
+            return
+
+        last_count, last_time = last
+        if device.n_samples > last_count and now > last_time:
+            rate = (device.n_samples - last_count) / (now - last_time)
+            if rate > self.observed_rates.get(device.uuid, 0):
+                self.observed_rates[device.uuid] = rate
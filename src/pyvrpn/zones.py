@@ -0,0 +1,239 @@
+"""
+Spatial trigger zones, checked for all sensors and all zones at once with NumPy.
+
+"""
+import numpy as np
+import pyglet
+
+from pyvrpn.logging import setup_module_logging
+
+__all__ = [
+    'ZoneSet',
+]
+
+error, warning, info, debug = setup_module_logging(__name__)
+
+
+class ZoneSet(pyglet.event.EventDispatcher):
+    """Spatial trigger zones.
+
+    A |pyglet.event.EventDispatcher| that dispatches ``'on_enter'`` and ``'on_exit'`` events
+    when tracker sensors enter or leave boxes or spheres,
+    or when two sensors come within some distance of each other (a proximity zone).
+    Handlers take two arguments, the zone name and the sensor number
+    (for proximity zones, a tuple of the two sensor numbers).
+
+    Attach it to a tracker with |ZoneSet.attach|.
+    Each sample then only stores its position;
+    the zones are checked once per |Receiver.mainloop| batch (see |Receiver.add_batch_listener|),
+    for all sensors against all zones in a few NumPy operations,
+    so the cost per batch grows very slowly with the number of zones.
+    Events are dispatched only for the (sensor, zone) pairs whose state changed.
+
+    A sensor enters a zone when it is inside it,
+    but exits only when it is more than `hysteresis` outside it (beyond the faces of a box, or the radius of a sphere),
+    so that noise near a boundary does not produce a stream of events.
+    For proximity zones, the pair exits when the sensors are more than ``distance + hysteresis`` apart.
+
+    Parameters
+    ----------
+    hysteresis : float, optional
+        Defaults to 0.
+    n_sensors : int, optional
+        The initial number of sensors; more are added as samples from them arrive.
+        Defaults to 1.
+
+    Attributes
+    ----------
+    hysteresis : float
+    positions : |numpy.ndarray|
+        The latest position of each sensor (NaN until received), shape ``(n_sensors, 3)``.
+    zones : list of str
+        The zone names, in the order they were added.
+    n_checks : int
+        Number of times the zones have been checked.
+
+    """
+    def __init__(self, hysteresis=0.0, n_sensors=1):
+        self.hysteresis = hysteresis
+        self.positions = np.full((n_sensors, 3), np.nan)
+        self.zones = []
+        self.n_checks = 0
+        self._dirty = False
+
+        self._box_names = []
+        self._box_low = np.empty((0, 3))
+        self._box_high = np.empty((0, 3))
+        self._sphere_names = []
+        self._sphere_centers = np.empty((0, 3))
+        self._sphere_radii = np.empty(0)
+        self._pair_names = []
+        self._pairs = np.empty((0, 2), dtype=int)
+        self._pair_distances = np.empty(0)
+        self._reset_states()
+
+    def add_box(self, name, low, high):
+        """
+        Add an axis-aligned box.
+
+        Parameters
+        ----------
+        name : str
+        low, high : sequence of float
+            Opposite corners, each with the lowest and highest coordinates respectively.
+
+        """
+        self._add_name(name)
+        self._box_names.append(name)
+        self._box_low = np.vstack([self._box_low, low])
+        self._box_high = np.vstack([self._box_high, high])
+        self._reset_states()
+
+    def add_sphere(self, name, center, radius):
+        """
+        Add a sphere.
+
+        Parameters
+        ----------
+        name : str
+        center : sequence of float
+        radius : float
+
+        """
+        self._add_name(name)
+        self._sphere_names.append(name)
+        self._sphere_centers = np.vstack([self._sphere_centers, center])
+        self._sphere_radii = np.append(self._sphere_radii, radius)
+        self._reset_states()
+
+    def add_proximity(self, name, sensor_a, sensor_b, distance):
+        """
+        Add a proximity zone, which two sensors are in while they are within `distance` of each other.
+
+        Parameters
+        ----------
+        name : str
+        sensor_a, sensor_b : int
+        distance : float
+
+        """
+        self._add_name(name)
+        self._pair_names.append(name)
+        self._pairs = np.vstack([self._pairs, [sensor_a, sensor_b]])
+        self._pair_distances = np.append(self._pair_distances, distance)
+        self._reset_states()
+        self._grow(max(sensor_a, sensor_b) + 1)
+
+    def attach(self, receiver):
+        """
+        Check the zones against the data from a tracker, once per batch.
+
+        Parameters
+        ----------
+        receiver : |Receiver|
+
+        Returns
+        -------
+        |Subscription|
+            The subscription storing positions.
+
+        """
+        self._grow(receiver.n_sensors)
+        subscription = receiver.subscribe(self.update)
+        receiver.add_batch_listener(self.check)
+        return subscription
+
+    def occupants(self, name):
+        """
+        Get the sensors currently in a zone.
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        list of int, or bool for proximity zones
+
+        """
+        if name in self._pair_names:
+            return bool(self._pair_state[self._pair_names.index(name)])
+        if name in self._box_names:
+            column = self._box_state[:, self._box_names.index(name)]
+        else:
+            column = self._sphere_state[:, self._sphere_names.index(name)]
+        return np.flatnonzero(column).tolist()
+
+    def update(self, data):
+        """Store the position from a sample; zones are not checked until |ZoneSet.check|."""
+        sensor = data.get('sensor', 0)
+        if sensor >= len(self.positions):
+            self._grow(sensor + 1)
+        self.positions[sensor] = data['position']
+        self._dirty = True
+
+    def check(self):
+        """Check all sensors against all zones, if any position has changed, and dispatch events."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        self.n_checks += 1
+        positions = self.positions[:, np.newaxis, :]
+        hysteresis = self.hysteresis
+
+        if self._box_names:
+            inside = np.all((positions >= self._box_low) & (positions <= self._box_high), axis=2)
+            near = np.all((positions >= self._box_low - hysteresis) & (positions <= self._box_high + hysteresis),
+                          axis=2)
+            self._box_state = self._transition(self._box_state, inside, near, self._box_names)
+
+        if self._sphere_names:
+            distances = np.sqrt(np.sum((positions - self._sphere_centers) ** 2, axis=2))
+            inside = distances <= self._sphere_radii
+            near = distances <= self._sphere_radii + hysteresis
+            self._sphere_state = self._transition(self._sphere_state, inside, near, self._sphere_names)
+
+        if self._pair_names:
+            differences = self.positions[self._pairs[:, 0]] - self.positions[self._pairs[:, 1]]
+            distances = np.sqrt(np.sum(differences ** 2, axis=1))
+            inside = distances <= self._pair_distances
+            near = distances <= self._pair_distances + hysteresis
+            self._pair_state = self._transition(self._pair_state, inside, near, self._pair_names)
+
+    def _transition(self, state, inside, near, names):
+        new_state = inside | (state & near)
+        changed = new_state != state
+        if changed.any():
+            for ix in zip(*np.nonzero(changed)):
+                if state.ndim == 1:
+                    # Proximity zones: one state per pair.
+                    zone = ix[0]
+                    sensor = tuple(self._pairs[zone].tolist())
+                else:
+                    sensor, zone = int(ix[0]), ix[1]
+                self.dispatch_event('on_enter' if new_state[ix] else 'on_exit', names[zone], sensor)
+        return new_state
+
+    def _add_name(self, name):
+        if name in self.zones:
+            raise ValueError('there is already a zone named {!r}'.format(name))
+        self.zones.append(name)
+
+    def _grow(self, n_sensors):
+        n_extra = n_sensors - len(self.positions)
+        if n_extra > 0:
+            self.positions = np.vstack([self.positions, np.full((n_extra, 3), np.nan)])
+            self._box_state = np.vstack([self._box_state, np.zeros((n_extra, len(self._box_names)), dtype=bool)])
+            self._sphere_state = np.vstack([
+                self._sphere_state, np.zeros((n_extra, len(self._sphere_names)), dtype=bool)])
+
+    def _reset_states(self):
+        # Changing zones forgets who is where; sensors already inside will enter again.
+        n_sensors = len(self.positions)
+        self._box_state = np.zeros((n_sensors, len(self._box_names)), dtype=bool)
+        self._sphere_state = np.zeros((n_sensors, len(self._sphere_names)), dtype=bool)
+        self._pair_state = np.zeros(len(self._pair_names), dtype=bool)
+
+
+ZoneSet.register_event_type('on_enter')
+ZoneSet.register_event_type('on_exit')
@@ -0,0 +1,100 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from pyvrpn.analog import ArrayAnalog, USDigitalA2, DataGlove5DTUSB
+
+
+def connected(device):
+    device.object_class = MagicMock()
+    device.connect()
+    return device
+
+
+def feed(device, frames, start=0):
+    def batch():
+        for ix, channels in enumerate(frames):
+            device._callback('', {'channel': list(channels), 'time': (start + ix) / 1000})
+    device._object.mainloop.side_effect = batch
+    device.mainloop()
+
+
+def test_devices():
+    encoders = USDigitalA2(0, 2)
+    assert encoders.config_text.split()[2:] == ['0', '2', '0']
+    assert encoders.values.shape == (4096, 2)
+    glove = DataGlove5DTUSB(14, 'left', capacity=100)
+    assert glove.device_type == 'vrpn_Analog_5dtUSB_Glove14Left'
+    assert glove.config_text.split() == ['vrpn_Analog_5dtUSB_Glove14Left', glove.uuid]
+    assert glove.values.shape == (100, 14)
+    with pytest.raises(ValueError):
+        DataGlove5DTUSB(6)
+
+
+def test_batches():
+    glove = connected(DataGlove5DTUSB(capacity=100))
+    batches = []
+    glove.subscribe_batches(lambda times, values: batches.append((times.copy(), values.copy())))
+    frames = np.arange(50, dtype=float).reshape(10, 5)
+
+    feed(glove, frames)
+    assert len(batches) == glove.n_batches == 1
+    times, values = batches[0]
+    assert times == pytest.approx(np.arange(10) / 1000)
+    assert values.tolist() == frames.tolist()
+    assert glove.latest.tolist() == frames[-1].tolist()
+    assert glove.n_buffered == 0
+    assert glove.n_samples == 10
+
+    # No data, no batch.
+    glove._object.mainloop.side_effect = None
+    glove.mainloop()
+    assert glove.n_batches == 1
+
+
+def test_overflow():
+    glove = connected(DataGlove5DTUSB(capacity=4))
+    sizes = []
+    glove.subscribe_batches(lambda times, values: sizes.append(len(values)))
+    feed(glove, np.ones((10, 5)))
+    assert sizes == [4, 4, 2]
+    assert glove.n_overflows == 2
+
+
+def test_per_sample_dispatch_only_when_active():
+    glove = connected(DataGlove5DTUSB())
+    glove._dispatch = MagicMock(wraps=glove._dispatch)
+    feed(glove, np.zeros((3, 5)))
+    assert not glove._dispatch.called
+
+    received = []
+    glove.subscribe(received.append)
+    feed(glove, np.zeros((3, 5)))
+    assert len(received) == 3
+    assert received[0]['channel'] == [0.0] * 5
+
+
+class ExampleAnalog(ArrayAnalog):
+    device_type = 'vrpn_Analog_Example'
+
+
+def test_unknown_channel_count():
+    device = ExampleAnalog(capacity=8)
+    assert device.n_channels is None
+    device._callback('', {'channel': [1.0, 2.0, 3.0], 'time': datetime.fromtimestamp(1)})
+    assert device.n_channels == 3
+    assert device.values.shape == (8, 3)
+    assert device.times[0] == 1.0
+
+
+def test_unsubscribe_batches():
+    glove = connected(DataGlove5DTUSB())
+    handler = MagicMock()
+    glove.subscribe_batches(handler)
+    glove.unsubscribe_batches(handler)
+    feed(glove, np.zeros((3, 5)))
+    assert not handler.called
+    with pytest.raises(ValueError):
+        glove.unsubscribe_batches(handler)
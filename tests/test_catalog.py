@@ -0,0 +1,49 @@
+import pytest
+
+from pyvrpn import catalog, receiver
+
+
+def test_device_types():
+    device_types = catalog.device_types()
+    assert len(device_types) > 100
+    assert catalog.device_types() is device_types
+
+    null = catalog.get_device_type('vrpn_Tracker_NULL')
+    assert [argument.name for argument in null.arguments] == ['number_of_sensors', 'rate_at_which_to_report_updates']
+    assert [argument.type for argument in null.arguments] == ['int', 'float']
+    assert null.examples == (('2', '2.0'),)
+    assert 'NULL Tracker' in null.description
+
+    latus = catalog.get_device_type('vrpn_Tracker_LibertyHS')
+    assert latus.n_required_arguments == 2
+    assert latus.arguments[-1].optional
+
+    with pytest.raises(KeyError):
+        catalog.get_device_type('vrpn_Tracker_Imaginary')
+
+
+def test_validate():
+    dial = catalog.get_device_type('vrpn_Dial_Example')
+    dial.validate((2, 2.0, 10.0))
+    dial.validate(('2', '2.0', '10.0'))
+    with pytest.raises(ValueError):
+        dial.validate((2, 2.0))
+    with pytest.raises(ValueError):
+        dial.validate(('two', 2.0, 10.0))
+
+
+def test_receiver_class():
+    cls = catalog.receiver_class('vrpn_Tracker_NULL')
+    assert catalog.receiver_class('vrpn_Tracker_NULL') is cls
+    assert cls.__name__ == 'TrackerNULL'
+    assert issubclass(cls, receiver.Tracker)
+    assert issubclass(cls, receiver.FirstArgumentIsNSensors)
+    assert cls.catalog_entry is catalog.get_device_type('vrpn_Tracker_NULL')
+    assert 'number_of_sensors : int' in cls.__doc__
+
+    tracker = cls(3, 60.0)
+    assert len(tracker) == 3
+    assert tracker.config_text.split()[0] == 'vrpn_Tracker_NULL'
+
+    assert issubclass(catalog.receiver_class('vrpn_Button_Example'), receiver.Button)
+    assert issubclass(catalog.receiver_class('vrpn_Analog_USDigital_A2'), receiver.Analog)
@@ -0,0 +1,70 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pyglet
+
+from pyvrpn import receiver
+from pyvrpn.clock import DevicePump
+
+
+class Time:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def connected_button(rate):
+    button = receiver.TestButton(1, rate)
+    button.object_class = MagicMock()
+    button.connect()
+    return button
+
+
+def test_pump_at_device_rate():
+    time = Time()
+    clock = pyglet.clock.Clock(time_function=time)
+    fast, slow = connected_button(100.0), connected_button(10.0)
+    pump = DevicePump([fast, slow], clock=clock)
+    assert pump.rate == 100.0
+    pump.start()
+    for _ in range(10):
+        time.now += 0.01
+        clock.tick()
+    assert pump.n_calls == 10
+    assert fast._object.mainloop.call_count == 10
+    assert slow._object.mainloop.call_count == 10
+    pump.stop()
+    time.now += 0.01
+    clock.tick()
+    assert pump.n_calls == 10
+
+
+def test_pump_every_frame():
+    time = Time()
+    clock = pyglet.clock.Clock(time_function=time)
+    button = receiver.TestButton(1, 100.0)
+    pump = DevicePump([button], rate=0, clock=clock)
+    pump.start()
+    time.now += 1
+    clock.tick()
+    time.now += 1
+    clock.tick()
+    # Disconnected devices are skipped.
+    assert pump.n_calls == 2
+
+
+def test_pump_server():
+    loop = asyncio.new_event_loop()
+    server = MagicMock()
+    server.devices = [receiver.TestButton(1, 50.0)]
+    server.loop = loop
+    ran = []
+    loop.call_soon(ran.append, True)
+    pump = DevicePump(server, clock=pyglet.clock.Clock())
+    assert pump.rate == 50.0
+    pump()
+    assert server.poll.call_count == 1
+    assert ran == [True]
+    loop.close()
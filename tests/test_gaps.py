@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from pyvrpn.gaps import GapDetector, Gap
+
+
+def feed(detector, times, sensor=0):
+    for time in times:
+        detector({'sensor': sensor, 'time': time})
+
+
+def test_expected_rate():
+    detector = GapDetector(expected_rate=100)
+    gaps = []
+    detector.add_listener(gaps.append)
+    feed(detector, [0.0, 0.01, 0.02, 0.05, 0.06])
+    assert detector.n_samples == 5
+    assert detector.n_gaps == 1
+    assert detector.n_dropped == 2
+    assert gaps == [Gap(0, 3, 0.02, 0.05, 2)]
+    assert list(detector.recent) == gaps
+    assert gaps[0].duration == pytest.approx(0.03)
+
+
+def test_inferred_rate():
+    detector = GapDetector(warmup=5)
+    # Slightly jittery 100 Hz.
+    times = [ix * 0.01 + (0.001 if ix % 2 else 0) for ix in range(20)]
+    feed(detector, times)
+    assert detector.n_gaps == 0
+    assert detector.sensors[0].interval == pytest.approx(0.01, abs=0.001)
+    feed(detector, [times[-1] + 0.05])
+    assert detector.n_gaps == 1
+    assert detector.n_dropped == 4
+
+
+def test_no_gaps_during_warmup():
+    detector = GapDetector(warmup=5)
+    feed(detector, [0.0, 0.01, 0.5, 0.51])
+    assert detector.n_gaps == 0
+
+
+def test_sensors_are_independent():
+    detector = GapDetector(expected_rate=100)
+    for ix in range(10):
+        # Sensor 1 reports only every other time.
+        detector({'sensor': 0, 'time': ix * 0.01})
+        if ix % 2 == 0:
+            detector({'sensor': 1, 'time': ix * 0.01})
+    assert detector.sensors[0].n_gaps == 0
+    assert detector.sensors[1].n_gaps == 4
+    assert detector.sensors[1].n_dropped == 4
+
+
+def test_datetimes_and_missing_key():
+    detector = GapDetector(expected_rate=10, key='channel')
+    start = datetime(2016, 1, 1)
+    for seconds in [0, 0.1, 0.2, 0.6]:
+        detector({'time': start + timedelta(seconds=seconds)})
+    assert detector.sensors[0].n_dropped == 3
+
+
+def test_repeated_timestamps():
+    detector = GapDetector(expected_rate=100)
+    feed(detector, [0.0, 0.01, 0.01, 0.02])
+    assert detector.n_gaps == 0
+    assert detector.n_samples == 4
+
+
+def test_listeners():
+    detector = GapDetector(expected_rate=100)
+    gaps = []
+    detector.add_listener(gaps.append)
+    detector.remove_listener(gaps.append)
+    with pytest.raises(ValueError):
+        detector.remove_listener(gaps.append)
+    feed(detector, [0.0, 0.1])
+    assert detector.n_gaps == 1
+    assert gaps == []
+
+
+def test_bad_tolerance():
+    with pytest.raises(ValueError):
+        GapDetector(tolerance=1)
@@ -0,0 +1,93 @@
+import asyncio
+import os
+from datetime import datetime
+from tempfile import mkdtemp
+
+import pytest
+
+from pyvrpn import receiver
+from pyvrpn.hub import Hub, HubClient
+from pyvrpn.stream import StreamClosed
+
+
+class FakeServer:
+    def __init__(self, devices):
+        self.devices = devices
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def run_hub(loop, hub, devices):
+    task = loop.create_task(hub.run(FakeServer(devices), loop=loop))
+    loop.run_until_complete(asyncio.sleep(0.01, loop=loop))
+    return task
+
+
+def stop_hub(loop, task):
+    task.cancel()
+    loop.run_until_complete(asyncio.wait([task], loop=loop))
+    # Let the client handlers see the disconnection.
+    loop.run_until_complete(asyncio.sleep(0.01, loop=loop))
+
+
+def test_publish(loop):
+    path = os.path.join(mkdtemp(), 'hub.sock')
+    tracker = receiver.TestTracker(1, 100.0)
+    hub = Hub(path)
+    task = run_hub(loop, hub, [tracker])
+
+    # Nothing is encoded without clients.
+    tracker._callback('', {'sensor': 0, 'position': (1.0, 2.0, 3.0), 'time': 0.0})
+    assert hub.n_published == 0
+
+    clients = [HubClient(path, loop=loop) for _ in range(2)]
+
+    @asyncio.coroutine
+    def receive():
+        for client in clients:
+            yield from client.connect()
+        yield from asyncio.sleep(0.01, loop=loop)
+        assert hub.n_clients == 2
+        tracker._callback('', {'sensor': 0, 'position': (1.0, 2.0, 3.0), 'time': datetime(2016, 1, 1)})
+        received = []
+        for client in clients:
+            received.append((yield from client.get()))
+        clients[0].close()
+        yield from asyncio.sleep(0.01, loop=loop)
+        return received
+
+    received = loop.run_until_complete(receive())
+    assert hub.n_published == 1
+    assert hub.n_clients == 1
+    for device, data in received:
+        assert device == tracker.uuid
+        assert data['position'] == [1.0, 2.0, 3.0]
+        assert data['time'] == datetime(2016, 1, 1).timestamp()
+
+    stop_hub(loop, task)
+    assert not tracker._subscriptions
+    assert not os.path.exists(path)
+    with pytest.raises(StreamClosed):
+        loop.run_until_complete(clients[1].get())
+
+
+def test_slow_client(loop):
+    path = os.path.join(mkdtemp(), 'hub.sock')
+    button = receiver.TestButton(1, 100.0)
+    hub = Hub(path, max_buffer_size=0)
+    task = run_hub(loop, hub, [button])
+    client = HubClient(path, loop=loop)
+    loop.run_until_complete(client.connect())
+    loop.run_until_complete(asyncio.sleep(0.01, loop=loop))
+
+    # Send a lot without letting the loop run, so the buffer cannot drain.
+    for _ in range(10000):
+        button._callback('', {'button': 0, 'state': 1, 'time': 0.0})
+    assert hub.n_disconnected == 1
+    assert hub.n_clients == 0
+    stop_hub(loop, task)
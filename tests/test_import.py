@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+import pytest
+
+import pyvrpn
+
+# Module-level __getattr__ (PEP 562) is needed for lazy imports; earlier versions import eagerly.
+lazy = pytest.mark.skipif(sys.version_info < (3, 7), reason='lazy imports need Python 3.7')
+
+
+def server_importable():
+    # pyvrpn.server uses asyncio.async, which is a syntax error from Python 3.7.
+    try:
+        import pyvrpn.server
+    except SyntaxError:
+        return False
+    return True
+
+
+def modules_imported_by(statement):
+    output = subprocess.check_output([
+        sys.executable, '-c', '{}; import sys; print(" ".join(sys.modules))'.format(statement)
+    ])
+    return set(output.decode().split())
+
+
+@lazy
+def test_import_is_lazy():
+    modules = modules_imported_by('import pyvrpn')
+    assert 'pyvrpn.server' not in modules
+    assert 'pyvrpn.receiver' not in modules
+    assert 'pyglet' not in modules
+    assert 'vrpn' not in modules
+
+
+def test_receiver_does_not_import_vrpn():
+    assert 'vrpn' not in modules_imported_by('import pyvrpn.receiver')
+
+
+@lazy
+def test_lazy_attributes():
+    if server_importable():
+        assert pyvrpn.Server is pyvrpn.server.Server
+        assert pyvrpn.LocalServer is pyvrpn.server.LocalServer
+    assert pyvrpn.Metrics is pyvrpn.metrics.Metrics
+    assert isinstance(pyvrpn.__version__, str)
+    assert 'receiver' in dir(pyvrpn)
@@ -0,0 +1,131 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from pyvrpn.markers import ArrayLibertyLatus
+
+
+def connected(n_markers, **kwargs):
+    tracker = ArrayLibertyLatus(n_markers, **kwargs)
+    tracker.object_class = MagicMock()
+    tracker.connect()
+    return tracker
+
+
+def sample(marker, z, time=0.0):
+    return {'sensor': marker, 'position': (0.0, 0.0, z), 'quaternion': (0.0, 0.0, 0.0, 1.0), 'time': time}
+
+
+def feed(tracker, samples):
+    def batch():
+        for data in samples:
+            tracker._callback('', data)
+    tracker._object.mainloop.side_effect = batch
+    tracker.mainloop()
+    tracker._object.mainloop.side_effect = None
+
+
+def test_one_callback_registered():
+    tracker = connected(16)
+    assert tracker._object.register_change_handler.call_count == 1
+    assert tracker.positions.shape == (16, 64, 3)
+    assert tracker.config_text.split()[2:] == ['16', '115200']
+
+
+def test_batches_per_marker():
+    tracker = connected(3)
+    batches = []
+    tracker.subscribe_batches(
+        lambda marker, times, positions, quaternions: batches.append((marker, times.tolist(), positions[:, 2].tolist())))
+
+    feed(tracker, [sample(0, 0.1, 0.0), sample(2, 2.1, 0.0), sample(0, 0.2, 0.01)])
+    assert sorted(batches) == [(0, [0.0, 0.01], [0.1, 0.2]), (2, [0.0], [2.1])]
+    assert tracker.n_batches == 2
+    assert tracker.n_buffered == [0, 0, 0]
+    assert tracker.latest_positions[:, 2].tolist() == [0.2, 0.0, 2.1]
+    assert tracker.latest_quaternions[0].tolist() == [0.0, 0.0, 0.0, 1.0]
+
+
+def test_overflow():
+    tracker = connected(1, capacity=4)
+    sizes = []
+    tracker.subscribe_batches(lambda marker, times, positions, quaternions: sizes.append(len(times)))
+    feed(tracker, [sample(0, float(ix)) for ix in range(10)])
+    assert sizes == [4, 4, 2]
+    assert tracker.n_overflows == 2
+
+
+def test_dispatch_only_when_active():
+    tracker = connected(2)
+    tracker._dispatch = MagicMock(wraps=tracker._dispatch)
+    feed(tracker, [sample(0, 0.0)])
+    assert not tracker._dispatch.called
+
+    received = []
+    tracker[1].subscribe(received.append)
+    feed(tracker, [sample(0, 0.0), sample(1, 1.0)])
+    assert [data['sensor'] for data in received] == [1]
+
+    everything = []
+    tracker.set_handler('on_input', everything.append)
+    feed(tracker, [sample(0, 0.0), sample(1, 1.0)])
+    assert len(everything) == 2
+    assert len(received) == 2
+
+
+def test_ignores_unknown_markers():
+    tracker = connected(2)
+    feed(tracker, [sample(5, 0.0)])
+    assert tracker.n_ignored == 1
+    assert tracker.n_samples == 1
+
+
+def test_markers_in_and_out_of_range():
+    tracker = connected(3, range_timeout=10.0)
+    sensors = list(tracker)
+    changes = []
+    tracker.add_range_listener(lambda marker, in_range: changes.append((marker, in_range)))
+
+    feed(tracker, [sample(0, 0.0), sample(1, 0.0)])
+    assert changes == [(0, True), (1, True)]
+    assert tracker.in_range.tolist() == [True, True, False]
+
+    # Marker 1 stops reporting; time passes.
+    tracker.last_seen[1] -= 20
+    feed(tracker, [sample(0, 0.0)])
+    assert changes[-1] == (1, False)
+    # Marker 0 stops too; no data, but the range is still checked.
+    tracker.last_seen[0] -= 20
+    tracker.mainloop()
+    assert changes[-1] == (0, False)
+
+    positions = tracker.positions
+    feed(tracker, [sample(1, 0.0), sample(2, 0.0)])
+    assert changes[-2:] == [(1, True), (2, True)]
+    # Nothing was rebuilt.
+    assert list(tracker) == sensors
+    assert tracker.positions is positions
+
+
+def test_remove_listeners():
+    tracker = connected(1)
+    listener, handler = MagicMock(), MagicMock()
+    tracker.add_range_listener(listener)
+    tracker.subscribe_batches(handler)
+    tracker.remove_range_listener(listener)
+    tracker.unsubscribe_batches(handler)
+    feed(tracker, [sample(0, 0.0)])
+    assert not listener.called
+    assert not handler.called
+    with pytest.raises(ValueError):
+        tracker.remove_range_listener(listener)
+
+
+def test_reconnect():
+    tracker = connected(2)
+    tracker.reconnect()
+    # The mock returns the same object for both connections: one callback each.
+    assert tracker._object.register_change_handler.call_count == 2
+    feed(tracker, [sample(0, 1.0)])
+    assert np.allclose(tracker.latest_positions[0], [0.0, 0.0, 1.0])
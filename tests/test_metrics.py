@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+from tempfile import mkdtemp
+
+from pyvrpn import receiver
+from pyvrpn.metrics import Metrics
+from pyvrpn.receiver import Subscription
+
+
+class Reader:
+    def __init__(self):
+        self.n_lines = 0
+
+
+class Log:
+    n_suppressed = 0
+
+
+class FakeServer:
+    def __init__(self, devices):
+        self.devices = devices
+        self.n_iterations = 0
+        self.n_restarts = 0
+        self.is_running = True
+        self.output_readers = {'stdout': Reader(), 'stderr': None}
+        self._output_logs = {'stdout': Log(), 'stderr': Log()}
+
+
+def test_snapshot():
+    tracker = receiver.TestTracker(2, 100.0)
+    received = []
+    tracker.subscribe(received.append)
+    tracker[1].stream(maxsize=1)
+    server = FakeServer([tracker])
+    metrics = Metrics()
+    metrics.server = server
+    metrics.update_rates()
+
+    first = metrics.snapshot()
+    assert first['loop']['mainloop_iterations_per_second'] is None
+    for ix in range(10):
+        tracker._callback('', {'sensor': ix % 2, 'time': ix * 0.01})
+        tracker[ix % 2]._callback('', {'sensor': ix % 2, 'time': ix * 0.01})
+    server.n_iterations = 10
+    server.output_readers['stdout'].n_lines = 3
+    metrics.update_rates()
+
+    snapshot = metrics.snapshot()
+    json.dumps(snapshot)
+    assert snapshot['loop']['mainloop_iterations_per_second'] > 0
+    assert snapshot['output']['stdout']['n_lines'] == 3
+    assert 'stderr' not in snapshot['output']
+    device = snapshot['devices'][str(tracker)]
+    assert device['n_samples'] == 10
+    assert device['samples_per_second'] > 0
+    handler, stream = device['subscriptions']
+    assert handler['n_calls'] == 10
+    assert handler['sensor'] is None
+    assert stream['sensor'] == 1
+    assert stream['n_calls'] == 5
+    assert stream['pending'] == 1
+    assert stream['n_dropped'] == 4
+    assert device['handlers'] == []
+
+    # Snapshots only read: taking another does not change the rates or the maximum lag.
+    metrics.max_loop_lag = 0.5
+    assert metrics.snapshot() == metrics.snapshot()
+    assert metrics.snapshot()['loop']['max_lag'] == 0.5
+    assert metrics.snapshot()['devices'][str(tracker)]['samples_per_second'] == device['samples_per_second']
+
+
+def test_handler_timing():
+    class Handlers:
+        def on_input(self, data):
+            pass
+
+    tracker = receiver.TestTracker(2, 100.0)
+    handlers = Handlers()
+    tracker.push_handlers(handlers)
+    tracker[1].set_handler('on_input', lambda data: None)
+    metrics = Metrics()
+    metrics.server = FakeServer([tracker])
+
+    Subscription.timing = True
+    try:
+        metrics._recompile_handlers()
+        for ix in range(4):
+            tracker._callback('', {'sensor': ix % 2})
+            tracker[ix % 2]._callback('', {'sensor': ix % 2})
+        # Adding a handler recompiles, keeping the counts of the others.
+        tracker.push_handlers(on_input=lambda data: None)
+        tracker._callback('', {'sensor': 0})
+    finally:
+        Subscription.timing = False
+    device = metrics.snapshot()['devices'][str(tracker)]
+    assert [(handler['sensor'], handler['n_calls']) for handler in device['handlers']] == [(None, 1), (None, 5), (1, 2)]
+    assert 'Handlers.on_input' in device['handlers'][1]['handler']
+    assert all(handler['total_time'] > 0 for handler in device['handlers'])
+
+    metrics._recompile_handlers()
+    tracker._callback('', {'sensor': 0})
+    assert metrics.snapshot()['devices'][str(tracker)]['handlers'] == []
+
+
+def test_timing():
+    subscription = Subscription(lambda data: None)
+    subscription({})
+    assert subscription.n_calls == 1
+    assert subscription.total_time == 0
+    Subscription.timing = True
+    try:
+        subscription({})
+    finally:
+        Subscription.timing = False
+    assert subscription.n_calls == 2
+    assert subscription.total_time > 0
+
+
+def test_socket():
+    loop = asyncio.new_event_loop()
+    path = os.path.join(mkdtemp(), 'stats.sock')
+    metrics = Metrics(socket_path=path, interval=0.01, time_handlers=True)
+    task = loop.create_task(metrics.run(FakeServer([]), loop=loop))
+
+    @asyncio.coroutine
+    def read():
+        yield from asyncio.sleep(0.05, loop=loop)
+        assert Subscription.timing
+        reader, writer = yield from asyncio.open_unix_connection(path, loop=loop)
+        line = yield from reader.readline()
+        writer.close()
+        return json.loads(line.decode())
+
+    try:
+        snapshot = loop.run_until_complete(read())
+    finally:
+        task.cancel()
+        loop.run_until_complete(asyncio.wait([task], loop=loop))
+        loop.close()
+
+    assert snapshot['server']['is_running']
+    assert snapshot['loop']['lag'] >= 0
+    assert not Subscription.timing
+    assert not os.path.exists(path)
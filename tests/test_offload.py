@@ -0,0 +1,94 @@
+import threading
+import logging
+
+import pytest
+
+from pyvrpn.offload import OffloadedHandler
+
+
+# Set up logging to file in case something hangs and we have to Ctrl-C.
+logging.basicConfig(level=logging.DEBUG,
+                    format='%(asctime)s %(name)-15s %(lineno)-4s %(levelname)-6s %(message)s',
+                    datefmt='%m-%d %H:%M',
+                    filename='test_offload.log',
+                    filemode='w')
+
+
+def blocked_handler(received):
+    release = threading.Event()
+
+    def handler(data):
+        release.wait()
+        received.append(data)
+
+    return handler, release
+
+
+def test_thread_pool():
+    received = []
+    handler = OffloadedHandler(received.append)
+    for ix in range(100):
+        handler(ix)
+    handler.close()
+    assert received == list(range(100))
+    assert handler.n_processed == 100
+    assert handler.n_dropped == 0
+    with pytest.raises(RuntimeError):
+        handler(0)
+
+
+def test_drop_oldest():
+    received = []
+    func, release = blocked_handler(received)
+    handler = OffloadedHandler(func, maxsize=2, overflow='drop_oldest')
+    handler(0)
+    # Wait for the worker to take the first item.
+    while handler.pending:
+        pass
+    for ix in range(1, 5):
+        handler(ix)
+    assert handler.pending == 2
+    assert handler.n_dropped == 2
+    release.set()
+    handler.close()
+    assert received == [0, 3, 4]
+
+
+def test_drop_newest():
+    received = []
+    func, release = blocked_handler(received)
+    handler = OffloadedHandler(func, maxsize=2, overflow='drop_newest')
+    handler(0)
+    while handler.pending:
+        pass
+    for ix in range(1, 5):
+        handler(ix)
+    assert handler.n_dropped == 2
+    release.set()
+    handler.close()
+    assert received == [0, 1, 2]
+
+
+def test_errors_are_counted():
+    handler = OffloadedHandler(lambda data: 1 / data)
+    handler(0)
+    handler(1)
+    handler.close()
+    assert handler.n_errors == 1
+    assert handler.n_processed == 2
+
+
+def test_process_pool():
+    handler = OffloadedHandler(len, pool='process', workers=2)
+    for _ in range(10):
+        handler({'position': (0, 0, 0)})
+    handler.close()
+    assert handler.n_processed == 10
+    assert handler.n_errors == 0
+
+
+def test_bad_arguments():
+    with pytest.raises(ValueError):
+        OffloadedHandler(print, pool='fiber')
+    with pytest.raises(ValueError):
+        OffloadedHandler(print, overflow='explode')
@@ -0,0 +1,168 @@
+from time import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from pyvrpn import receiver
+from pyvrpn.overload import LatencyBudget
+
+
+def attached(budget, device=None):
+    device = device or receiver.TestTracker(2, 100.0)
+    budget.attach(device)
+    device.object_class = MagicMock()
+    device.connect()
+    return device
+
+
+def feed(device, samples):
+    def batch():
+        for data in samples:
+            device._callback('', data)
+    device._object.mainloop.side_effect = batch
+    device.mainloop()
+
+
+def sample(sensor, age, z=0.0):
+    return {'sensor': sensor, 'position': (0.0, 0.0, z), 'quaternion': (0.0, 0.0, 0.0, 1.0), 'time': time() - age}
+
+
+def test_fresh_samples_pass():
+    budget = LatencyBudget(1.0)
+    tracker = attached(budget)
+    received = []
+    tracker.subscribe(received.append)
+    feed(tracker, [sample(0, 0.0), sample(1, 0.0)])
+    assert len(received) == 2
+    assert tracker.n_samples == 2
+    assert budget.n_dropped[tracker.uuid] == budget.n_stale[tracker.uuid] == 0
+
+
+def test_coalesce():
+    budget = LatencyBudget(1.0)
+    tracker = attached(budget)
+    received, drops, batches = [], [], []
+    tracker.subscribe(lambda data: received.append((data['sensor'], data['position'][2])))
+    budget.add_listener(lambda device, n_dropped: drops.append((device, n_dropped)))
+    tracker.add_batch_listener(lambda: batches.append(len(received)))
+
+    feed(tracker, [sample(0, 5, 1.0), sample(1, 5, 1.0), sample(0, 4, 2.0), sample(1, 4, 2.0), sample(0, 3, 3.0)])
+    # The latest stale pose of each sensor, before the batch listeners.
+    assert sorted(received) == [(0, 3.0), (1, 2.0)]
+    assert batches == [2]
+    assert tracker.n_samples == 5
+    assert budget.n_stale[tracker.uuid] == 5
+    assert budget.n_dropped[tracker.uuid] == 3
+    assert budget.n_coalesced[tracker.uuid] == 2
+    assert budget.max_age[tracker.uuid] >= 5
+    assert drops == [(tracker, 3)]
+
+
+def test_fresh_sample_supersedes_stale():
+    budget = LatencyBudget(1.0)
+    tracker = attached(budget)
+    received = []
+    tracker.subscribe(lambda data: received.append(data['position'][2]))
+    feed(tracker, [sample(0, 5, 1.0), sample(0, 0, 2.0)])
+    assert received == [2.0]
+    assert budget.n_dropped[tracker.uuid] == 1
+
+
+def test_drop():
+    budget = LatencyBudget(1.0, policy='drop')
+    tracker = attached(budget)
+    received, drops = [], []
+    tracker.subscribe(received.append)
+    budget.add_listener(lambda device, n_dropped: drops.append(n_dropped))
+    feed(tracker, [sample(0, 5), sample(1, 5), sample(0, 0)])
+    assert len(received) == 1
+    assert budget.total_dropped == 2
+    assert drops == [2]
+    # No drops, no call.
+    feed(tracker, [sample(0, 0)])
+    assert drops == [2]
+
+
+def test_per_device_budget():
+    budget = LatencyBudget(1.0)
+    tracker = receiver.TestTracker(1, 100.0)
+    budget.attach(tracker, budget=10.0)
+    assert budget.budgets[tracker.uuid] == 10.0
+
+
+class PositionTracker(receiver.TestTracker):
+    # As with vrpn.receiver.Tracker: each sensor also gets its own VRPN callback.
+    callback_type = 'position'
+
+
+def feed_sensors(tracker, samples):
+    def batch():
+        for data in samples:
+            tracker._callback('', data)
+            tracker[data['sensor']]._callback('', data)
+    tracker._object.mainloop.side_effect = batch
+    tracker.mainloop()
+
+
+def test_sensor_callbacks_dropped():
+    budget = LatencyBudget(1.0, policy='drop')
+    tracker = attached(budget, PositionTracker(2, 100.0))
+    assert tracker._object.register_change_handler.call_count == 3
+    received = []
+    tracker[0].subscribe(received.append)
+    feed_sensors(tracker, [sample(0, 5), sample(0, 0, 1.0)])
+    assert [data['position'][2] for data in received] == [1.0]
+    assert tracker.n_samples == 2
+
+
+def test_sensor_callbacks_coalesced():
+    budget = LatencyBudget(1.0)
+    tracker = attached(budget, PositionTracker(2, 100.0))
+    received = []
+    tracker[1].subscribe(lambda data: received.append(data['position'][2]))
+    feed_sensors(tracker, [sample(1, 5, 1.0), sample(1, 4, 2.0), sample(0, 4, 3.0)])
+    assert received == [2.0]
+
+    tracker.disconnect()
+    budget.detach(tracker)
+    assert '_callback' not in vars(tracker[1])
+
+
+def test_compact_sensors_routed_once():
+    budget = LatencyBudget(1.0)
+    tracker = attached(budget, PositionTracker(2, 100.0, compact=True))
+    # Only the tracker's callback is registered; it routes converted samples to the sensors.
+    assert tracker._object.register_change_handler.call_count == 1
+    received = []
+    tracker.subscribe(received.append)
+    tracker[1].subscribe(received.append)
+    feed(tracker, [sample(1, 0, 1.0), sample(1, 5, 2.0), sample(1, 4, 3.0)])
+    assert [data['position'][2] for data in received] == [1.0, 1.0, 3.0, 3.0]
+    assert received[0] is received[1]
+    assert isinstance(received[-1], receiver.TrackerSample)
+
+
+def test_buttons_and_dials_not_attached():
+    budget = LatencyBudget(1.0)
+    with pytest.raises(TypeError):
+        budget.attach(receiver.TestButton(2, 100.0))
+    with pytest.raises(TypeError):
+        budget.attach(receiver.TestDial(2, 1.0, 100.0))
+    assert not budget.budgets
+
+
+def test_attach_errors():
+    budget = LatencyBudget(1.0)
+    with pytest.raises(ValueError):
+        LatencyBudget(1.0, policy='block')
+    tracker = attached(budget)
+    with pytest.raises(RuntimeError):
+        budget.attach(tracker)
+    with pytest.raises(RuntimeError):
+        budget.detach(tracker)
+    unconnected = receiver.TestTracker(1, 100.0)
+    budget.attach(unconnected)
+    with pytest.raises(ValueError):
+        budget.attach(unconnected)
+    budget.detach(unconnected)
+    assert '_callback' not in vars(unconnected)
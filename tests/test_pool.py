@@ -0,0 +1,72 @@
+from unittest.mock import MagicMock
+
+from pyvrpn import receiver
+from pyvrpn.pool import ConnectionPool
+
+
+class SharedConnection:
+    """Delivers all queued samples, whichever remote's mainloop is called, like a shared VRPN connection."""
+    def __init__(self):
+        self.queued = []
+        self.n_reads = 0
+
+    def remote(self, name):
+        remote = MagicMock()
+        remote.mainloop.side_effect = self.read
+        return remote
+
+    def read(self):
+        self.n_reads += 1
+        queued, self.queued = self.queued, []
+        for device, data in queued:
+            device._callback('', data)
+
+
+def connected_buttons(n, host, connection):
+    buttons = [receiver.TestButton(1, 100.0) for _ in range(n)]
+    for button in buttons:
+        button.object_class = connection.remote
+        button.connect(host)
+    return buttons
+
+
+def test_one_read_per_host():
+    local, remote = SharedConnection(), SharedConnection()
+    local_buttons = connected_buttons(3, 'localhost', local)
+    remote_buttons = connected_buttons(2, 'tracker-pc:3883', remote)
+    pool = ConnectionPool(local_buttons + remote_buttons)
+    assert pool.hosts == ['localhost', 'tracker-pc:3883']
+
+    for _ in range(6):
+        pool.poll()
+    assert local.n_reads == 6
+    assert remote.n_reads == 6
+    # Each device's own mainloop still runs in turn.
+    assert [button._object.mainloop.call_count for button in local_buttons] == [2, 2, 2]
+    assert [button._object.mainloop.call_count for button in remote_buttons] == [3, 3]
+
+
+def test_last_sample_at():
+    connection = SharedConnection()
+    first, second = connected_buttons(2, 'localhost', connection)
+    pool = ConnectionPool([first, second])
+    pool.poll()
+    connected_at = second.last_sample_at
+    connection.queued.append((second, {'button': 0, 'state': 1}))
+    pool.poll()
+    assert second.n_samples == 1
+    assert second.last_sample_at > connected_at
+
+
+def test_disconnected_devices_are_skipped():
+    connection = SharedConnection()
+    first, second = connected_buttons(2, 'localhost', connection)
+    pool = ConnectionPool([first, second])
+    pool.poll()
+    second.is_connected = False
+    pool.poll()
+    pool.poll()
+    pool.poll()
+    assert pool.hosts == ['localhost']
+    assert second._object.mainloop.call_count == 0
+    assert first._object.mainloop.call_count == 3
@@ -0,0 +1,80 @@
+import io
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from pyvrpn import receiver
+from pyvrpn.profiling import Profiler
+
+
+def on_input(data):
+    pass
+
+
+def connected_tracker():
+    tracker = receiver.TestTracker(2, 100.0)
+    tracker.object_class = MagicMock()
+    tracker.connect()
+    data = {'sensor': 1, 'time': 0.0}
+
+    def mainloop():
+        tracker._callback('', data)
+        tracker[1]._callback('', data)
+
+    tracker._object.mainloop.side_effect = mainloop
+    return tracker
+
+
+def test_spans():
+    tracker = connected_tracker()
+    tracker.set_handler('on_input', on_input)
+    tracker[1].subscribe(on_input)
+    profiler = Profiler()
+    profiler.attach(tracker)
+    tracker.mainloop()
+
+    names = [span[:3] for span in profiler.spans]
+    assert names == [
+        ('on_input', 'handler', 0),
+        ('dispatch', 'dispatch', 0),
+        ('on_input', 'subscription', 0),
+        ('dispatch sensor 1', 'dispatch', 0),
+        ('mainloop', 'mainloop', 0),
+    ]
+    mainloop = profiler.spans[-1]
+    for _, _, _, start, duration in profiler.spans:
+        assert mainloop[3] <= start
+        assert start + duration <= mainloop[3] + mainloop[4]
+    assert tracker.n_samples == 1
+
+
+def test_detach():
+    tracker = connected_tracker()
+    profiler = Profiler()
+    profiler.attach(tracker)
+    with pytest.raises(ValueError):
+        profiler.attach(tracker)
+    profiler.detach()
+    assert 'mainloop' not in vars(tracker)
+    assert '_dispatch' not in vars(tracker[0])
+    tracker.mainloop()
+    assert not profiler.spans
+    # Can be attached again.
+    profiler.attach(tracker)
+    tracker.mainloop()
+    assert len(profiler.spans) == 3
+
+
+def test_export():
+    tracker = connected_tracker()
+    profiler = Profiler(max_spans=2)
+    profiler.attach(tracker)
+    tracker.mainloop()
+    file = io.StringIO()
+    profiler.export(file)
+    events = json.loads(file.getvalue())['traceEvents']
+    assert events[0]['ph'] == 'M'
+    assert events[0]['args']['name'] == str(tracker)
+    assert [event['name'] for event in events[1:]] == ['dispatch sensor 1', 'mainloop']
+    assert all(event['ts'] >= 0 and event['dur'] >= 0 for event in events[1:])
@@ -1,4 +1,6 @@
+import gc
 import logging
+import tracemalloc
 from unittest.mock import MagicMock
 
 import pytest
@@ -99,3 +101,385 @@ def test_equality():
     assert tracker != 1
     assert tracker == tracker
     assert tracker != receiver.TestTracker(1, 1)
+
+
+def test_subscription_max_rate(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(receiver, 'perf_counter', lambda: now[0])
+    received = []
+    tracker = receiver.TestTracker(1, 1)
+    tracker.subscribe(received.append, max_rate=10)
+    for now[0] in (0.0, 0.05, 0.1, 0.15, 0.25):
+        tracker._callback('', {'sensor': 0, 'time': now[0]})
+    assert [data['time'] for data in received] == [0.0, 0.1, 0.25]
+
+
+def test_subscription_fields_and_min_distance():
+    received = []
+    tracker = receiver.TestTracker(1, 1)
+    tracker[0].subscribe(received.append, fields=['position'], min_distance=0.001)
+    for x in (0.0, 0.0005, 0.0012, 0.003):
+        tracker[0]._callback('', {'sensor': 0, 'position': (x, 0.0, 0.0), 'quaternion': (0.0, 0.0, 0.0, 1.0)})
+    assert received == [{'position': (0.0, 0.0, 0.0)}, {'position': (0.0012, 0.0, 0.0)}, {'position': (0.003, 0.0, 0.0)}]
+
+
+def test_unsubscribe():
+    received = []
+    button = receiver.TestButton(2, 1)
+    subscription = button[1].subscribe(received.append)
+    button._callback('', {'button': 1, 'state': 1})
+    button[1].unsubscribe(subscription)
+    button._callback('', {'button': 1, 'state': 0})
+    assert received == [{'button': 1, 'state': 1}]
+    with pytest.raises(ValueError):
+        button[1].unsubscribe(subscription)
+
+
+def test_offload():
+    received = []
+    tracker = receiver.TestTracker(1, 1)
+    subscription = tracker.offload(received.append, maxsize=10, fields=['sensor'])
+    for _ in range(5):
+        tracker._callback('', {'sensor': 0, 'position': (0.0, 0.0, 0.0)})
+    tracker.unsubscribe(subscription)
+    subscription.handler.close()
+    assert received == [{'sensor': 0}] * 5
+
+
+def test_stream():
+    tracker = receiver.TestTracker(2, 1)
+    stream = tracker[1].stream(maxsize=2)
+    for x in range(3):
+        tracker[1]._callback('', {'sensor': 1, 'position': (x, 0, 0)})
+    assert stream.pending == 2
+    assert stream.n_dropped == 1
+    stream.close()
+    assert not tracker[1]._subscriptions
+
+
+def test_routes():
+    button = receiver.TestButton(3, 1.0)
+    button.object_class = MagicMock()
+    received = []
+    button[1].set_handler('on_input', received.append)
+    button.connect()
+    assert button._routes == (None, button[1], None)
+
+    button._callback('', {'button': 0, 'state': 1})
+    button._callback('', {'button': 1, 'state': 1})
+    assert received == [{'button': 1, 'state': 1}]
+
+    # Adding a handler after connecting recompiles the routes.
+    button[2].set_handler('on_input', received.append)
+    assert button._routes is None
+    button._callback('', {'button': 2, 'state': 1})
+    assert received[-1] == {'button': 2, 'state': 1}
+    assert button._routes == (None, button[1], button[2])
+
+    button[1].remove_handler('on_input', received.append)
+    button._callback('', {'button': 1, 'state': 0})
+    assert len(received) == 2
+
+
+def test_event_handled_stops_propagation():
+    tracker = receiver.TestTracker(1, 1.0)
+    received = []
+    tracker.push_handlers(on_input=lambda data: received.append('lower'))
+    tracker.push_handlers(on_input=lambda data: received.append('upper') or True)
+    tracker.subscribe(lambda data: received.append('subscription'))
+    tracker._callback('', {'sensor': 0})
+    assert received == ['upper', 'subscription']
+    tracker.pop_handlers()
+    tracker._callback('', {'sensor': 0})
+    assert received[2:] == ['lower', 'subscription']
+
+
+def test_push_handlers_bound_methods():
+    class Handlers:
+        def __init__(self):
+            self.received = []
+
+        def on_input(self, data):
+            self.received.append(data)
+
+    tracker = receiver.TestTracker(1, 1.0)
+    handlers = Handlers()
+    tracker.push_handlers(handlers)
+    tracker[0].push_handlers(handlers)
+    tracker._callback('', {'sensor': 0})
+    tracker[0]._callback('', {'sensor': 0})
+    assert handlers.received == [{'sensor': 0}, {'sensor': 0}]
+    assert tracker.is_active
+
+    # Handlers are held weakly, as by pyglet: once the object is gone, they are skipped and recompiled away.
+    del handlers
+    gc.collect()
+    tracker._callback('', {'sensor': 0})
+    assert not tracker.is_active
+    assert not tracker[0].is_active
+
+
+def test_compact():
+    received = []
+    tracker = receiver.TestTracker(1, 1.0, compact=True)
+    tracker.set_handler('on_input', received.append)
+    tracker[0].set_handler('on_input', received.append)
+    data = {'sensor': 0, 'position': (0.0, 0.0, 0.0), 'quaternion': (0.0, 0.0, 0.0, 1.0), 'time': 0.0}
+    tracker._callback('', data)
+    assert all(isinstance(sample, receiver.TrackerSample) for sample in received)
+    assert received == [data, data]
+    # Converted once, by the tracker, and routed to the sensor.
+    assert received[0] is received[1]
+
+    button = receiver.TestButton(2, 1.0, compact=True)
+    button[1].set_handler('on_input', received.append)
+    button._callback('', {'button': 1, 'state': 1, 'time': 0.0})
+    assert isinstance(received[-1], receiver.ButtonSample)
+
+    class Joystick(receiver.Analog):
+        device_type = 'vrpn_Joylin'
+
+    with pytest.raises(ValueError):
+        Joystick('/dev/input/js0', compact=True)
+
+
+def test_reconnect():
+    tracker = receiver.TestTracker(2, 60.0)
+    assert tracker.expected_rate == 60.0
+    with pytest.raises(RuntimeError):
+        tracker.reconnect()
+    received = []
+    tracker[1].set_handler('on_input', received.append)
+    tracker.object_class = MagicMock(side_effect=lambda name: MagicMock())
+    tracker.connect('remote')
+    old_object = tracker._object
+    tracker.reconnect()
+    assert tracker._object is not old_object
+    assert tracker.n_reconnects == 1
+    tracker.object_class.assert_called_with('{}@remote'.format(tracker.uuid))
+    tracker._object.register_change_handler.assert_called_with('', tracker._callback)
+
+
+def test_reconnect_unregisters():
+    tracker = receiver.TestTracker(2, 60.0)
+    tracker.object_class = MagicMock()
+    tracker.connect()
+    tracker.reconnect()
+    assert tracker._object.unregister_change_handler.call_count == 1
+    tracker._object.unregister_change_handler.assert_called_with('', tracker._callback)
+
+
+def test_disconnect():
+    tracker = receiver.TestTracker(2, 60.0)
+    with pytest.raises(RuntimeError):
+        tracker.disconnect()
+    received = []
+    tracker.subscribe(received.append)
+    tracker.object_class = MagicMock(side_effect=lambda name: MagicMock())
+    tracker.connect()
+    remote = tracker._object
+    tracker.disconnect()
+    assert not tracker.is_connected
+    assert tracker._object is None
+    assert remote.unregister_change_handler.call_count == remote.register_change_handler.call_count
+    # Handlers are kept, and the receiver can be connected again.
+    tracker.connect()
+    tracker._callback('', {'sensor': 0})
+    assert received == [{'sensor': 0}]
+
+
+def test_disconnect_unregister_fails():
+    tracker = receiver.TestTracker(2, 60.0)
+    tracker.object_class = MagicMock()
+    tracker.connect()
+    tracker._object.unregister_change_handler.side_effect = AttributeError
+    tracker.disconnect()
+    assert not tracker.is_connected
+    assert tracker._registrations == []
+
+
+def test_close():
+    tracker = receiver.TestTracker(2, 60.0)
+    tracker.object_class = MagicMock()
+    tracker.connect()
+    tracker.set_handler('on_input', lambda data: None)
+    tracker[0].subscribe(lambda data: None)
+    stream = tracker.stream()
+    offloaded = tracker.offload(lambda data: None).handler
+    tracker.add_batch_listener(lambda: None)
+    tracker.close()
+    assert not tracker.is_connected
+    assert not tracker.is_active
+    assert not tracker[0].is_active
+    assert not tracker._batch_listeners
+    assert stream.closed
+    assert offloaded._closed
+    tracker.close()
+
+
+class FakeRemote:
+    """Like a ``vrpn.receiver`` object, kept alive by VRPN for as long as it has callbacks registered."""
+    alive = set()
+
+    def __init__(self, name):
+        self.name = name
+        self.callbacks = []
+
+    def register_change_handler(self, user_data, callback, *args):
+        self.callbacks.append((callback,) + args)
+        FakeRemote.alive.add(self)
+
+    def unregister_change_handler(self, user_data, callback, *args):
+        self.callbacks.remove((callback,) + args)
+        if not self.callbacks:
+            FakeRemote.alive.discard(self)
+
+    def mainloop(self):
+        pass
+
+
+def allocated_after(cycles, cycle):
+    for _ in range(cycles):
+        cycle()
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def test_connect_cycles_memory():
+    tracker = receiver.TestTracker(4, 60.0)
+    tracker.object_class = FakeRemote
+    tracker.subscribe(lambda data: None)
+
+    def cycle():
+        tracker.connect()
+        tracker.mainloop()
+        tracker.disconnect()
+
+    tracemalloc.start()
+    try:
+        baseline = allocated_after(500, cycle)
+        after = allocated_after(5000, cycle)
+    finally:
+        tracemalloc.stop()
+    assert not FakeRemote.alive
+    assert after - baseline < 50000
+
+
+def test_receiver_lifetime_memory():
+    def cycle():
+        tracker = receiver.TestTracker(4, 60.0)
+        tracker.object_class = FakeRemote
+        tracker.subscribe(lambda data: None)
+        tracker[0].stream()
+        tracker.connect()
+        tracker.close()
+
+    tracemalloc.start()
+    try:
+        baseline = allocated_after(200, cycle)
+        after = allocated_after(2000, cycle)
+    finally:
+        tracemalloc.stop()
+    assert not FakeRemote.alive
+    assert after - baseline < 50000
+
+
+def test_sample_counting():
+    button = receiver.TestButton(1, 1.0)
+    button.object_class = MagicMock()
+    button.connect()
+    connected_at = button.last_sample_at
+    button._object.mainloop.side_effect = lambda: button._callback('', {'button': 0, 'state': 1})
+    button.mainloop()
+    assert button.n_samples == 1
+    assert button.last_sample_at > connected_at
+
+
+def test_button_state():
+    button = receiver.TestButton(3, 1.0)
+    button.object_class = MagicMock()
+    button.connect()
+    presses, releases = [], []
+    button.subscribe_press(lambda number, time: presses.append((number, time)))
+    button.subscribe_release(lambda number, time: releases.append((number, time)))
+
+    button._callback('', {'button': 2, 'state': 1, 'time': 0.0})
+    button._callback('', {'button': 0, 'state': 1, 'time': 0.1})
+    # No change, no edge.
+    button._callback('', {'button': 0, 'state': 1, 'time': 0.2})
+    assert button.pressed == 0b101
+    assert button.is_pressed(0) and button.is_pressed(2)
+    assert not button.is_pressed(1)
+    assert button.pressed_buttons == [0, 2]
+    assert presses == [(2, 0.0), (0, 0.1)]
+
+    button._callback('', {'button': 2, 'state': 0, 'time': 0.3})
+    assert releases == [(2, 0.3)]
+    assert button.pressed_buttons == [0]
+    assert button.n_samples == 4
+
+    # A release missed while the connection was down does not leave the button stuck.
+    button.reconnect()
+    assert button.pressed == 0
+    button._callback('', {'button': 0, 'state': 1, 'time': 0.4})
+    assert presses[-1] == (0, 0.4)
+
+
+def test_button_compact_dispatch():
+    button = receiver.TestButton(2, 1.0)
+    button.object_class = MagicMock()
+    button.connect()
+    button._dispatch = MagicMock()
+    button._callback('', {'button': 0, 'state': 1})
+    assert not button._dispatch.called
+    assert button.n_samples == 1
+
+    received = []
+    button[1].subscribe(received.append)
+    button._callback('', {'button': 1, 'state': 1})
+    assert received == [{'button': 1, 'state': 1}]
+    assert button._dispatch.called
+
+
+def test_button_unsubscribe_edges():
+    button = receiver.TestButton(1, 1.0)
+    handler = MagicMock()
+    button.subscribe_press(handler)
+    button.subscribe_release(handler)
+    button.unsubscribe_press(handler)
+    button.unsubscribe_release(handler)
+    button._callback('', {'button': 0, 'state': 1})
+    button._callback('', {'button': 0, 'state': 0})
+    assert not handler.called
+    with pytest.raises(ValueError):
+        button.unsubscribe_press(handler)
+
+
+def test_dial_totals():
+    dial = receiver.TestDial(2, 1, 1.0)
+    assert dial.total(1) == 0.0
+    for _ in range(4):
+        dial._callback('', {'dial': 1, 'change': 0.25})
+    dial._callback('', {'dial': 0, 'change': -0.5})
+    assert dial.total(1) == 1.0
+    assert dial.total(0) == -0.5
+    # Dials beyond those configured are added as they report.
+    dial._callback('', {'dial': 3, 'change': 0.1})
+    assert dial.total(3) == 0.1
+    assert dial.total(5) == 0.0
+    dial.reset(1)
+    assert dial.total(1) == 0.0
+    totals = dial.totals
+    dial.reset()
+    assert totals is dial.totals
+    assert list(totals) == [0.0] * 4
+
+
+def test_detect_gaps():
+    tracker = receiver.TestTracker(1, 100.0)
+    detector = tracker.detect_gaps()
+    assert detector.expected_rate == 100.0
+    for time in [0.0, 0.01, 0.04]:
+        tracker._callback('', {'sensor': 0, 'time': time})
+    assert detector.n_dropped == 2
+    tracker.unsubscribe(detector.subscription)
@@ -0,0 +1,165 @@
+import os
+import threading
+from datetime import datetime
+from tempfile import mkdtemp
+
+import numpy as np
+import pytest
+
+from pyvrpn import receiver
+from pyvrpn.gaps import Gap, GapDetector
+from pyvrpn.offload import OffloadedHandler
+from pyvrpn.recording import Recorder, export, read_npz, _write
+
+
+def tracker_samples(n, n_sensors=2):
+    for ix in range(n):
+        yield {
+            'sensor': ix % n_sensors,
+            'position': (float(ix), 0.0, 0.0),
+            'quaternion': (0.0, 0.0, 0.0, 1.0),
+            'time': (ix // n_sensors) * 0.01,
+        }
+
+
+def temp_path(name):
+    return os.path.join(mkdtemp(), name)
+
+
+def test_export_npz():
+    path = temp_path('session.npz')
+    recorder = export(tracker_samples(10), path, chunk_size=3)
+    assert recorder.n_samples == 10
+    # Sensor 0 gets 5 rows (chunks of 3 and 2), as does sensor 1.
+    assert recorder.n_chunks == 4
+
+    data = read_npz(path)
+    assert set(data) == {'sensor_0', 'sensor_1'}
+    assert set(data['sensor_0']) == {'position', 'quaternion', 'time'}
+    assert data['sensor_0']['position'].shape == (5, 3)
+    assert data['sensor_1']['position'][:, 0].tolist() == [1.0, 3.0, 5.0, 7.0, 9.0]
+    assert data['sensor_0']['time'].dtype == np.float64
+
+
+def test_fields_and_datetimes():
+    path = temp_path('session.npz')
+    samples = [{'button': 1, 'state': 1, 'time': datetime(2016, 1, 1)}]
+    export(samples, path, fields=['time'], group_key='button')
+    assert read_npz(path) == {'sensor_1': {'time': pytest.approx(np.array([datetime(2016, 1, 1).timestamp()]))}}
+
+
+def test_record_receiver_in_background():
+    path = temp_path('session.npz')
+    tracker = receiver.TestTracker(2, 100.0)
+    recorder = tracker.record(path, chunk_size=4)
+    assert recorder.writer is not None
+    detector = tracker.detect_gaps()
+    recorder.record_gaps(detector)
+
+    for ix, sample in enumerate(tracker_samples(20)):
+        if ix in (10, 11):
+            # Lose one sample from each sensor.
+            continue
+        tracker._callback('', sample)
+    recorder.close()
+    assert not recorder.writer.n_errors
+    assert recorder.subscription not in tracker._subscriptions
+
+    data = read_npz(path)
+    assert len(data['sensor_0']['time']) == 9
+    assert data['gaps']['sensor'].tolist() == [0, 1]
+    # The missing samples belong before row 5 of each sensor.
+    assert data['gaps']['index'].tolist() == [5, 5]
+    assert data['gaps']['n_missing'].tolist() == [1, 1]
+
+
+def test_writer_behind():
+    path = temp_path('session.npz')
+    recorder = Recorder(path, chunk_size=2)
+    released = threading.Event()
+
+    def slow_write(message):
+        released.wait()
+        _write(message)
+
+    # A thread instead of a process, to hold up the writer.
+    recorder.writer = recorder._write = OffloadedHandler(slow_write, maxsize=1, overflow='drop_newest')
+    for sample in tracker_samples(20, n_sensors=1):
+        recorder(sample)
+    # Capture was not held up: at most two chunks were in flight.
+    assert recorder.n_dropped >= 16
+    released.set()
+    recorder.close()
+    assert len(read_npz(path)['sensor_0']['time']) + recorder.n_dropped == 20
+
+    with pytest.raises(ValueError):
+        Recorder(path, overflow='drop_oldest')
+
+
+class DroppingWriter:
+    """Writes in the foreground, except that it drops the chunks numbered in `drop`."""
+    def __init__(self, drop):
+        self.drop = drop
+        self.overflow = 'drop_newest'
+        self.pending = 0
+        self.n_dropped = 0
+        self.n_messages = 0
+
+    def __call__(self, message):
+        self.n_messages += 1
+        if self.n_messages in self.drop and self.overflow != 'block':
+            self.n_dropped += 1
+            return
+        _write(message)
+
+    def close(self):
+        pass
+
+
+def test_dropped_chunks_are_gaps():
+    path = temp_path('session.npz')
+    recorder = Recorder(path, chunk_size=2, background=False)
+    # Drop the second chunk (rows 2 and 3).
+    recorder.writer = recorder._write = DroppingWriter(drop={2})
+    samples = list(tracker_samples(10, n_sensors=1))
+    for sample in samples[:6]:
+        recorder(sample)
+    # Sample 6 is lost; the detector reports it when sample 7 arrives.
+    recorder(samples[7])
+    recorder._record_gap(Gap(0, 6, 0.05, 0.07, 1))
+    for sample in samples[8:]:
+        recorder(sample)
+    recorder.close()
+    assert recorder.n_dropped == 2
+
+    data = read_npz(path)
+    assert data['sensor_0']['position'][:, 0].tolist() == [0.0, 1.0, 4.0, 5.0, 7.0, 8.0, 9.0]
+    gaps = data['gaps']
+    # Both gaps give the row of the file at which the missing samples belong.
+    assert gaps['index'].tolist() == [2, 4]
+    assert gaps['n_missing'].tolist() == [2, 1]
+    assert gaps['start'].tolist() == pytest.approx([0.02, 0.05])
+    assert gaps['end'].tolist() == pytest.approx([0.03, 0.07])
+
+
+def test_hdf5():
+    h5py = pytest.importorskip('h5py')
+    path = temp_path('session.h5')
+    export(tracker_samples(10), path, chunk_size=3)
+    with h5py.File(path, 'r') as file:
+        assert file['sensor_0/position'].shape == (5, 3)
+        assert file['sensor_1/time'][:].tolist() == pytest.approx([0.0, 0.01, 0.02, 0.03, 0.04])
+
+
+def test_parquet():
+    parquet = pytest.importorskip('pyarrow.parquet')
+    path = temp_path('session.parquet')
+    export(tracker_samples(10), path, chunk_size=3)
+    table = parquet.read_table(os.path.join(path, 'sensor_0.parquet'))
+    assert table.num_rows == 5
+    assert 'position_2' in table.column_names
+
+
+def test_bad_format():
+    with pytest.raises(ValueError):
+        Recorder('session.csv', format='csv')
@@ -0,0 +1,31 @@
+import pickle
+
+from pyvrpn.sample import TrackerSample, ButtonSample, DialSample
+
+
+TRACKER_DATA = {'sensor': 1, 'position': (0.0, 1.0, 2.0), 'quaternion': (0.0, 0.0, 0.0, 1.0), 'time': 12.5}
+
+
+def test_from_dict():
+    sample = TrackerSample.from_dict(TRACKER_DATA)
+    assert sample.sensor == sample['sensor'] == 1
+    assert sample.position == (0.0, 1.0, 2.0)
+    assert sample == TRACKER_DATA
+    assert dict(sample) == sample.to_dict() == TRACKER_DATA
+    assert ButtonSample.from_dict({'button': 0, 'state': 1, 'time': 0.0}) == {'button': 0, 'state': 1, 'time': 0.0}
+    assert DialSample.from_dict({'dial': 0, 'change': 0.5, 'time': 0.0}).change == 0.5
+
+
+def test_mapping_interface():
+    sample = TrackerSample.from_dict(TRACKER_DATA)
+    assert 'position' in sample
+    assert 'button' not in sample
+    assert sample.get('button') is None
+    assert len(sample) == 4
+    assert list(sample.keys()) == ['sensor', 'position', 'quaternion', 'time']
+    assert not hasattr(sample, '__dict__')
+
+
+def test_pickle():
+    sample = TrackerSample.from_dict(TRACKER_DATA)
+    assert pickle.loads(pickle.dumps(sample)) == sample
@@ -1,6 +1,8 @@
 import asyncio
 import functools
 import logging
+import os
+from collections import deque
 from datetime import datetime
 from unittest.mock import MagicMock
 
@@ -11,7 +13,8 @@ try:
 except ImportError:
     import toolz
 
-from pyvrpn.server import monitor_feed, Server, LocalServer, decoded_readline
+from pyvrpn import receiver
+from pyvrpn.server import monitor_feed, Server, LocalServer, decoded_readline, LineReader, ThrottledLog
 
 
 # Set up logging to file in case something hangs and we have to Ctrl-C.
@@ -205,3 +208,224 @@ def test_local_server(loop):
     assert device2.connect.call_count == 1
     assert device2.connect.called_with()
     assert device2.mainloop.called
+
+
+@async_test
+def test_supervised_restart(loop):
+    server = Server([], loop=loop, supervise=True, restart_backoff=0.05,
+                    _exe=['tests/dummy_server.py', '-r', '100', '-f'])
+    yield from server.start()
+    pid = server.process.pid
+    server.process.kill()
+    yield from asyncio.sleep(0.3, loop=loop)
+    assert server.is_running
+    assert server.n_restarts == 1
+    assert server.process.pid != pid
+    yield from server.stop()
+    assert not server.is_running
+    assert server.supervisor_task.cancelled()
+
+
+@async_test
+def test_supervised_max_restarts(loop):
+    server = Server([], loop=loop, supervise=True, max_restarts=0,
+                    _exe=['tests/dummy_server.py', '-r', '100', '-f'])
+    yield from server.start()
+    server.process.kill()
+    yield from asyncio.sleep(0.2, loop=loop)
+    assert not server.is_running
+    assert server.n_restarts == 0
+    assert server.supervisor_task.done()
+    # Stopping a crashed supervised server only cleans up.
+    yield from server.stop()
+
+
+@async_test
+def test_failed_launch_kills_process(loop):
+    server = Server([], loop=loop, supervise=True, _exe=['tests/dummy_server.py', '-r', '100', '-f'])
+    server._write_config_file()
+    # Fails after the process has started.
+    server.sleep = 'forever'
+    with pytest.raises(TypeError):
+        yield from server._launch()
+    assert server.process.returncode is not None
+    assert not server.is_running
+    os.unlink(server._config_file.name)
+
+
+@async_test
+def test_supervised_failed_relaunch(loop):
+    server = Server([], loop=loop, supervise=True, max_restarts=2, restart_backoff=0.05,
+                    _exe=['tests/dummy_server.py', '-r', '100', '-f'])
+    yield from server.start()
+    server._exe = ['tests/no_such_server']
+    server.process.kill()
+    yield from asyncio.wait([server.supervisor_task], timeout=1, loop=loop)
+    # Failed relaunches are retried (OSError included) until max_restarts.
+    assert server.supervisor_task.done()
+    assert server.supervisor_task.exception() is None
+    assert server.n_restarts == 2
+    assert server.started_at is None
+    yield from server.stop()
+
+
+def test_cancel_monitoring_before_launch():
+    server = Server([])
+    server.cancel_monitoring()
+
+
+@async_test
+def test_unsupervised_no_restart(loop):
+    server = Server([], loop=loop, _exe=['tests/dummy_server.py', '-r', '100', '-f'])
+    yield from server.start()
+    server.process.kill()
+    yield from asyncio.sleep(0.2, loop=loop)
+    assert not server.is_running
+    assert server.supervisor_task is None
+    assert server.n_restarts == 0
+
+
+@async_test
+def test_local_server_restart_reconnects(loop):
+    device = MagicMock()
+    device.is_connected = True
+    device.config_text = 'vrpn_Tracker_NULL Tracker0 2 2.0'
+    server = LocalServer([device], loop=loop, supervise=True, restart_backoff=0.05,
+                         _exe=['tests/dummy_server.py', '-r', '100', '-f'])
+    yield from server.start()
+    server.process.kill()
+    yield from asyncio.sleep(0.3, loop=loop)
+    assert server.n_restarts == 1
+    assert device.connect.call_count == 1
+    assert device.reconnect.call_count == 1
+    yield from server.stop()
+
+
+@async_test
+def test_local_server_start_stop_start(loop):
+    device = MagicMock()
+    device.is_connected = True
+    device.config_text = 'vrpn_Tracker_NULL Tracker0 2 2.0'
+    server = LocalServer([device], loop=loop, _exe=['tests/dummy_server.py', '-r', '100', '-f'])
+    for _ in range(2):
+        yield from server.start()
+        with open(server._config_file.name) as config_file:
+            assert device.config_text in config_file.read()
+        yield from server.stop()
+
+
+@async_test
+def test_local_server_poll(loop):
+    device = MagicMock()
+    device.is_connected = True
+    device.config_text = 'vrpn_Tracker_NULL Tracker0 2 2.0'
+    server = LocalServer([device], loop=loop, run_mainloop=False, _exe=['tests/dummy_server.py', '-r', '100', '-f'])
+    yield from server.start()
+    assert server.mainloop_task is None
+    server.poll()
+    assert device.mainloop.call_count == 1
+    assert server.n_iterations == 1
+    yield from server.stop()
+
+
+def test_local_server_latency_budget():
+    tracker, button = receiver.TestTracker(2, 2.0), receiver.TestButton(2, 2.0)
+    budget = MagicMock()
+    server = LocalServer([tracker, button], latency_budget=budget)
+    assert server.latency_budget is budget
+    # Button presses and releases are never dropped.
+    budget.attach.assert_called_once_with(tracker)
+
+
+def stream_reader(loop, data):
+    stream = asyncio.StreamReader(loop=loop)
+    stream.feed_data(data)
+    stream.feed_eof()
+    return stream
+
+
+@async_test
+def test_line_reader(loop):
+    reader = LineReader(stream_reader(loop, 'a\nb\né\nlast'.encode()), chunk_size=3)
+    lines = []
+    while True:
+        line = yield from reader()
+        if not line:
+            break
+        lines.append(line)
+    assert lines == ['a\n', 'b\n', 'é\n', 'last']
+    assert reader.n_lines == 4
+
+
+@async_test
+def test_monitor_line_reader(loop):
+    items = []
+    with open('tests/test_data.txt', 'rb') as file:
+        reader = LineReader(stream_reader(loop, file.read()))
+    yield from monitor_feed((appender(items, stop_at='30')), reader)
+    assert items == [str(i) for i in range(10)]
+    assert reader.n_chunks == 2
+
+
+def test_throttled_log():
+    logged = []
+    buffer = deque(maxlen=5)
+    log = ThrottledLog(logged.append, max_rate=3, buffer=buffer)
+    for ix in range(10):
+        log('line {}'.format(ix))
+    assert logged == ['line 0', 'line 1', 'line 2']
+    assert log.n_suppressed == 7
+    assert list(buffer) == ['line {}'.format(ix) for ix in range(5, 10)]
+    log.flush()
+    assert 'suppressed 7 lines' in logged[-1]
+
+
+def test_throttled_log_repeats():
+    logged = []
+    log = ThrottledLog(logged.append)
+    for line in ['a', 'b', 'b', 'b', 'c']:
+        log(line)
+    assert logged == ['a', 'b', '(previous line repeated 2 more times)', 'c']
+
+
+class FakeLoop:
+    def __init__(self):
+        self.callbacks = []
+
+    def call_later(self, delay, callback):
+        self.callbacks.append(callback)
+        return MagicMock()
+
+
+def test_throttled_log_repeat_summary_is_throttled(monkeypatch):
+    monkeypatch.setattr('pyvrpn.server.monotonic', lambda: 0)
+    logged = []
+    log = ThrottledLog(logged.append, max_rate=2, loop=FakeLoop())
+    for line in ['a', 'b', 'b', 'b', 'c']:
+        log(line)
+    assert logged == ['a', 'b']
+    log.flush()
+    assert logged[-1].startswith('(suppressed 3 lines')
+
+
+def test_throttled_log_flushes_at_interval_end(monkeypatch):
+    now = [0]
+    monkeypatch.setattr('pyvrpn.server.monotonic', lambda: now[0])
+    logged = []
+    loop = FakeLoop()
+    log = ThrottledLog(logged.append, max_rate=1, loop=loop)
+    for line in ['a', 'b', 'b']:
+        log(line)
+    assert logged == ['a']
+    assert len(loop.callbacks) == 1
+
+    now[0] = 1
+    loop.callbacks.pop()()
+    assert logged[1:] == ['(suppressed 1 lines; see Server.recent_output)']
+    # The repeat summary did not fit in the new interval either.
+    assert len(loop.callbacks) == 1
+
+    now[0] = 2
+    loop.callbacks.pop()()
+    assert logged[2:] == ['(suppressed 1 lines; see Server.recent_output)']
+    assert not loop.callbacks
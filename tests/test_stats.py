@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from pyvrpn import receiver
+from pyvrpn.stats import RollingStats
+
+
+def feed(stats, positions, sensor=0, rate=100.0):
+    for ix, position in enumerate(positions):
+        stats({'sensor': sensor, 'position': position, 'time': ix / rate})
+
+
+def test_matches_numpy():
+    rng = np.random.RandomState(0)
+    positions = rng.normal(size=(500, 3))
+    stats = RollingStats(window=50)
+    feed(stats, positions)
+    window = positions[-50:]
+    assert stats.count[0] == 50
+    assert stats.mean[0] == pytest.approx(window.mean(axis=0))
+    assert stats.variance[0] == pytest.approx(window.var(axis=0, ddof=1))
+    assert stats.min[0] == pytest.approx(window.min(axis=0))
+    assert stats.max[0] == pytest.approx(window.max(axis=0))
+
+
+def test_partial_window():
+    stats = RollingStats(window=10)
+    feed(stats, [(0.0, 0.0, 0.0), (2.0, 0.0, 0.0)])
+    assert stats.count[0] == 2
+    assert stats.mean[0].tolist() == [1.0, 0.0, 0.0]
+    assert stats.variance[0].tolist() == [2.0, 0.0, 0.0]
+
+
+def test_velocity_and_speed():
+    stats = RollingStats(window=5)
+    feed(stats, [(0.0, 0.0, 0.0), (0.03, 0.04, 0.0)], rate=10.0)
+    assert stats.velocity[0] == pytest.approx([0.3, 0.4, 0.0])
+    assert stats.speed[0] == pytest.approx(0.5)
+
+
+def test_velocity_over_window():
+    # Moving at 0.1 per second, with jitter far larger than the change between samples.
+    rng = np.random.RandomState(0)
+    rate = 240.0
+    positions = [(ix / rate * 0.1 + rng.uniform(-1e-3, 1e-3), 0.0, 0.0) for ix in range(500)]
+    stats = RollingStats(window=240)
+    feed(stats, positions, rate=rate)
+    assert stats.velocity[0, 0] == pytest.approx(0.1, abs=0.01)
+
+    # Between the oldest and newest samples once the window is full.
+    stats = RollingStats(window=3)
+    feed(stats, [(0.0, 0.0, 0.0), (0.0, 0.0, 0.0), (5.0, 0.0, 0.0), (2.0, 0.0, 0.0), (3.0, 0.0, 0.0)], rate=1.0)
+    assert stats.velocity[0].tolist() == [-1.0, 0.0, 0.0]
+
+
+def test_sensors_and_stillness():
+    stats = RollingStats(window=10)
+    feed(stats, [(0.0, 0.0, 0.0)] * 10, sensor=0)
+    feed(stats, [(float(ix), 0.0, 0.0) for ix in range(10)], sensor=2)
+    assert stats.n_sensors == 3
+    assert stats.is_still(0.01).tolist() == [True, False, False]
+    assert np.isnan(stats.min[1]).all()
+    stats.reset(0)
+    assert not stats.is_still(0.01)[0]
+
+
+def test_attach():
+    tracker = receiver.TestTracker(4, 100.0)
+    stats = RollingStats(window=3)
+    stats.attach(tracker[1])
+    assert stats.n_sensors == 1
+    stats = RollingStats(window=3)
+    stats.attach(tracker)
+    assert stats.n_sensors == 4
+    tracker._callback('', {'sensor': 3, 'position': (1.0, 2.0, 3.0), 'time': 0.0})
+    assert stats.mean[3].tolist() == [1.0, 2.0, 3.0]
@@ -0,0 +1,79 @@
+import asyncio
+import functools
+
+import pytest
+
+from pyvrpn.stream import SampleStream, StreamClosed
+
+
+@pytest.fixture
+def loop():
+    return asyncio.get_event_loop()
+
+
+def async_test(func):
+    @functools.wraps(func)
+    def wrapper(loop, *args, **kwargs):
+        coro = asyncio.coroutine(func)
+        loop.run_until_complete(coro(loop, *args, **kwargs))
+    return wrapper
+
+
+@async_test
+def test_get(loop):
+    stream = SampleStream(loop=loop)
+    loop.call_later(0.01, stream, 'a')
+    loop.call_later(0.02, stream, 'b')
+    assert (yield from stream.get()) == 'a'
+    assert (yield from stream.get()) == 'b'
+    assert stream.n_received == 2
+
+
+@async_test
+def test_drop_oldest(loop):
+    stream = SampleStream(maxsize=3, loop=loop)
+    for ix in range(5):
+        stream(ix)
+    assert stream.n_dropped == 2
+    received = []
+    for _ in range(3):
+        received.append((yield from stream.get()))
+    assert received == [2, 3, 4]
+
+
+@async_test
+def test_drop_newest(loop):
+    stream = SampleStream(maxsize=3, policy='drop_newest', loop=loop)
+    for ix in range(5):
+        stream(ix)
+    assert stream.n_dropped == 2
+    received = []
+    for _ in range(3):
+        received.append((yield from stream.get()))
+    assert received == [0, 1, 2]
+
+
+@async_test
+def test_batch(loop):
+    stream = SampleStream(batch=2, loop=loop)
+    for ix in range(3):
+        stream(ix)
+    assert (yield from stream.get()) == [0, 1]
+    assert (yield from stream.get()) == [2]
+
+
+@async_test
+def test_close(loop):
+    stream = SampleStream(loop=loop)
+    stream(0)
+    loop.call_later(0.01, stream.close)
+    assert (yield from stream.__anext__()) == 0
+    with pytest.raises(StopAsyncIteration):
+        yield from stream.__anext__()
+    with pytest.raises(StreamClosed):
+        yield from stream.get()
+
+
+def test_bad_policy():
+    with pytest.raises(ValueError):
+        SampleStream(policy='block')
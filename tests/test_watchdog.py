@@ -0,0 +1,82 @@
+from unittest.mock import MagicMock
+
+from pyvrpn.watchdog import Watchdog
+
+
+class Device:
+    def __init__(self, expected_rate=None):
+        self.uuid = str(id(self))
+        self.is_connected = True
+        self.expected_rate = expected_rate
+        self.n_samples = 0
+        self.last_sample_at = 0.0
+        self.n_reconnects = 0
+
+    def receive(self, n, now):
+        self.n_samples += n
+        self.last_sample_at = now
+
+    def reconnect(self):
+        self.n_reconnects += 1
+
+
+def test_expected_rate():
+    device = Device(expected_rate=100)
+    watchdog = Watchdog(stall_periods=5, min_timeout=0)
+    device.receive(1, 1.0)
+    assert watchdog.check([device], now=1.04) == []
+    assert watchdog.check([device], now=1.06) == [device]
+    assert device.n_reconnects == 1
+    assert watchdog.n_stalls[device.uuid] == 1
+
+
+def test_observed_rate():
+    device = Device()
+    watchdog = Watchdog(stall_periods=5, min_timeout=0, infer_rates=True)
+    # Rate is unknown until data has been observed between two checks.
+    assert watchdog.check([device], now=10.0) == []
+    device.receive(10, 10.1)
+    assert watchdog.check([device], now=10.1) == []
+    assert round(watchdog.observed_rates[device.uuid]) == 100
+    assert watchdog.check([device], now=10.2) == [device]
+
+
+def test_unknown_rate_not_watched():
+    # E.g. a button: one burst of presses, then silence.
+    device = Device()
+    watchdog = Watchdog(stall_periods=5, min_timeout=0)
+    watchdog.check([device], now=10.0)
+    device.receive(10, 10.1)
+    watchdog.check([device], now=10.1)
+    assert round(watchdog.observed_rates[device.uuid]) == 100
+    assert watchdog.check([device], now=100.0) == []
+    assert device.n_reconnects == 0
+
+
+def test_timeouts():
+    device = Device(expected_rate=1000)
+    silent = Device()
+    watchdog = Watchdog(min_timeout=0, timeouts={device.uuid: 1.0, silent.uuid: 60.0})
+    assert watchdog.check([device, silent], now=0.5) == []
+    assert watchdog.check([device, silent], now=1.5) == [device]
+    assert watchdog.check([silent], now=61.0) == [silent]
+
+
+def test_disconnected_and_min_timeout():
+    device = Device(expected_rate=1000)
+    disconnected = Device(expected_rate=1000)
+    disconnected.is_connected = False
+    watchdog = Watchdog(min_timeout=0.5)
+    assert watchdog.check([device, disconnected], now=0.4) == []
+    assert watchdog.check([device, disconnected], now=0.6) == [device]
+    assert disconnected.n_reconnects == 0
+
+
+def test_server_down():
+    device = Device(expected_rate=1000)
+    server = MagicMock(is_running=False)
+    watchdog = Watchdog(min_timeout=0)
+    # E.g. a supervised server restarting: the device is silent, but reconnecting it cannot help.
+    assert watchdog.check([device], now=1.0, server=server) == []
+    server.is_running = True
+    assert watchdog.check([device], now=1.0, server=server) == [device]
@@ -0,0 +1,104 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from pyvrpn import receiver
+from pyvrpn.zones import ZoneSet
+
+
+def recorder(zones):
+    events = []
+    zones.set_handler('on_enter', lambda zone, sensor: events.append(('enter', zone, sensor)))
+    zones.set_handler('on_exit', lambda zone, sensor: events.append(('exit', zone, sensor)))
+    return events
+
+
+def move(zones, sensor, position):
+    zones.update({'sensor': sensor, 'position': position})
+    zones.check()
+
+
+def test_box_and_sphere():
+    zones = ZoneSet()
+    zones.add_box('table', (0, 0, 0), (1, 1, 1))
+    zones.add_sphere('target', (5, 0, 0), 0.5)
+    events = recorder(zones)
+
+    move(zones, 0, (0.5, 0.5, 0.5))
+    move(zones, 1, (5.2, 0, 0))
+    assert events == [('enter', 'table', 0), ('enter', 'target', 1)]
+    assert zones.occupants('table') == [0]
+    move(zones, 0, (2, 0.5, 0.5))
+    assert events[-1] == ('exit', 'table', 0)
+    assert zones.occupants('table') == []
+
+
+def test_hysteresis():
+    zones = ZoneSet(hysteresis=0.1)
+    zones.add_box('table', (0, 0, 0), (1, 1, 1))
+    events = recorder(zones)
+    move(zones, 0, (0.95, 0.5, 0.5))
+    move(zones, 0, (1.05, 0.5, 0.5))
+    move(zones, 0, (0.95, 0.5, 0.5))
+    assert events == [('enter', 'table', 0)]
+    move(zones, 0, (1.2, 0.5, 0.5))
+    assert events[-1] == ('exit', 'table', 0)
+    # Not inside yet, only near.
+    move(zones, 0, (1.05, 0.5, 0.5))
+    assert len(events) == 2
+
+
+def test_proximity():
+    zones = ZoneSet(hysteresis=0.01)
+    zones.add_proximity('touch', 0, 1, 0.05)
+    events = recorder(zones)
+    move(zones, 0, (0, 0, 0))
+    move(zones, 1, (0.1, 0, 0))
+    assert events == []
+    move(zones, 1, (0.04, 0, 0))
+    assert events == [('enter', 'touch', (0, 1))]
+    assert zones.occupants('touch')
+    move(zones, 1, (0.055, 0, 0))
+    assert len(events) == 1
+    move(zones, 1, (0.07, 0, 0))
+    assert events[-1] == ('exit', 'touch', (0, 1))
+
+
+def test_check_once_per_batch():
+    tracker = receiver.TestTracker(3, 100.0)
+    tracker.object_class = MagicMock()
+    tracker.connect()
+    zones = ZoneSet()
+    zones.add_sphere('origin', (0, 0, 0), 1)
+    zones.attach(tracker)
+    assert zones.positions.shape == (3, 3)
+    events = recorder(zones)
+
+    def batch():
+        for sensor in range(3):
+            tracker._callback('', {'sensor': sensor, 'position': (0.0, 0.0, float(sensor)), 'time': 0.0})
+
+    tracker._object.mainloop.side_effect = batch
+    tracker.mainloop()
+    assert zones.n_checks == 1
+    assert sorted(events) == [('enter', 'origin', 0), ('enter', 'origin', 1)]
+    # No data, no check.
+    tracker._object.mainloop.side_effect = None
+    tracker.mainloop()
+    assert zones.n_checks == 1
+
+
+def test_many_zones():
+    zones = ZoneSet()
+    for ix in range(500):
+        zones.add_sphere('sphere {}'.format(ix), (ix, 0, 0), 0.1)
+    events = recorder(zones)
+    move(zones, 0, (250, 0, 0))
+    assert events == [('enter', 'sphere 250', 0)]
+
+
+def test_duplicate_name():
+    zones = ZoneSet()
+    zones.add_box('table', (0, 0, 0), (1, 1, 1))
+    with pytest.raises(ValueError):
+        zones.add_sphere('table', (0, 0, 0), 1)